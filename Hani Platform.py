@@ -1,19 +1,174 @@
 import os
-import MetaTrader5 as mt5
+import argparse
+import bisect
+import hashlib
+import heapq
+import importlib
+import itertools
+import multiprocessing
+import queue
+import sqlite3
+import subprocess
+import sys
+import threading
+import time
+import uuid
 import requests
 import json
-import pandas as pd
+import numpy as np
+from collections import Counter, OrderedDict, deque, namedtuple
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from contextlib import contextmanager
+from dataclasses import dataclass
+from multiprocessing import shared_memory
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from datetime import datetime, timedelta, time as dt_time
-from PyQt6 import QtCore, QtGui, QtWidgets
-from PyQt6.QtWidgets import QMessageBox
 
-# MetaTrader 5 initialization
-mt5.initialize()
+class LazyModule:
+    """Stands in for a module that is only imported when one of its attributes is first read."""
+
+    def __init__(self, name):
+        self._name = name
+        self._module = None
+        self._lock = threading.Lock()
+
+    def __getattr__(self, attr):
+        if self._module is None:
+            with self._lock:
+                if self._module is None:
+                    self._module = importlib.import_module(self._name)
+        return getattr(self._module, attr)
+
+# pandas takes longer to import than the rest of the platform together, the dashboard is shown and
+# signals are received before the news download or a backtest first needs it
+pd = LazyModule("pandas")
+
+# The dashboard is not loaded when the engine runs headless, orchestrates engines or backtests, so servers need no Qt.
+# Sweep workers are spawned with the same arguments and do not load it either.
+if {"--headless", "--orchestrate", "--backtest", "--sweep", "--benchmark"} & set(sys.argv[1:]):
+    QtCore = QtGui = QtWidgets = QMessageBox = None
+else:
+    from PyQt6 import QtCore, QtGui, QtWidgets
+    from PyQt6.QtWidgets import QMessageBox
+
+try:
+    import MetaTrader5 as mt5
+except ImportError:
+    # Without the package, e.g. on Linux CI, the platform can only trade a MockBroker (see mt5_backend)
+    mt5 = None
+
+class Mt5Constants:
+    """The MetaTrader5 constants the platform uses, with the package's values.
+
+    They are read before a terminal backend is selected and where the package is not installed.
+    """
+    TRADE_ACTION_DEAL = 1
+    TRADE_ACTION_PENDING = 5
+    TRADE_ACTION_SLTP = 6
+    TRADE_ACTION_MODIFY = 7
+    TRADE_ACTION_REMOVE = 8
+    ORDER_TYPE_BUY = 0
+    ORDER_TYPE_SELL = 1
+    ORDER_TYPE_BUY_LIMIT = 2
+    ORDER_TYPE_SELL_LIMIT = 3
+    ORDER_TIME_GTC = 0
+    ORDER_FILLING_FOK = 0
+    ORDER_FILLING_IOC = 1
+    ORDER_FILLING_RETURN = 2
+    TRADE_RETCODE_REQUOTE = 10004
+    TRADE_RETCODE_REJECT = 10006
+    TRADE_RETCODE_DONE = 10009
+    TRADE_RETCODE_TIMEOUT = 10012
+    TRADE_RETCODE_INVALID = 10013
+    TRADE_RETCODE_INVALID_VOLUME = 10014
+    TRADE_RETCODE_INVALID_PRICE = 10015
+    TRADE_RETCODE_INVALID_STOPS = 10016
+    TRADE_RETCODE_TRADE_DISABLED = 10017
+    TRADE_RETCODE_MARKET_CLOSED = 10018
+    TRADE_RETCODE_NO_MONEY = 10019
+    TRADE_RETCODE_PRICE_CHANGED = 10020
+    TRADE_RETCODE_PRICE_OFF = 10021
+    TRADE_RETCODE_TOO_MANY_REQUESTS = 10024
+    TRADE_RETCODE_CONNECTION = 10031
+    TRADE_RETCODE_POSITION_CLOSED = 10036
+
+# Terminal backend: "terminal" trades through the MetaTrader5 package, "mock" through a MockBroker
+# configured by mock_broker, e.g. to run the platform on Linux CI. --mock [CONFIG] selects the mock too.
+mt5_backend = "terminal"
+mock_broker = {}
+terminal_retry_interval = 10  # Seconds between two attempts to connect the terminal at start
 
 # Define the URL for the webhook
 strategy_name = "Hani Trading"
 url = f"https://haniwebhook-28e2128c5cfd.herokuapp.com/{strategy_name}"
-re = requests.get(url, timeout=10)
+
+# Signals are pushed to the local receiver, e.g. POST http://127.0.0.1:5001/Hani Trading with the
+# webhook JSON as body. Set poll_webhook_signals to True to poll the webhook url instead.
+signal_receiver_address = ("127.0.0.1", 5001)
+poll_webhook_signals = False
+signal_max_age = 60  # Seconds after which a signal that could not be executed yet is dropped
+
+# An engine started with --headless is controlled over this local HTTP API, a dashboard started
+# with --attach 127.0.0.1:5002 renders it and sends it the user's commands
+engine_api_address = ("127.0.0.1", 5002)
+# Hot path metrics are served in the Prometheus text format on GET /metrics, by the engine API of a
+# headless engine and on metrics_address by the dashboard's own engine (None turns that server off)
+metrics_address = ("127.0.0.1", 5003)
+metrics_buckets = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)  # Seconds
+# The orchestrator (--orchestrate accounts.json) runs one headless engine per account. Engines whose
+# config sets no addresses get an API and a signal port counting up from orchestrator_first_port.
+orchestrator_first_port = 5100
+
+tick_poll_interval = 0.1  # Seconds between two polls of the ticks of the traded symbols
+tick_buffer_size = 256  # Recent ticks kept per symbol
+symbol_catalog_refresh = 6 * 60 * 60  # Seconds between two reloads of the symbols' digits, volume limits and stops levels
+
+# Everything the platform does is journaled as JSON lines in journal_dir. A journal file is rotated
+# once it is journal_max_bytes large or journal_max_age seconds old.
+journal_dir = "log"
+journal_max_bytes = 50 * 1024 * 1024
+journal_max_age = 24 * 60 * 60
+log_display_lines = 5000  # Lines kept in the dashboard's log view, older ones are dropped
+
+news_url = "https://nfs.faireconomy.media/ff_calendar_thisweek.json"
+news_cache_path = "news.db"  # Local cache of the news feed, traded on from the start before any download
+news_excel_path = "forex_news.xlsx"  # Optional manual backup, imported into the cache whenever the file changes
+news_time_offset = timedelta(hours=4)  # Added to the feed's UTC times to get the terminal's server time
+news_cache_days = 28  # Events older than this are dropped from the cache
+# Every high impact news event of the calendar blocks new entries from news_window_before until
+# news_window_after around its time. Only events in news_currencies count, None counts them all.
+# With news_affects_all_symbols positions on every symbol are managed during a window, otherwise
+# only those on symbols made of the news currency, e.g. EURUSD.r for EUR news.
+news_window_before = timedelta(minutes=15)
+news_window_after = timedelta(minutes=15)
+news_currencies = ('USD',)
+news_affects_all_symbols = True
+pivot_url = "http://127.0.0.1:5000/receive_pivot_data"  # Local Flask server URL
+
+# Outbound HTTP endpoints: (connect, read) timeouts in seconds and retries on connection errors and 5xx
+http_endpoints = {
+    'signals': {'url': url, 'timeout': (3.05, 5), 'retries': 1},
+    'news': {'url': news_url, 'timeout': (3.05, 15), 'retries': 3},
+    'pivot': {'url': pivot_url, 'timeout': (0.5, 1), 'retries': 0},
+}
+
+# Orders are sent by a pool of order_workers threads. A failed send is retried according to the class
+# of its retcode: 'retries' further attempts, the first after 'delay' seconds, each later one after
+# the previous delay times 'backoff'. Retcodes not listed fall in the 'other' class.
+order_workers = 4
+order_retry_policy = {
+    'requote': {'retcodes': {Mt5Constants.TRADE_RETCODE_REQUOTE, Mt5Constants.TRADE_RETCODE_PRICE_CHANGED}, 'retries': 3, 'delay': 0.2, 'backoff': 2},
+    'off_quotes': {'retcodes': {Mt5Constants.TRADE_RETCODE_PRICE_OFF}, 'retries': 3, 'delay': 1.0, 'backoff': 2},
+    'no_connection': {'retcodes': {Mt5Constants.TRADE_RETCODE_CONNECTION, Mt5Constants.TRADE_RETCODE_TIMEOUT, Mt5Constants.TRADE_RETCODE_TOO_MANY_REQUESTS}, 'retries': 5, 'delay': 2.0, 'backoff': 2},
+    'rejected': {'retcodes': {Mt5Constants.TRADE_RETCODE_INVALID_VOLUME, Mt5Constants.TRADE_RETCODE_INVALID_STOPS, Mt5Constants.TRADE_RETCODE_TRADE_DISABLED,
+                              Mt5Constants.TRADE_RETCODE_NO_MONEY, Mt5Constants.TRADE_RETCODE_POSITION_CLOSED}, 'retries': 0, 'delay': 0, 'backoff': 1},
+    'other': {'retcodes': set(), 'retries': 4, 'delay': 60.0, 'backoff': 1},
+}
+flatten_rounds = 5  # Close requests sent by close_all_positions before giving up on positions left open
+
 # Fixed list of symbols
 fixed_symbols = ['XAUUSD.r', 'USDJPY.r', 'USDCAD.r', 'USDCHF.r', 'EURUSD.r', 'AUDUSD.r', 'EURCAD.r', 'EURCHF.r', 'EURGBP.r', 'AUDCAD.r', 'EURJPY.r', 'GBPJPY.r', 'NZDUSD.r', 'XAGUSD.r']
 one_time = False
@@ -24,8 +179,92 @@ last_pivot_low_value = None
 # Trade management mode: 1 = Single direction, 2 = Hedging, 3 = All signals, 4 = Smart Hedging
 trade_management_mode = 1  # Default value, will be changed by ComboBox
 
+# Set by connect_account(), every file of an account is named after its login
+account_login = None
 # Define the path for the balance file
-balance_file_path = f"daily_balance {mt5.account_info().login}.txt"
+balance_file_path = None
+# Total profits, TP states and symbol settings survive restarts in this database
+state_file_path = None
+
+def connect_account(terminal=None):
+    """Initialize MetaTrader 5 and name the account's balance and state files after its login.
+
+    terminal holds keyword arguments of mt5.initialize() such as path, login, password and server,
+    so that every engine process started by the orchestrator trades its own terminal and account.
+    """
+    global account_login, balance_file_path, state_file_path
+    if not mt5.initialize(**(terminal or {})):
+        raise RuntimeError(f"MetaTrader 5 initialization failed: {mt5.last_error()}")
+    account_login = mt5.account_info().login
+    balance_file_path = f"daily_balance {account_login}.txt"
+    state_file_path = f"state {account_login}.db"
+    return account_login
+
+def use_mt5(backend):
+    """Send every terminal call of the platform to backend, the MetaTrader5 module or a SimulatedBroker."""
+    global mt5
+    mt5 = backend
+
+def select_mt5_backend(mock=None):
+    """Trade a started MockBroker configured by mock, or by mock_broker when mt5_backend is "mock",
+    and otherwise the MetaTrader5 package. Return the mock broker, or None."""
+    if mock is None and mt5_backend == "mock":
+        mock = mock_broker
+    broker = None
+    if mock is not None:
+        broker = MockBroker(mock)
+        broker.start()
+    elif mt5 is None:
+        raise RuntimeError("The MetaTrader5 package is not installed, start the platform with --mock to use the mock broker")
+    # Every terminal call of the live platform is timed for the metrics
+    use_mt5(InstrumentedMt5(broker if broker is not None else mt5, metrics))
+    return broker
+
+class InstrumentedMt5:
+    """Wraps a terminal backend, serialises its calls and counts the calls of each of its functions.
+
+    The engine thread, the tick stream and the order workers all use the terminal, and the
+    MetaTrader5 package is not documented to be thread-safe, so only one call runs at a time.
+    With metrics every call is also timed, without the wait for the lock, and it counts as an
+    error when it raised or returned None, or for order_send when the retcode is not
+    TRADE_RETCODE_DONE.
+    """
+
+    def __init__(self, backend, metrics=None):
+        self.backend = backend
+        self.metrics = metrics
+        self.calls = Counter()
+        self.lock = threading.RLock()
+
+    def __getattr__(self, name):
+        value = getattr(self.backend, name)
+        if callable(value):
+            value = self._wrap(name, value)
+        setattr(self, name, value)  # Later lookups skip __getattr__
+        return value
+
+    def _wrap(self, name, function):
+        calls, registry, lock = self.calls, self.metrics, self.lock
+        if registry is None:
+            def call(*args, **kwargs):
+                with lock:
+                    calls[name] += 1
+                    return function(*args, **kwargs)
+            return call
+
+        def call(*args, **kwargs):
+            with lock:
+                calls[name] += 1
+                started = time.perf_counter()
+                result = None
+                try:
+                    result = function(*args, **kwargs)
+                    return result
+                finally:
+                    elapsed = time.perf_counter() - started
+                    error = result is None or (name == 'order_send' and result.retcode != Mt5Constants.TRADE_RETCODE_DONE)
+                    registry.observe('mt5_call_seconds', elapsed, 'function', name, error)
+        return call
 
 def create_balance_file():
     if not os.path.exists(balance_file_path):
@@ -43,9 +282,1489 @@ def write_balance_to_file(balance):
     with open(balance_file_path, "w") as file:
         file.write(f"{balance}\n")
 
-class TradingDashboard(QtWidgets.QWidget):
+class PositionStore:
+    """Open positions indexed by ticket, by symbol and by (symbol, side).
+
+    The store lives as long as the engine and is refreshed from every snapshot, only the
+    positions that opened or closed touch the symbol and side indexes. Tickets opened and
+    closed since the last take_changes() are kept so the engine can react to them once per
+    cycle, even when snapshots were taken in between by button handlers.
+    """
+
+    def __init__(self):
+        self._by_ticket = {}
+        self._by_symbol = {}
+        self._by_side = {}
+        self._opened = {}
+        self._closed = {}
+
+    def __len__(self):
+        return len(self._by_ticket)
+
+    def update(self, positions):
+        current = {pos.ticket: pos for pos in positions}
+        for ticket in self._by_ticket.keys() - current.keys():
+            self._remove(ticket)
+        for ticket, pos in current.items():
+            if ticket in self._by_ticket:
+                # Same ticket, new profit and volume: replace in place, indexes keep their order
+                self._by_ticket[ticket] = pos
+                self._by_symbol[pos.symbol][ticket] = pos
+                self._by_side[(pos.symbol, pos.type)][ticket] = pos
+            else:
+                self._add(pos)
+
+    def _add(self, pos):
+        self._by_ticket[pos.ticket] = pos
+        self._by_symbol.setdefault(pos.symbol, {})[pos.ticket] = pos
+        self._by_side.setdefault((pos.symbol, pos.type), {})[pos.ticket] = pos
+        self._opened[pos.ticket] = pos
+
+    def _remove(self, ticket):
+        pos = self._by_ticket.pop(ticket)
+        for index, key in ((self._by_symbol, pos.symbol), (self._by_side, (pos.symbol, pos.type))):
+            bucket = index[key]
+            del bucket[ticket]
+            if not bucket:
+                del index[key]
+        if self._opened.pop(ticket, None) is None:
+            self._closed[ticket] = pos
+
+    def get(self, ticket):
+        return self._by_ticket.get(ticket)
+
+    def for_symbol(self, symbol, side=None):
+        if side is None:
+            bucket = self._by_symbol.get(symbol)
+        else:
+            bucket = self._by_side.get((symbol, side))
+        return tuple(bucket.values()) if bucket else ()
+
+    def symbols(self):
+        return self._by_symbol.keys()
+
+    def take_changes(self):
+        """Return the positions opened and closed since the last call, as ticket -> position dicts."""
+        opened, closed = self._opened, self._closed
+        self._opened, self._closed = {}, {}
+        return opened, closed
+
+
+SymbolSpec = namedtuple('SymbolSpec', 'name digits point volume_min volume_max volume_step trade_contract_size '
+                                       'trade_stops_level trade_freeze_level entry_offset break_even_offset')
+
+class SymbolCatalog:
+    """Static properties of the traded symbols, read from the terminal once and served from memory.
+
+    Digits, volume limits, contract size and stops levels only change when the broker edits a
+    symbol, so refresh() reloads the known symbols on a slow schedule, and they are all dropped
+    when the account is on another trade server. Every SymbolSpec also holds the price offsets
+    of the entry levels (40 points) and of break even (12 points).
+    """
+
     def __init__(self):
+        self.server = None
+        self._specs = {}
+        self._unknown = set()  # Symbols the terminal did not know, asked for again after the next refresh
+
+    def get(self, symbol):
+        """Return the symbol's SymbolSpec, or None when the terminal does not know the symbol."""
+        spec = self._specs.get(symbol)
+        if spec is None and symbol not in self._unknown:
+            info = mt5.symbol_info(symbol)
+            if info is None:
+                self._unknown.add(symbol)
+                return None
+            spec = self._specs[symbol] = self.spec(info)
+        return spec
+
+    @staticmethod
+    def spec(info):
+        return SymbolSpec(info.name, info.digits, info.point, info.volume_min, info.volume_max, info.volume_step,
+                          info.trade_contract_size, info.trade_stops_level, info.trade_freeze_level,
+                          40 / 10 ** info.digits, 12 / 10 ** info.digits)
+
+    def use_server(self, server):
+        """Drop every symbol when the account moved to another trade server, return whether it did."""
+        if server == self.server:
+            return False
+        changed = self.server is not None  # The first server is the one the symbols were loaded from
+        self.server = server
+        if changed:
+            self._specs.clear()
+            self._unknown.clear()
+        return changed
+
+    def refresh(self):
+        self._unknown.clear()
+        for symbol in list(self._specs):
+            info = mt5.symbol_info(symbol)
+            if info is None:
+                del self._specs[symbol]
+            else:
+                self._specs[symbol] = self.spec(info)
+
+    def __len__(self):
+        return len(self._specs)
+
+
+class BrokerSnapshot:
+    """One consistent view of positions, orders, account and ticks taken from the terminal.
+
+    A snapshot is taken once at the start of every cycle and shared by all stages, so each
+    decision in the cycle sees the same prices and the terminal is queried a handful of times
+    instead of once per position and per table cell. A snapshot for a command between cycles can
+    be limited to one symbol or one ticket, it then only holds those positions and orders. The
+    account and the orders are fetched when they are first read.
+    """
+
+    def __init__(self, symbols=(), store=None, ticks=None, catalog=None, symbol=None, ticket=None):
+        self.taken_at = datetime.now()
+        self.stale = False
+        self._scope = {'ticket': ticket} if ticket is not None else {'symbol': symbol} if symbol is not None else {}
+        self._account = None
+        self._orders = None
+        # Symbol properties come from the engine's long-lived catalog
+        self.catalog = catalog if catalog is not None else SymbolCatalog()
+        self.positions = tuple(mt5.positions_get(**self._scope) or ())
+
+        # Lookups go through the engine's long-lived store, refreshed with these positions
+        self.store = store if store is not None else PositionStore()
+        self.store.update(self.positions)
+
+        # Ticks already streamed are reused, only the missing ones are fetched, those of a limited
+        # snapshot when they are first read
+        self._ticks = dict(ticks) if ticks else {}
+        if not self._scope:
+            for symbol in set(symbols) | set(self.store.symbols()):
+                self.tick(symbol)
+
+    @property
+    def account(self):
+        if self._account is None:
+            self._account = mt5.account_info()
+        return self._account
+
+    @property
+    def orders(self):
+        if self._orders is None:
+            self._orders = tuple(mt5.orders_get(**self._scope) or ())
+        return self._orders
+
+    @property
+    def balance(self):
+        return self.account.balance
+
+    @property
+    def equity(self):
+        return self.account.equity
+
+    def position(self, ticket):
+        return self.store.get(ticket)
+
+    def positions_for(self, symbol, side=None):
+        """Positions of the symbol, optionally only mt5.ORDER_TYPE_BUY or mt5.ORDER_TYPE_SELL ones."""
+        return self.store.for_symbol(symbol, side)
+
+    def tick(self, symbol):
+        """Return the tick for the symbol, fetching it only the first time it is asked for."""
+        if symbol not in self._ticks:
+            self._ticks[symbol] = mt5.symbol_info_tick(symbol)
+        return self._ticks[symbol]
+
+    def symbol_info(self, symbol):
+        """Return the symbol's SymbolSpec, or None when the terminal does not know the symbol."""
+        return self.catalog.get(symbol)
+
+@dataclass(frozen=True)
+class TpAction:
+    """One trade management step decided by evaluate_tp_levels()."""
+    kind: str  # 'tp1', 'tp2', 'close_symbol' or 'loss_close'
+    symbol: str
+    ticket: int = 0
+    percentage: float = 0.0
+    threshold: float = 0.0
+
+
+def evaluate_tp_levels(positions, tp_status, symbol_settings, defaults, total_profits, balance):
+    """Decide the TP1, TP2, R3 and loss threshold closes for all open positions in one pass.
+
+    Positions are laid out as columns (profit, volume, symbol index, TP flags) and the settings
+    as one row per symbol, so the rules cost a few array operations however many positions are
+    open. A symbol that reaches R3 is closed as a whole and gets no other action.
+    """
+    count = len(positions)
+    if not count:
+        return []
+
+    symbol_index = {}
+    index = np.fromiter((symbol_index.setdefault(pos.symbol, len(symbol_index)) for pos in positions), np.intp, count)
+    symbols = list(symbol_index)
+    profit = np.fromiter((pos.profit for pos in positions), float, count)
+    volume = np.fromiter((pos.volume for pos in positions), float, count)
+    status = [tp_status.get(pos.ticket, {}) for pos in positions]
+    tp1_applied = np.fromiter((st.get('tp1_applied', False) for st in status), bool, count)
+    tp2_applied = np.fromiter((st.get('tp2_applied', False) for st in status), bool, count)
+
+    settings = [symbol_settings.get(symbol, defaults) for symbol in symbols]
+
+    def column(key):
+        return np.array([st.get(key, defaults.get(key, 0.0)) for st in settings], dtype=float)
+
+    R1, R2, R3 = column('R1'), column('R2'), column('R3')
+    commission, loss_threshold = column('commission'), column('loss_threshold')
+    tp1_percentage, tp2_percentage = column('tp1'), column('tp2')
+    banked = np.array([total_profits.get(symbol, 0) for symbol in symbols], dtype=float)
+    real_profit = banked + np.bincount(index, weights=profit, minlength=len(symbols))
+
+    fee = volume * commission[index]
+    tp1 = ~tp1_applied & (profit > R1[index] * balance / 100 + fee)
+    tp2 = ~tp2_applied & (real_profit[index] > R2[index] * balance / 100 + fee)
+    close_symbol = (real_profit > R3 * balance / 100) & (banked > 0)
+    # The loss threshold is halved once TP1 has taken part of the position off
+    threshold = np.where(tp1_applied, loss_threshold[index] / 2, loss_threshold[index])
+    loss_close = (loss_threshold[index] > 0) & (profit < 0) & (-profit * 100 >= threshold * balance)
+
+    actions = [TpAction('close_symbol', symbols[i]) for i in np.flatnonzero(close_symbol)]
+    active = ~close_symbol[index]
+    for i in np.flatnonzero(active & (tp1 | tp2 | loss_close)):
+        pos = positions[i]
+        if tp1[i]:
+            actions.append(TpAction('tp1', pos.symbol, pos.ticket, float(tp1_percentage[index[i]])))
+        if tp2[i]:
+            actions.append(TpAction('tp2', pos.symbol, pos.ticket, float(tp2_percentage[index[i]])))
+        if loss_close[i]:
+            actions.append(TpAction('loss_close', pos.symbol, pos.ticket, threshold=float(threshold[i])))
+    return actions
+
+
+@dataclass(frozen=True)
+class PortfolioSummary:
+    """Account-wide figures of one cycle, computed once and read by every label and check."""
+    balance: float
+    equity: float
+    positions: int
+    commission: float  # Commission of the open volume
+    real_profit: float  # Sum over the open positions of their symbol's total profit, their profit and less their commission
+    symbol_real_profit: dict  # Symbol -> total profit plus the profit of its open positions less their commission
+    previous_day_balance: float
+    target_equity: float  # Equity at which the daily profit target is reached
+
+    @property
+    def required_profit(self):
+        return self.target_equity - self.equity
+
+    @property
+    def target_reached(self):
+        return self.equity >= self.target_equity
+
+
+def summarize_portfolio(snapshot, total_profits, symbol_settings, commission, previous_day_balance, daily_profit_target):
+    """Sum the positions of the snapshot by symbol in one pass, commission is the default per lot."""
+    positions = snapshot.positions
+    count = len(positions)
+    symbol_index = {}
+    index = np.fromiter((symbol_index.setdefault(pos.symbol, len(symbol_index)) for pos in positions), np.intp, count)
+    symbols = list(symbol_index)
+    profit = np.fromiter((pos.profit for pos in positions), float, count)
+    volume = np.fromiter((pos.volume for pos in positions), float, count)
+    rate = np.array([symbol_settings.get(symbol, {}).get('commission', commission) for symbol in symbols], dtype=float)
+    banked = np.array([total_profits.get(symbol, 0) for symbol in symbols], dtype=float)
+
+    fee = volume * rate[index]
+    symbol_real_profit = banked + np.bincount(index, weights=profit - fee, minlength=len(symbols))
+    return PortfolioSummary(
+        balance=snapshot.balance,
+        equity=snapshot.equity,
+        positions=count,
+        commission=float(fee.sum()),
+        real_profit=float((banked[index] + profit - fee).sum()),
+        symbol_real_profit=dict(zip(symbols, symbol_real_profit.tolist())),
+        previous_day_balance=previous_day_balance,
+        target_equity=previous_day_balance + (daily_profit_target * previous_day_balance / 100),
+    )
+
+
+class Metrics:
+    """Latency histograms with error counts, keyed by metric name and one optional label.
+
+    A series is created by its first observation, from any thread. render() writes every series
+    in the Prometheus text format and summary() gives the rows of the dashboard's diagnostics
+    panel, with a p99 estimated from the histogram buckets.
+    """
+
+    def __init__(self, buckets=metrics_buckets, prefix="hani"):
+        self.buckets = tuple(buckets)
+        self.prefix = prefix
+        self._series = {}  # (name, label, value) -> {'buckets', 'sum', 'count', 'errors', 'max'}
+        self._lock = threading.Lock()
+
+    def observe(self, name, seconds, label=None, value=None, error=False):
+        index = bisect.bisect_left(self.buckets, seconds)
+        with self._lock:
+            series = self._series.get((name, label, value))
+            if series is None:
+                series = self._series[(name, label, value)] = {
+                    'buckets': [0] * (len(self.buckets) + 1), 'sum': 0.0, 'count': 0, 'errors': 0, 'max': 0.0}
+            series['buckets'][index] += 1
+            series['sum'] += seconds
+            series['count'] += 1
+            series['errors'] += int(error)
+            series['max'] = max(series['max'], seconds)
+
+    @contextmanager
+    def timer(self, name, label=None, value=None):
+        """Observe the time spent in the with block, as an error when it raises."""
+        started = time.perf_counter()
+        error = False
+        try:
+            yield
+        except BaseException:
+            error = True
+            raise
+        finally:
+            self.observe(name, time.perf_counter() - started, label, value, error)
+
+    def summary(self):
+        """One dict per series: name, value of its label, count, errors, mean_ms, p99_ms and max_ms."""
+        with self._lock:
+            series = [(key, dict(values, buckets=list(values['buckets']))) for key, values in self._series.items()]
+        rows = []
+        for (name, label, value), values in sorted(series, key=lambda item: (item[0][0], str(item[0][2]))):
+            count = values['count']
+            p99 = values['max']
+            cumulative = 0
+            for bound, bucket in zip(self.buckets, values['buckets']):
+                cumulative += bucket
+                if cumulative >= 0.99 * count:
+                    p99 = min(bound, values['max'])
+                    break
+            rows.append({'name': name, 'value': value, 'count': count, 'errors': values['errors'],
+                         'mean_ms': values['sum'] / count * 1000, 'p99_ms': p99 * 1000, 'max_ms': values['max'] * 1000})
+        return rows
+
+    def render(self):
+        """All series in the Prometheus text exposition format."""
+        with self._lock:
+            series = sorted(((key, dict(values, buckets=list(values['buckets']))) for key, values in self._series.items()),
+                            key=lambda item: (item[0][0], str(item[0][2])))
+        lines = []
+        for name, group in itertools.groupby(series, key=lambda item: item[0][0]):
+            group = list(group)
+            metric = f"{self.prefix}_{name}"
+            lines.append(f"# TYPE {metric} histogram")
+            for (_, label, value), values in group:
+                labels = f'{label}="{value}"' if label else ''
+                cumulative = 0
+                for bound, bucket in zip(self.buckets + (float('inf'),), values['buckets']):
+                    cumulative += bucket
+                    le = '+Inf' if bound == float('inf') else f"{bound:g}"
+                    lines.append(f'{metric}_bucket{{{labels + "," if labels else ""}le="{le}"}} {cumulative}')
+                lines.append(f"{metric}_sum{{{labels}}} {values['sum']:.6f}".replace('{}', ''))
+                lines.append(f"{metric}_count{{{labels}}} {values['count']}".replace('{}', ''))
+            # Errors are a counter family of their own, e.g. hani_mt5_call_errors_total
+            errors = f"{self.prefix}_{name.removesuffix('_seconds')}_errors_total"
+            lines.append(f"# TYPE {errors} counter")
+            for (_, label, value), values in group:
+                labels = f'{label}="{value}"' if label else ''
+                lines.append(f"{errors}{{{labels}}} {values['errors']}".replace('{}', ''))
+        return "\n".join(lines) + "\n"
+
+# Registry of the hot path: cycle stages, terminal calls, HTTP requests, signal-to-fill and rendering
+metrics = Metrics()
+
+def send_metrics(handler, registry=None):
+    """Answer a GET /metrics request with the Prometheus text of registry, metrics by default."""
+    body = (registry or metrics).render().encode('utf-8')
+    handler.send_response(200)
+    handler.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+    handler.send_header('Content-Length', str(len(body)))
+    handler.end_headers()
+    handler.wfile.write(body)
+
+class MetricsServer:
+    """Serves GET /metrics for an engine that has no EngineApiServer, i.e. the dashboard's own."""
+
+    def __init__(self, address, registry=None):
+        self.address = address
+        self.registry = registry
+        self.server = None
+
+    def start(self):
+        registry = self.registry
+
+        class MetricsHandler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if urlsplit(self.path).path == '/metrics':
+                    send_metrics(self, registry)
+                else:
+                    self.send_error(404)
+
+            def log_message(self, format, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(self.address, MetricsHandler)
+        threading.Thread(target=self.server.serve_forever, name="MetricsServer", daemon=True).start()
+
+    def stop(self):
+        if self.server is not None:
+            self.server.shutdown()
+            self.server.server_close()
+            self.server = None
+
+class EndpointStats:
+    """Call count, error count and latency of one HTTP endpoint."""
+
+    def __init__(self):
+        self.count = 0
+        self.errors = 0
+        self.total_seconds = 0.0
+        self.max_seconds = 0.0
+        self.last_seconds = 0.0
+
+    def record(self, seconds, error):
+        self.count += 1
+        self.errors += int(error)
+        self.total_seconds += seconds
+        self.max_seconds = max(self.max_seconds, seconds)
+        self.last_seconds = seconds
+
+    def summary(self):
+        average_ms = self.total_seconds / self.count * 1000 if self.count else 0.0
+        return f"{self.count} calls, {self.errors} errors, avg {average_ms:.0f} ms, max {self.max_seconds * 1000:.0f} ms"
+
+class HttpClient:
+    """Shared HTTP session for all outbound requests.
+
+    Connections are kept alive and pooled per host, and every endpoint has its own timeouts
+    and bounded retries with exponential backoff, so no request can hang the engine.
+    """
+
+    def __init__(self, endpoints):
+        self.endpoints = endpoints
+        self.session = requests.Session()
+        self.stats = {name: EndpointStats() for name in endpoints}
+        for endpoint in endpoints.values():
+            retry = Retry(
+                total=endpoint['retries'],
+                backoff_factor=0.5,
+                status_forcelist=(429, 500, 502, 503, 504),
+                allowed_methods=frozenset({'GET'}),
+                raise_on_status=False
+            )
+            # Adapters are matched by url prefix, so mount them on the endpoint's host
+            parts = urlsplit(endpoint['url'])
+            self.session.mount(f"{parts.scheme}://{parts.netloc}/", HTTPAdapter(pool_maxsize=4, max_retries=retry))
+
+    def get(self, name, **kwargs):
+        endpoint = self.endpoints[name]
+        start = time.perf_counter()
+        try:
+            response = self.session.get(endpoint['url'], timeout=endpoint['timeout'], **kwargs)
+        except requests.RequestException:
+            self.stats[name].record(time.perf_counter() - start, error=True)
+            metrics.observe('http_request_seconds', time.perf_counter() - start, 'endpoint', name, error=True)
+            raise
+        self.stats[name].record(time.perf_counter() - start, error=response.status_code >= 400)
+        metrics.observe('http_request_seconds', time.perf_counter() - start, 'endpoint', name, error=response.status_code >= 400)
+        return response
+
+http_client = HttpClient(http_endpoints)
+
+@dataclass(eq=False)
+class PriceTrigger:
+    """A price level watched by the PriceTriggerIndex."""
+    key: object
+    symbol: str
+    direction: str  # 'above' fires when the price rises to the level, 'below' when it falls to it
+    level: object = None  # None parks the trigger until it gets a level
+    one_shot: bool = True  # One-shot triggers stay disarmed after firing until arm() is called
+    rearm_gap: float = 0.0  # Others arm again once the price is back this far on the other side of the level
+    armed: bool = True
+    data: object = None
+
+
+class PriceTriggerIndex:
+    """Price triggers of every symbol, kept in sorted lists of levels.
+
+    Each symbol has an 'up' book of entries that act when the price is at or above their level and
+    a 'down' book of entries that act at or below it. An armed 'above' trigger sits in the up book,
+    and once a re-armable one has fired it waits in the down book at its re-arm level (mirrored for
+    'below' triggers). check() bisects both books, so a tick only touches the entries it crosses.
+    """
+
+    def __init__(self):
+        self._triggers = {}  # key -> PriceTrigger
+        self._books = {}  # symbol -> {'up': (levels, triggers), 'down': (levels, triggers)}
+        self._slots = {}  # key -> (book, level) of the entry the trigger currently has
+
+    def __len__(self):
+        return len(self._triggers)
+
+    def get(self, key):
+        return self._triggers.get(key)
+
+    def place(self, trigger):
+        """Add the trigger, replacing any trigger with the same key."""
+        self.remove(trigger.key)
+        self._triggers[trigger.key] = trigger
+        if trigger.armed:
+            self._insert(trigger, waiting=False)
+
+    def remove(self, key):
+        trigger = self._triggers.pop(key, None)
+        if trigger is not None:
+            self._unlink(trigger)
+        return trigger
+
+    def set_level(self, key, level):
+        """Move the trigger to a new level, None parks it, keeping its armed or waiting state."""
+        trigger = self._triggers[key]
+        waiting = not trigger.armed and key in self._slots
+        self._unlink(trigger)
+        trigger.level = level
+        if trigger.armed or waiting:
+            self._insert(trigger, waiting)
+
+    def arm(self, key):
+        trigger = self._triggers[key]
+        self._unlink(trigger)
+        trigger.armed = True
+        self._insert(trigger, waiting=False)
+
+    def disarm(self, key):
+        trigger = self._triggers[key]
+        self._unlink(trigger)
+        trigger.armed = False
+
+    def check(self, symbol, price):
+        """Return the triggers of the symbol that fire at price, in level order."""
+        books = self._books.get(symbol)
+        if not books:
+            return []
+        levels, entries = books['up']
+        index = bisect.bisect_right(levels, price)
+        crossed = entries[:index]
+        del levels[:index], entries[:index]
+        levels, entries = books['down']
+        index = bisect.bisect_left(levels, price)
+        crossed += reversed(entries[index:])
+        del levels[index:], entries[index:]
+
+        fired = []
+        for trigger in crossed:
+            del self._slots[trigger.key]
+            if trigger.armed:
+                fired.append(trigger)
+                trigger.armed = False
+                if not trigger.one_shot:
+                    self._insert(trigger, waiting=True)
+            else:
+                trigger.armed = True
+                self._insert(trigger, waiting=False)
+        return fired
+
+    def _insert(self, trigger, waiting):
+        if trigger.level is None:
+            return
+        above = trigger.direction == 'above'
+        if waiting:
+            level = trigger.level - trigger.rearm_gap if above else trigger.level + trigger.rearm_gap
+            book = 'down' if above else 'up'
+        else:
+            level = trigger.level
+            book = 'up' if above else 'down'
+        books = self._books.setdefault(trigger.symbol, {'up': ([], []), 'down': ([], [])})
+        levels, entries = books[book]
+        index = bisect.bisect_right(levels, level)
+        levels.insert(index, level)
+        entries.insert(index, trigger)
+        self._slots[trigger.key] = (book, level)
+
+    def _unlink(self, trigger):
+        slot = self._slots.pop(trigger.key, None)
+        if slot is None:
+            return
+        book, level = slot
+        levels, entries = self._books[trigger.symbol][book]
+        index = bisect.bisect_left(levels, level)
+        while entries[index] is not trigger:
+            index += 1
+        del levels[index], entries[index]
+
+NewsWindow = namedtuple('NewsWindow', 'start end news')  # Merged blackout window and the event it is for
+
+class NewsCalendar:
+    """High impact news events sorted by time, with the blackout windows around them.
+
+    Lookups bisect arrays of event times and of window bounds, so they cost O(log n) however
+    long the calendar is. The windows of the events of a set of currencies are merged where
+    they overlap and built once per set, the first time the set is looked up. A symbol stands
+    for the two currencies it is made of, e.g. XAU and USD for XAUUSD.r.
+    """
+
+    def __init__(self, events=(), before=news_window_before, after=news_window_after):
+        self.events = sorted(events, key=lambda news: news['date'])
+        self.before = before.total_seconds()
+        self.after = after.total_seconds()
+        self._times = np.array([self.seconds(news['date']) for news in self.events], dtype=float)
+        self._windows = {}  # currencies (frozenset or None) -> (event indexes, event times, window starts, window ends)
+
+    def __len__(self):
+        return len(self.events)
+
+    @staticmethod
+    def seconds(moment):
+        return (moment - datetime(1970, 1, 1)).total_seconds()
+
+    @staticmethod
+    def symbol_currencies(symbol):
+        return frozenset((symbol[:3], symbol[3:6]))
+
+    def window(self, moment, currencies=None, symbol=None):
+        """Return the NewsWindow containing moment, for the earliest event whose window does, or None."""
+        indexes, times, starts, ends = self._filtered(currencies, symbol)
+        t = self.seconds(moment)
+        i = int(np.searchsorted(starts, t, side='right')) - 1
+        if i < 0 or t > ends[i]:
+            return None
+        news = self.events[indexes[int(np.searchsorted(times, t - self.after, side='left'))]]
+        return NewsWindow(datetime(1970, 1, 1) + timedelta(seconds=float(starts[i])),
+                          datetime(1970, 1, 1) + timedelta(seconds=float(ends[i])), news)
+
+    def next_event(self, moment, currencies=None, symbol=None):
+        """Return the first event after moment, or None."""
+        indexes, times, _, _ = self._filtered(currencies, symbol)
+        i = int(np.searchsorted(times, self.seconds(moment), side='right'))
+        return self.events[indexes[i]] if i < len(indexes) else None
+
+    def _filtered(self, currencies, symbol):
+        if symbol is not None:
+            currencies = self.symbol_currencies(symbol) & frozenset(currencies) if currencies is not None else self.symbol_currencies(symbol)
+        elif currencies is not None:
+            currencies = frozenset(currencies)
+        if currencies not in self._windows:
+            indexes = np.array([i for i, news in enumerate(self.events) if currencies is None or news['currency'] in currencies], dtype=int)
+            times = self._times[indexes]
+            starts, ends = [], []
+            for start, end in zip(times - self.before, times + self.after):
+                if ends and start <= ends[-1]:
+                    ends[-1] = max(ends[-1], end)
+                else:
+                    starts.append(start)
+                    ends.append(end)
+            self._windows[currencies] = (indexes, times, np.array(starts, dtype=float), np.array(ends, dtype=float))
+        return self._windows[currencies]
+
+class TickStream:
+    """Polls the last tick of every subscribed symbol on its own thread.
+
+    Each symbol keeps its recent ticks in a ring buffer. A tick is only stored when its bid or
+    ask differs from the previous one, and on_change(symbols) is called with the symbols that
+    moved in a poll, so consumers look at the symbols that actually ticked and nothing else.
+    """
+
+    def __init__(self, on_change, log=print, interval=tick_poll_interval, buffer_size=tick_buffer_size):
+        self.on_change = on_change
+        self.log = log
+        self.interval = interval
+        self.buffer_size = buffer_size
+        self._buffers = {}  # symbol -> deque of ticks, newest last
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def subscribe(self, symbols):
+        with self._lock:
+            for symbol in symbols:
+                if symbol not in self._buffers:
+                    self._buffers[symbol] = deque(maxlen=self.buffer_size)
+
+    def last(self, symbol):
+        """Return the newest tick of the symbol, or None before its first poll."""
+        with self._lock:
+            buffer = self._buffers.get(symbol)
+            return buffer[-1] if buffer else None
+
+    def latest(self):
+        """Return the newest tick of every symbol that has one, as a symbol -> tick dict."""
+        with self._lock:
+            return {symbol: buffer[-1] for symbol, buffer in self._buffers.items() if buffer}
+
+    def history(self, symbol):
+        with self._lock:
+            return list(self._buffers.get(symbol, ()))
+
+    def poll(self):
+        """Fetch one tick per subscribed symbol and report the symbols whose bid or ask changed."""
+        with self._lock:
+            symbols = list(self._buffers)
+        changed = []
+        for symbol in symbols:
+            tick = mt5.symbol_info_tick(symbol)
+            if tick is None:
+                continue
+            with self._lock:
+                buffer = self._buffers[symbol]
+                previous = buffer[-1] if buffer else None
+                if previous is not None and previous.bid == tick.bid and previous.ask == tick.ask:
+                    continue
+                buffer.append(tick)
+            changed.append(symbol)
+        if changed:
+            self.on_change(changed)
+        return changed
+
+    def start(self):
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="TickStream", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self.poll()
+            except Exception as e:
+                self.log(f"Error while polling ticks: {e}")
+
+class SignalReceiver:
+    """Local HTTP endpoint that webhook signals are pushed to.
+
+    Every POSTed signal is queued in arrival order, either as the webhook JSON with an 'event'
+    or as the bare event text. Signals carrying an 'id' that was already received are dropped,
+    so a relay that retries a delivery does not open the same trade twice.
+    """
+
+    def __init__(self, address, on_signal=None, max_remembered_ids=1000, clock=time.monotonic):
+        self.address = address
+        self.on_signal = on_signal  # Called from the receiving thread after a signal is queued
+        self.clock = clock  # Stamps the time a signal was received
+        self.max_remembered_ids = max_remembered_ids
+        self.pending = queue.Queue()
+        self.server = None
+        self._seen_ids = OrderedDict()
+        self._lock = threading.Lock()
+
+    def start(self):
+        receiver = self
+
+        class SignalHandler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                body = self.rfile.read(int(self.headers.get('Content-Length', 0))).decode('utf-8').strip()
+                try:
+                    signal = json.loads(body)
+                except json.JSONDecodeError:
+                    signal = {'event': body}
+                self.send_response(202 if receiver.push(signal) else 200)
+                self.end_headers()
+
+            def log_message(self, format, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(self.address, SignalHandler)
+        threading.Thread(target=self.server.serve_forever, name="SignalReceiver", daemon=True).start()
+
+    def stop(self):
+        if self.server is not None:
+            self.server.shutdown()
+            self.server.server_close()
+            self.server = None
+
+    def push(self, signal):
+        """Queue a signal unless it has no event or is a duplicate, return whether it was queued."""
+        if not isinstance(signal, dict) or not signal.get('event'):
+            return False
+        signal_id = signal.get('id')
+        with self._lock:
+            if signal_id is not None:
+                if signal_id in self._seen_ids:
+                    return False
+                self._seen_ids[signal_id] = True
+                if len(self._seen_ids) > self.max_remembered_ids:
+                    self._seen_ids.popitem(last=False)
+            self.pending.put((self.clock(), signal))
+        if self.on_signal is not None:
+            self.on_signal()
+        return True
+
+    def drain(self):
+        """Return every queued (received_at, signal) pair in arrival order."""
+        signals = []
+        while True:
+            try:
+                signals.append(self.pending.get_nowait())
+            except queue.Empty:
+                return signals
+
+@dataclass(frozen=True)
+class OrderOutcome:
+    """How an order sent through the OrderPipeline ended."""
+    key: tuple  # (symbol, ticket, intent)
+    request: dict
+    result: object  # Last mt5.order_send() result, None if the request could not be sent
+    attempts: int
+    latency: float  # Seconds from submit() to the final result, retries included
+    error: str = ''
+    callback: object = None
+    signal_latency: float = None  # Seconds from the receipt of the signal the order acts on to the final result
+
+    @property
+    def ok(self):
+        return self.result is not None and self.result.retcode == mt5.TRADE_RETCODE_DONE
+
+    @property
+    def reason(self):
+        if self.result is not None:
+            return self.result.comment
+        return self.error
+
+
+class NewsStore:
+    """High impact news events cached in SQLite, with the validators of the last feed download.
+
+    The engine trades on the cache, which it loads at start before any download, and a failed
+    download leaves it as it was. Storing events replaces the ones between the first and the
+    last of their days, so a weekly feed or an imported backup only overwrites its own week.
+    """
+
+    def __init__(self, path=None):
+        self.path = path = path or news_cache_path
+        self.conn = sqlite3.connect(path, isolation_level=None, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS news ("
+            "date TEXT NOT NULL, currency TEXT NOT NULL, impact TEXT NOT NULL, title TEXT NOT NULL, "
+            "PRIMARY KEY (date, currency, title)) WITHOUT ROWID"
+        )
+        self.conn.execute("CREATE TABLE IF NOT EXISTS feed (key TEXT PRIMARY KEY, value TEXT NOT NULL) WITHOUT ROWID")
+        self._lock = threading.Lock()  # The download thread writes while the engine reads
+
+    def load(self, since=None):
+        """Return the cached events from since on, sorted by date."""
+        since = (since or datetime(1970, 1, 1)).isoformat(sep=' ')
+        with self._lock:
+            rows = self.conn.execute("SELECT date, currency, impact, title FROM news WHERE date >= ? ORDER BY date", (since,)).fetchall()
+        return [{'date': datetime.fromisoformat(date), 'currency': currency, 'impact': impact, 'title': title}
+                for date, currency, impact, title in rows]
+
+    def store(self, events, **validators):
+        """Replace the cached events of the days events cover, and save the given feed validators."""
+        rows = [(news['date'].isoformat(sep=' '), news['currency'], news['impact'], news.get('title', '')) for news in events]
+        with self._lock, self.conn:
+            self.conn.execute("BEGIN")
+            if rows:
+                first = min(rows)[0][:10]
+                last = (datetime.fromisoformat(max(rows)[0]) + timedelta(days=1)).date().isoformat()
+                self.conn.execute("DELETE FROM news WHERE date >= ? AND date < ?", (first, last))
+                self.conn.executemany("INSERT OR REPLACE INTO news (date, currency, impact, title) VALUES (?, ?, ?, ?)", rows)
+            oldest = (datetime.now() - timedelta(days=news_cache_days)).isoformat(sep=' ')
+            self.conn.execute("DELETE FROM news WHERE date < ?", (oldest,))
+            self.conn.executemany("INSERT OR REPLACE INTO feed (key, value) VALUES (?, ?)",
+                                  [(key, str(value)) for key, value in validators.items() if value is not None])
+
+    def validator(self, key):
+        with self._lock:
+            row = self.conn.execute("SELECT value FROM feed WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def close(self):
+        self.conn.close()
+
+def normalize_news(feed):
+    """Convert the high impact events of the news feed JSON to events at server time."""
+    frame = pd.DataFrame(feed)
+    if frame.empty:
+        return []
+    frame = frame[frame['impact'] == 'High']
+    dates = pd.to_datetime(frame['date'], utc=True).dt.tz_convert(None) + news_time_offset
+    titles = frame['title'] if 'title' in frame else [''] * len(frame)
+    return [{'date': date.to_pydatetime(), 'currency': currency, 'impact': impact, 'title': title}
+            for date, currency, impact, title in zip(dates, frame['country'], frame['impact'], titles)]
+
+def fetch_news(store, log=print):
+    """Download the news feed into store, conditionally on the validators of the last download.
+
+    Returns the number of events stored, 0 when the feed did not change, or None when the
+    download failed and the cache was kept.
+    """
+    headers = {}
+    etag, last_modified = store.validator('etag'), store.validator('last_modified')
+    if etag:
+        headers['If-None-Match'] = etag
+    if last_modified:
+        headers['If-Modified-Since'] = last_modified
+    try:
+        response = http_client.get('news', headers=headers)
+    except requests.RequestException as e:
+        log(f"Failed to fetch news data, trading on the cached news: {e}")
+        return None
+    if response.status_code == 304:
+        return 0
+    if response.status_code != 200:
+        log(f"Failed to fetch news data (HTTP {response.status_code}), trading on the cached news")
+        return None
+    try:
+        events = normalize_news(response.json())
+    except (ValueError, KeyError) as e:
+        log(f"Unreadable news data, trading on the cached news: {e}")
+        return None
+    store.store(events, etag=response.headers.get('ETag'), last_modified=response.headers.get('Last-Modified'))
+    return len(events)
+
+def import_news_excel(store, path=None, log=print):
+    """Import the manual Excel backup into store when the file changed since its last import.
+
+    The sheet has date, time, currency and impact columns. Returns the number of events
+    imported, or None when there was nothing new to import.
+    """
+    path = path or news_excel_path
+    if not os.path.exists(path):
+        return None
+    modified = str(os.stat(path).st_mtime)
+    if store.validator('excel_mtime') == modified:
+        return None
+    try:
+        frame = pd.read_excel(path, engine='openpyxl')
+        dates = pd.to_datetime(frame['date'].astype(str) + ' ' + frame['time'].astype(str))
+    except Exception as e:
+        log(f"Error reading news from {path}: {e}")
+        return None
+    events = [{'date': date.to_pydatetime(), 'currency': currency, 'impact': impact}
+              for date, currency, impact in zip(dates, frame['currency'], frame['impact'])]
+    store.store(events, excel_mtime=modified)
+    return len(events)
+
+class Journal:
+    """Append-only JSON-lines journal of signals, orders, TP transitions, profits and log lines.
+
+    record() only stamps the entry and queues it, so it is cheap to call from any thread. A writer
+    thread appends the queued entries in batches, flushing every batch so a crash of the platform
+    loses nothing that was recorded, and fsyncing at least once a second. A journal without a
+    directory drops everything, which is how sweeps run their backtests. Write errors are passed to
+    log from the writer thread, once until the journal can be written again.
+    """
+
+    def __init__(self, prefix, directory=journal_dir, max_bytes=journal_max_bytes, max_age=journal_max_age, log=print):
+        self.prefix = prefix
+        self.directory = directory
+        self.log = log
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self.path = None
+        self._queue = queue.Queue()
+        self._seq = itertools.count(1)
+        self._thread = None
+
+    def record(self, kind, **fields):
+        if self.directory is None:
+            return
+        entry = {'ts': datetime.now().isoformat(timespec='milliseconds'), 'seq': next(self._seq), 'kind': kind}
+        entry.update(fields)
+        self._queue.put(entry)
+
+    def start(self):
+        if self._thread is None and self.directory is not None:
+            self._thread = threading.Thread(target=self._run, name="Journal", daemon=True)
+            self._thread.start()
+
+    def close(self, timeout=5):
+        """Write everything recorded so far and stop the writer thread."""
+        if self._thread is not None:
+            self._queue.put(None)
+            self._thread.join(timeout)
+            self._thread = None
+
+    def _open(self):
+        os.makedirs(self.directory, exist_ok=True)
+        self.path = os.path.join(self.directory, f"{self.prefix}_{datetime.now().strftime('%Y%m%d_%H%M%S_%f')}.jsonl")
+        return open(self.path, "a", encoding="utf-8")
+
+    def _run(self):
+        file = None
+        opened_at = synced_at = time.monotonic()
+        error = None
+        while True:
+            entries = [self._queue.get()]
+            while len(entries) < 1000:
+                try:
+                    entries.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            stop = None in entries
+            lines = [json.dumps(entry, default=str) + "\n" for entry in entries if entry is not None]
+            try:
+                now = time.monotonic()
+                if lines and (file is None or file.tell() >= self.max_bytes or now - opened_at >= self.max_age):
+                    if file is not None:
+                        file.close()
+                    file = self._open()
+                    opened_at = now
+                if lines:
+                    file.writelines(lines)
+                    file.flush()
+                if file is not None and (stop or now - synced_at >= 1):
+                    os.fsync(file.fileno())
+                    synced_at = now
+                error = None
+            except OSError as e:
+                if str(e) != error:
+                    error = str(e)
+                    self.log(f"Error writing the journal: {e}")
+            if stop:
+                if file is not None:
+                    file.close()
+                return
+
+
+def iter_journal(directory=journal_dir, kinds=None, since=None, until=None, text=None):
+    """Yield the entries of every journal file in directory, oldest first.
+
+    Entries can be filtered by kind, by a since/until datetime range and by a text that must
+    appear in the entry's JSON line.
+    """
+    if not os.path.isdir(directory):
+        return
+    for name in sorted(os.listdir(directory)):
+        if not name.endswith(".jsonl"):
+            continue
+        with open(os.path.join(directory, name), encoding="utf-8") as file:
+            for line in file:
+                if text is not None and text not in line:
+                    continue
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    continue  # A line cut short by a crash
+                if kinds is not None and entry.get('kind') not in kinds:
+                    continue
+                if since is not None or until is not None:
+                    ts = datetime.fromisoformat(entry['ts'])
+                    if (since is not None and ts < since) or (until is not None and ts > until):
+                        continue
+                yield entry
+
+
+class StateDict(dict):
+    """A dict that calls on_change() whenever it, or a dict stored in it, is modified.
+
+    Dicts stored in it are converted to StateDicts sharing the callback, so that an in place
+    update such as state[symbol]['flag'] = True is noticed too.
+    """
+
+    def __init__(self, on_change=None, *args, **kwargs):
         super().__init__()
+        self.on_change = on_change
+        for key, value in dict(*args, **kwargs).items():
+            super().__setitem__(key, self._wrap(value))
+
+    def _wrap(self, value):
+        if isinstance(value, dict) and not isinstance(value, StateDict):
+            value = StateDict(self.on_change, value)
+        return value
+
+    def _changed(self):
+        if self.on_change is not None:
+            self.on_change()
+
+    def __setitem__(self, key, value):
+        super().__setitem__(key, self._wrap(value))
+        self._changed()
+
+    def __delitem__(self, key):
+        super().__delitem__(key)
+        self._changed()
+
+    def setdefault(self, key, default=None):
+        if key not in self:
+            self[key] = default
+        return self[key]
+
+    def update(self, *args, **kwargs):
+        for key, value in dict(*args, **kwargs).items():
+            super().__setitem__(key, self._wrap(value))
+        self._changed()
+
+    def pop(self, key, *default):
+        value = super().pop(key, *default)
+        self._changed()
+        return value
+
+    def popitem(self):
+        item = super().popitem()
+        self._changed()
+        return item
+
+    def clear(self):
+        super().clear()
+        self._changed()
+
+
+class StateStore:
+    """Trading state kept in SQLite in WAL mode, so that a restart continues where the platform stopped.
+
+    Each namespace is a dict stored as one JSON value per key. save() compares the namespaces with
+    what it wrote last time and commits only the rows that changed, in a single transaction.
+    """
+
+    def __init__(self, path=None):
+        self.path = path = path or state_file_path
+        self.conn = sqlite3.connect(path, isolation_level=None, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS state ("
+            "namespace TEXT NOT NULL, key TEXT NOT NULL, value TEXT NOT NULL, PRIMARY KEY (namespace, key)"
+            ") WITHOUT ROWID"
+        )
+        self._written = {}  # namespace -> {key json: value json} as stored
+
+    def load(self):
+        """Return every stored namespace as a dict of decoded keys and values."""
+        state = {}
+        for namespace, key, value in self.conn.execute("SELECT namespace, key, value FROM state"):
+            self._written.setdefault(namespace, {})[key] = value
+            decoded = json.loads(key)
+            if isinstance(decoded, list):
+                decoded = tuple(decoded)
+            state.setdefault(namespace, {})[decoded] = json.loads(value)
+        return state
+
+    def save(self, namespaces):
+        """Write the keys of each namespace that changed or disappeared, return the number of rows touched."""
+        upserts = []
+        deletes = []
+        for namespace, values in namespaces.items():
+            written = self._written.setdefault(namespace, {})
+            current = {json.dumps(key): json.dumps(value, sort_keys=True) for key, value in values.items()}
+            upserts.extend((namespace, key, value) for key, value in current.items() if written.get(key) != value)
+            deletes.extend((namespace, key) for key in written.keys() - current.keys())
+            self._written[namespace] = current
+        if upserts or deletes:
+            with self.conn:
+                self.conn.execute("BEGIN")
+                self.conn.executemany(
+                    "INSERT INTO state (namespace, key, value) VALUES (?, ?, ?) "
+                    "ON CONFLICT (namespace, key) DO UPDATE SET value = excluded.value", upserts)
+                self.conn.executemany("DELETE FROM state WHERE namespace = ? AND key = ?", deletes)
+        return len(upserts) + len(deletes)
+
+    def close(self):
+        self.conn.close()
+
+
+class OrderPipeline:
+    """Sends orders from a worker pool so the engine never waits on the terminal.
+
+    Orders are keyed by (symbol, ticket, intent) and only one order per key can be in flight,
+    submitting the same key again is refused until the first one has completed. Orders for the
+    same position ticket are sent one after the other whatever their intent, an order for a
+    ticket that has one in flight waits in that ticket's queue until it has completed. Failed sends
+    are retried on a timer after the delay of their retcode class in order_retry_policy, and
+    each order ends with exactly one OrderOutcome passed to on_complete from a worker thread.
+    With workers=0 orders are sent on the submitting thread and retried without waiting, which
+    is how a backtest fills them on its simulated broker. While signal_received_at is set, on the
+    engine's clock, the orders submitted act on that signal and report their signal latency.
+    build_request() may return None when by the time of the attempt there is nothing left to
+    send, e.g. the position was closed meanwhile, the order then fails without being retried.
+    """
+
+    def __init__(self, on_complete, log=print, journal=None, workers=order_workers, retry_policy=order_retry_policy,
+                 clock=time.monotonic):
+        self.on_complete = on_complete
+        self.clock = clock
+        self.signal_received_at = None
+        self.log = log
+        self.journal = journal
+        self.retry_policy = retry_policy
+        self._retry_class = {retcode: name for name, policy in retry_policy.items() for retcode in policy['retcodes']}
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="OrderWorker") if workers else None
+        self._in_flight = {}  # key -> (submit time, receipt time of its signal or None)
+        self._ticket_queues = {}  # ticket with an order in flight -> deque of the orders waiting for it
+        self._lock = threading.Lock()
+        self._closed = False
+
+    def submit(self, key, build_request, callback=None):
+        """Queue an order and return True, or False when an order with the same key is in flight.
+
+        build_request() is called before every attempt so that retries are sent at a fresh price.
+        """
+        symbol, ticket, intent = key
+        with self._lock:
+            if self._closed or key in self._in_flight:
+                return False
+            self._in_flight[key] = (time.monotonic(), self.signal_received_at)
+            if ticket:
+                waiting = self._ticket_queues.get(ticket)
+                if waiting is not None:
+                    waiting.append((key, build_request, callback))
+                    return True
+                self._ticket_queues[ticket] = deque()
+        self._send(key, build_request, callback)
+        return True
+
+    def _send(self, key, build_request, callback):
+        if self._executor is None:
+            self._attempt(key, build_request, callback, 1)
+        else:
+            self._executor.submit(self._attempt, key, build_request, callback, 1)
+
+    def in_flight(self, key):
+        with self._lock:
+            return key in self._in_flight
+
+    def ticket_busy(self, ticket):
+        """True while any order for the position ticket is in flight or waiting."""
+        with self._lock:
+            return ticket in self._ticket_queues
+
+    def pending(self):
+        with self._lock:
+            return len(self._in_flight)
+
+    def close(self, wait=True):
+        """Stop accepting orders, drop scheduled retries and optionally wait for running sends."""
+        with self._lock:
+            self._closed = True
+        if self._executor is not None:
+            self._executor.shutdown(wait=wait)
+
+    def _attempt(self, key, build_request, callback, attempt):
+        request = result = None
+        error = ''
+        try:
+            request = build_request()
+            if request is None:
+                self._finish(key, request, result, attempt, "nothing left to send", callback)
+                return
+            result = mt5.order_send(request)
+            if result is None:
+                error = f"order_send returned None: {mt5.last_error()}"
+        except Exception as e:
+            error = str(e)
+        if self.journal is not None:
+            self.journal.record('order_attempt', key=key, attempt=attempt, request=request,
+                                retcode=getattr(result, 'retcode', None), comment=getattr(result, 'comment', error))
+
+        if result is not None and result.retcode == mt5.TRADE_RETCODE_DONE:
+            self._finish(key, request, result, attempt, error, callback)
+            return
+
+        # No result at all means the terminal could not be reached
+        retry_class = self._retry_class.get(result.retcode, 'other') if result is not None else 'no_connection'
+        policy = self.retry_policy[retry_class]
+        if attempt <= policy['retries'] and not self._closed:
+            delay = policy['delay'] * policy['backoff'] ** (attempt - 1)
+            reason = result.comment if result is not None else error
+            self.log(f"Order {key[2]} for {key[0]} failed ({retry_class}: {reason}), retrying in {delay:g}s (attempt {attempt + 1}/{policy['retries'] + 1})")
+            if self._executor is None:
+                self._attempt(key, build_request, callback, attempt + 1)
+                return
+            timer = threading.Timer(delay, self._retry, (key, build_request, callback, attempt + 1, request, result, error))
+            timer.daemon = True
+            timer.start()
+        else:
+            self._finish(key, request, result, attempt, error, callback)
+
+    def _retry(self, key, build_request, callback, attempt, request, result, error):
+        try:
+            self._executor.submit(self._attempt, key, build_request, callback, attempt)
+        except RuntimeError:
+            # The pipeline was closed while the retry was waiting
+            self._finish(key, request, result, attempt - 1, error or "order pipeline closed", callback)
+
+    def _finish(self, key, request, result, attempts, error, callback):
+        ticket = key[1]
+        following = None
+        with self._lock:
+            started, signal_received_at = self._in_flight.pop(key)
+            if ticket:
+                waiting = self._ticket_queues[ticket]
+                if waiting:
+                    following = waiting.popleft()
+                else:
+                    del self._ticket_queues[ticket]
+        signal_latency = self.clock() - signal_received_at if signal_received_at is not None else None
+        outcome = OrderOutcome(key, request, result, attempts, time.monotonic() - started, error, callback, signal_latency)
+        if self.journal is not None:
+            self.journal.record('order_result', key=key, ok=outcome.ok, attempts=attempts,
+                                latency_ms=round(outcome.latency * 1000, 1), reason=outcome.reason)
+        self.on_complete(outcome)
+        if following is not None:
+            # The next order for the ticket is sent once this one has been reported
+            try:
+                if self._closed:
+                    raise RuntimeError("closed")
+                self._send(*following)
+            except RuntimeError:
+                self._finish(following[0], None, None, 0, "order pipeline closed", following[2])
+
+class OrderBatch:
+    """Per-ticket result table of a bulk order operation, filled in as its orders complete.
+
+    results maps each ticket to its OrderOutcome, or to None while the order is in flight, and
+    refused lists the tickets that already had an order in flight. on_done(batch) is called
+    once, when the last order of the sealed batch has completed.
+    """
+
+    def __init__(self, name, on_done=None):
+        self.name = name
+        self.on_done = on_done
+        self.results = {}
+        self.refused = []
+        self.started = time.monotonic()
+        self.finished = None
+        self._sealed = False
+
+    def add(self, ticket, submitted):
+        if submitted:
+            self.results[ticket] = None
+        else:
+            self.refused.append(ticket)
+
+    def record(self, outcome):
+        self.results[outcome.key[1]] = outcome
+        self._check_done()
+
+    def seal(self):
+        """Mark that every order of the batch has been submitted."""
+        self._sealed = True
+        self._check_done()
+
+    @property
+    def done(self):
+        return self.finished is not None
+
+    def failed(self):
+        return [ticket for ticket, outcome in self.results.items() if outcome is not None and not outcome.ok]
+
+    def summary(self):
+        filled = sum(1 for outcome in self.results.values() if outcome is not None and outcome.ok)
+        elapsed = ((self.finished or time.monotonic()) - self.started) * 1000
+        text = f"{self.name}: {filled} done, {len(self.failed())} failed"
+        if self.refused:
+            text += f", {len(self.refused)} already in flight"
+        return f"{text} in {elapsed:.0f} ms"
+
+    def _check_done(self):
+        if self._sealed and self.finished is None and None not in self.results.values():
+            self.finished = time.monotonic()
+            if self.on_done is not None:
+                self.on_done(self)
+
+@dataclass(frozen=True)
+class EngineCommand:
+    """A user action queued from the dashboard to the trading engine."""
+    name: str
+    args: tuple = ()
+
+@dataclass(frozen=True)
+class LogEvent:
+    text: str
+
+@dataclass(frozen=True)
+class PositionRow:
+    ticket: int
+    symbol: str
+    cells: tuple  # Texts of the 'Ticket' to 'Real SL' columns
+
+@dataclass(frozen=True)
+class OrderRow:
+    ticket: int
+    cells: tuple  # Texts of the 'Ticket' to 'Real Profit' columns
+
+@dataclass(frozen=True)
+class StateEvent:
+    """Everything the dashboard renders, published by the engine once per cycle."""
+    positions: tuple
+    orders: tuple
+    labels: dict
+    summary: dict  # Account figures read by the orchestrator: balance, equity, real profit, daily target
+    diagnostics: tuple = ()  # Metrics.summary() rows for the diagnostics panel
+
+    def to_json(self):
+        return {
+            'positions': [[row.ticket, row.symbol, list(row.cells)] for row in self.positions],
+            'orders': [[row.ticket, list(row.cells)] for row in self.orders],
+            'labels': self.labels,
+            'summary': self.summary,
+            'diagnostics': list(self.diagnostics),
+        }
+
+    @classmethod
+    def from_json(cls, data):
+        return cls(
+            positions=tuple(PositionRow(ticket, symbol, tuple(cells)) for ticket, symbol, cells in data['positions']),
+            orders=tuple(OrderRow(ticket, tuple(cells)) for ticket, cells in data['orders']),
+            labels=data['labels'],
+            summary=data['summary'],
+            diagnostics=tuple(data.get('diagnostics', ()))
+        )
+
+@dataclass(frozen=True)
+class SymbolsRestored:
+    """Symbol settings restored from the state store, for the dashboard to show."""
+    settings: dict
+
+@dataclass(frozen=True)
+class EngineSettings:
+    """The engine's settings and the settings of every symbol, published on request."""
+    values: dict
+    symbols: dict
+
+@dataclass(frozen=True)
+class Readiness:
+    """State of every subsystem the engine starts in the background, published whenever one changes."""
+    subsystems: dict  # 'terminal', 'signals' and 'news' -> "ready" or what they are waiting for
+    account_login: object = None  # Known once the terminal is connected
+
+class TradingEngine(threading.Thread):
+    """Owns the MT5 connection and the trading state and runs the trading cycle on its own thread.
+
+    The dashboard never calls into the engine directly. User actions are queued as
+    EngineCommand objects and handled as soon as they arrive, and the engine publishes
+    LogEvent and StateEvent objects that the dashboard renders on the GUI thread.
+    """
+
+    cycle_interval = 0.5  # Seconds between the end of one cycle and the start of the next
+    metrics = metrics  # Registry of the stage timers and signal-to-fill latency, None turns them off
+
+    # Engine methods that may be invoked through submit(), by the dashboard or by worker threads
+    allowed_commands = {
+        'add_symbol', 'update_symbol_settings', 'set_pivot_usage', 'set_new_trade_permission',
+        'set_auto_trading', 'set_news_management', 'set_usetotal', 'set_trade_management_mode',
+        'set_daily_profit_target', 'select_symbol', 'reset_total_profit', 'reset_symbol_profit',
+        'close_trade', 'close_order', 'apply_tp1_manual', 'apply_tp2_manual', 'break_even',
+        'reverse_trade', 'manual_trade', 'manual_reverse', 'close_all_positions',
+        'close_all_in_profit', 'close_all_in_loss', 'clear_all_orders', 'process_signals', 'process_ticks',
+        'order_completed', 'news_refreshed', 'publish_settings', 'record_dashboard_log', 'shutdown',
+        'terminal_connected', 'terminal_failed', 'set_readiness',
+    }
+    # Commands that may also be sent over the engine API, the others are only queued by the engine itself
+    remote_commands = allowed_commands - {'process_signals', 'process_ticks', 'order_completed', 'news_refreshed',
+                                          'terminal_connected', 'terminal_failed', 'set_readiness'}
+    # Commands handled before the terminal is connected, the others wait until its state is restored
+    startup_commands = {'news_refreshed', 'publish_settings', 'record_dashboard_log', 'shutdown',
+                        'terminal_connected', 'terminal_failed', 'set_readiness'}
+
+    # Engine attributes published with EngineSettings, and the commands that change them
+    setting_commands = {
+        'auto_trading': 'set_auto_trading', 'news_management_active': 'set_news_management',
+        'usetotal': 'set_usetotal', 'daily_profit_target': 'set_daily_profit_target',
+        'trade_management_mode': 'set_trade_management_mode',
+        'commission': None, 'tp1': None, 'tp2': None, 'R1': None, 'R2': None, 'R3': None,
+    }
+
+    def __init__(self, signal_address=signal_receiver_address, journal=None, state_store=None, workers=order_workers, terminal=None):
+        super().__init__(name="TradingEngine", daemon=True)
+        self.account_login = account_login
+        self.terminal = terminal  # mt5.initialize() keyword arguments, see connect_account()
+        self.terminal_ready = False  # Set once the terminal is connected and the account's state restored
+        self.readiness = {'terminal': "connecting", 'signals': "starting", 'news': "loading"}
+        self._deferred = []  # Commands received before the terminal was ready
 
         # Initial values for variables
         self.commission = 10  # commission per lot
@@ -56,72 +1775,251 @@ class TradingDashboard(QtWidgets.QWidget):
         self.R3 = 15 # Additional required profit level for total profit check as a percentage of balance
         self.daily_profit_target = 10 # Define your daily profit target here as a percentage of balance
         self.trading_stopped = False
-        self.first_run = True
-
-        self.create_balance_file()
-        self.previous_day_balance = self.read_balance_from_file()
+        self.total_real_profit = 0.0
+        self.portfolio = None  # PortfolioSummary of the latest cycle
 
-        self.total_profits = {}
-        self.high_impact_news = []
+        self.previous_day_balance = 0
+        self._dirty_state = set()  # State namespaces changed since the last save
+        self.total_profits = self.state_dict('total_profits')
+        self.news_calendar = NewsCalendar()  # High impact news events and their blackout windows
         self.auto_trading = True
-        self.tp_status = {}
-        self.news_management_active = True  # Initialize this before calling get_forex_news
+        self.tp_status = self.state_dict('tp_status')
+        self.news_management_active = True
         self.usetotal = True
-        self.last_excel_mod_time = None
+        self.news_store = None  # Opened by start_up()
+        self._news_refreshing = False
         self.one_time = False
 
         self.quiet_hours_start = dt_time(23, 57)  # Start of quiet hours
         self.quiet_hours_end = dt_time(2, 5)  # End of quiet hours and daily update time
 
-        self.symbol_settings = {}
-
-        # Initialize log_display first
-        self.log_display = QtWidgets.QPlainTextEdit(self)
-        self.log_display.setReadOnly(True)
-
-        # Now, initialize other components and variables
+        self.symbol_settings = self.state_dict('symbol_settings')
+        self.symbol_catalog = SymbolCatalog()  # Digits, volume limits and stops levels of every symbol
+        self.entries_allowed = False  # Trading hours and news allow new entries, updated every cycle
+        self.entry_triggers = PriceTriggerIndex()  # One-shot (symbol, 'buy'/'sell') entry levels
+        self._saved_armed = {}  # Armed state of the entry triggers as last saved
+        self.snapshot = None  # Broker snapshot of the running cycle
+        self.position_store = PositionStore()  # Open positions by ticket, symbol and side, kept across cycles
+        self.selected_symbol = fixed_symbols[0]  # Symbol shown in the buy/sell price labels
+        self.labels = {}  # Label texts published to the dashboard
+
+        self.command_queue = queue.Queue()
+        self.event_queue = queue.Queue()
+        # The journal and the state store are named after the account's login once it is known
+        self._name_journal = journal is None
+        self.journal = journal or Journal(f"journal_{account_login}")
+        self.journal.log = lambda message: self.add_log(message, journal=False)  # Not back into the failing journal
+        self._journaled_profits = {}
+        self.state_store = state_store
+        # A pushed signal wakes the engine right away instead of waiting for the next cycle
+        self.signal_receiver = SignalReceiver(signal_address, on_signal=lambda: self.submit('process_signals'), clock=self.monotonic)
+        # Symbols whose price moved are checked for entries without waiting for the next cycle
+        self.tick_stream = TickStream(on_change=self.ticks_changed, log=self.add_log)
+        self._ticked_symbols = set()
+        self._ticked_lock = threading.Lock()
+        # Completed orders are handed back to the engine thread
+        self.order_pipeline = OrderPipeline(on_complete=lambda outcome: self.submit('order_completed', outcome),
+                                            log=self.add_log, journal=self.journal, workers=workers, clock=self.monotonic)
+        self.running = True
+        self._timers = []  # Heap of (due time, id, callback)
+        self._timer_ids = itertools.count()
+
+    def submit(self, name, *args):
+        """Queue a command for the engine thread, safe to call from any thread."""
+        self.command_queue.put(EngineCommand(name, args))
+
+    def handle_command(self, command):
+        if command.name not in self.allowed_commands:
+            self.add_log(f"Unknown engine command: {command.name}")
+            return
+        try:
+            getattr(self, command.name)(*command.args)
+        except Exception as e:
+            self.add_log(f"Error in {command.name}: {e}")
+
+    def now(self):
+        """Current time of the trading decisions, the replayed time in a backtest."""
+        return datetime.now()
+
+    def monotonic(self):
+        """Clock of timers and signal ages, the replayed time in a backtest."""
+        return time.monotonic()
+
+    def call_later(self, delay, callback):
+        """Run callback on the engine thread after delay seconds."""
+        heapq.heappush(self._timers, (self.monotonic() + delay, next(self._timer_ids), callback))
+
+    def run_due_timers(self):
+        """Run the timers that are due, return whether any was."""
+        now = self.monotonic()
+        ran = False
+        while self._timers and self._timers[0][0] <= now:
+            _, _, callback = heapq.heappop(self._timers)
+            ran = True
+            try:
+                callback()
+            except Exception as e:
+                self.add_log(f"Error in scheduled task: {e}")
+        return ran
+
+    def run(self):
+        self.start_up()
+        next_cycle = time.monotonic()
+        while self.running:
+            wake_at = min(next_cycle, self._timers[0][0]) if self._timers else next_cycle
+            try:
+                command = self.command_queue.get(timeout=max(0.0, wake_at - time.monotonic()))
+            except queue.Empty:
+                command = None
+            if command is not None:
+                if self.terminal_ready or command.name in self.startup_commands:
+                    self.handle_command(command)
+                else:
+                    self._deferred.append(command)
+
+            worked = self.run_due_timers() or command is not None
+            if self.running and self.terminal_ready and time.monotonic() >= next_cycle:
+                self.run_cycle()
+                next_cycle = time.monotonic() + self.cycle_interval
+                worked = True
+            if worked:
+                self.save_state()
+
+    def start_up(self):
+        """Start receiving signals and load the cached news, and connect the terminal in the background.
+
+        Nothing here waits for the terminal or a download. Signals received before the terminal is
+        connected are queued by the receiver and processed by the first cycle.
+        """
+        if poll_webhook_signals:
+            # Drop the signal left on the webhook from before the start, without waiting for the webhook
+            def clear_webhook():
+                self.discard_pending_signals()
+                self.submit('set_readiness', 'signals', "ready")
+            threading.Thread(target=clear_webhook, name="WebhookClear", daemon=True).start()
+        else:
+            try:
+                self.signal_receiver.start()
+                address = self.signal_receiver.address
+                self.add_log(f"Receiving signals on http://{address[0]}:{address[1]}")
+                self.set_readiness('signals', "ready")
+            except OSError as e:
+                self.add_log(f"Failed to start the signal receiver: {e}")
+                self.set_readiness('signals', "failed")
+
+        # Trade on the cached news from the first cycle, the download runs in the background
+        self.news_store = NewsStore()
+        self.load_news()
+        self.set_readiness('news', "cached")
+        self.refresh_news()
+
+        self.connect_terminal()
+
+    def connect_terminal(self):
+        """Connect the terminal on a background thread, retried every terminal_retry_interval seconds."""
+        def connect():
+            try:
+                login = connect_account(self.terminal)
+            except Exception as e:
+                self.submit('terminal_failed', str(e))
+            else:
+                self.submit('terminal_connected', login)
+
+        threading.Thread(target=connect, name="TerminalConnect", daemon=True).start()
+
+    def terminal_failed(self, error):
+        self.add_log(f"{error}, retrying in {terminal_retry_interval} seconds")
+        self.set_readiness('terminal', "retrying")
+        self.call_later(terminal_retry_interval, self.connect_terminal)
+
+    def terminal_connected(self, login):
+        """Restore the account's state and load its balance file, then run the commands that waited."""
+        self.account_login = login
+        if self._name_journal:
+            self.journal.prefix = f"journal_{login}"
+        self.journal.start()
+        if self.state_store is None:
+            self.state_store = StateStore()
         self.create_balance_file()
         self.previous_day_balance = self.read_balance_from_file()
+        self.restore_state()
+
+        self.tick_stream.subscribe(self.snapshot_symbols())
+        self.tick_stream.start()
 
         # Check current balance and update the file if necessary
-        if self.first_run:
-            # Load forex news before starting the program
-            self.get_forex_news()
-            positions = mt5.positions_get()
-            current_balance = mt5.account_info().balance
-            if len(positions) == 0:
-                if current_balance > self.previous_day_balance:
-                    self.previous_day_balance = current_balance
-                    self.write_balance_to_file(self.previous_day_balance)
-            else:
-                self.add_log("Cannot update balance, there are open positions.")
-            self.first_run = False  # Set the flag to False after the first run
+        snapshot = self.broker_snapshot()
+        current_balance = snapshot.balance
+        if len(snapshot.positions) == 0:
+            if current_balance > self.previous_day_balance:
+                self.previous_day_balance = current_balance
+                self.write_balance_to_file(self.previous_day_balance)
+        else:
+            self.add_log("Cannot update balance, there are open positions.")
 
-        self.init_ui()
         self.start_daily_timer()
+        self.call_later(symbol_catalog_refresh, self.refresh_symbol_catalog)
+        self.terminal_ready = True
+        self.set_readiness('terminal', "ready")
+        deferred, self._deferred = self._deferred, []
+        for command in deferred:
+            self.handle_command(command)
+
+    def set_readiness(self, subsystem, state):
+        self.readiness[subsystem] = state
+        self.event_queue.put(Readiness(dict(self.readiness), self.account_login))
+
+    def shutdown(self):
+        """Remove all pending orders and stop the engine loop."""
+        if self.terminal_ready:
+            try:
+                self.cancel_orders_many(name="Remove pending orders on exit")
+            except Exception as e:
+                self.add_log(f"Error while removing pending orders: {e}")
+
+        self.signal_receiver.stop()
+        self.tick_stream.stop()
+        self.order_pipeline.close()
+        # Report the orders that completed while the pipeline was closing
+        while True:
+            try:
+                command = self.command_queue.get_nowait()
+            except queue.Empty:
+                break
+            if command.name == 'order_completed':
+                self.handle_command(command)
+        self.journal_profit_changes()
+        self.journal.close()
+        if self.state_store is not None:
+            self.save_state()
+            self.state_store.close()
+        if self.news_store is not None and not self._news_refreshing:
+            self.news_store.close()
+        self.running = False
 
     def apply_tp1_manual(self, ticket):
         """Manually apply TP1 and set the tp1_applied flag."""
-        position = next((p for p in mt5.positions_get() if p.ticket == ticket), None)
+        position = self.broker_snapshot(ticket=ticket).position(ticket)
         if position:
             symbol = position.symbol
-            self.partial_close_trade(ticket, self.symbol_settings[symbol]['tp1'])
+            self.partial_close_trade(ticket, self.symbol_settings[symbol]['tp1'], "tp1")
             
             if ticket not in self.tp_status:
                 self.tp_status[ticket] = {'tp1_applied': True, 'tp2_applied': False}
             else:
                 self.tp_status[ticket]['tp1_applied'] = True
             
+            self.journal.record('tp', action='tp1_manual', symbol=symbol, ticket=ticket)
             self.add_log(f"Manual TP1 applied for ticket {ticket}")
         else:
             self.add_log(f"No position found for ticket {ticket} to apply TP1 manually.")
 
     def apply_tp2_manual(self, ticket):
         """Manually apply TP2, set the tp2_applied flag, and execute break-even."""
-        position = next((p for p in mt5.positions_get() if p.ticket == ticket), None)
+        position = self.broker_snapshot(ticket=ticket).position(ticket)
         if position:
             symbol = position.symbol
-            self.partial_close_trade(ticket, self.symbol_settings[symbol]['tp2'])
+            self.partial_close_trade(ticket, self.symbol_settings[symbol]['tp2'], "tp2")
             self.break_even(ticket)
             
             if ticket not in self.tp_status:
@@ -129,10 +2027,85 @@ class TradingDashboard(QtWidgets.QWidget):
             else:
                 self.tp_status[ticket]['tp2_applied'] = True
             
+            self.journal.record('tp', action='tp2_manual', symbol=symbol, ticket=ticket)
             self.add_log(f"Manual TP2 applied for ticket {ticket} and break-even executed.")
         else:
             self.add_log(f"No position found for ticket {ticket} to apply TP2 manually.")
 
+    def state_dict(self, namespace):
+        """Return an empty StateDict that marks namespace as changed when modified."""
+        return StateDict(lambda: self._dirty_state.add(namespace))
+
+    def entry_armed(self):
+        armed = {}
+        for symbol in self.symbol_settings:
+            for key in ((symbol, 'sell'), (symbol, 'buy')):
+                trigger = self.entry_triggers.get(key)
+                if trigger is not None:
+                    armed[key] = trigger.armed
+        return armed
+
+    def state_namespaces(self):
+        return {
+            'total_profits': self.total_profits,
+            'tp_status': self.tp_status,
+            'symbol_settings': self.symbol_settings,
+            'entry_armed': self.entry_armed(),
+        }
+
+    def save_state(self):
+        """Checkpoint the namespaces changed since the last save, called after commands, timers and cycles."""
+        if self.state_store is None:
+            return  # Nothing was restored yet
+        # Triggers arm and disarm on ticks, their few flags are compared instead of tracked
+        armed = self.entry_armed()
+        if armed != self._saved_armed:
+            self._dirty_state.add('entry_armed')
+        if not self._dirty_state:
+            return
+        namespaces = {namespace: values for namespace, values in self.state_namespaces().items() if namespace in self._dirty_state}
+        try:
+            self.state_store.save(namespaces)
+        except sqlite3.Error as e:
+            self.add_log(f"Error saving state: {e}")
+            return
+        self._dirty_state.clear()
+        self._saved_armed = armed
+
+    def restore_state(self):
+        """Load the saved state and reconcile it with the positions open at the broker."""
+        started = time.perf_counter()
+        try:
+            state = self.state_store.load()
+        except (sqlite3.Error, ValueError) as e:
+            self.add_log(f"Error loading saved state: {e}")
+            return
+
+        self.total_profits.update(state.get('total_profits', {}))
+        self.symbol_settings.update(state.get('symbol_settings', {}))
+        armed = state.get('entry_armed', {})
+        for symbol in self.symbol_settings:
+            for side, direction in (('sell', 'above'), ('buy', 'below')):
+                key = (symbol, side)
+                self.entry_triggers.place(PriceTrigger(key, symbol, direction, armed=armed.get(key, True)))
+            self.update_entry_levels(symbol)
+        self.tick_stream.subscribe(self.symbol_settings)
+
+        # TP states of positions that closed while the platform was down are dropped
+        snapshot = self.broker_snapshot()
+        tp_status = state.get('tp_status', {})
+        live = {ticket: status for ticket, status in tp_status.items() if snapshot.position(ticket) is not None}
+        self.tp_status.update(live)
+        self.position_store.take_changes()
+
+        if self.symbol_settings:
+            self.event_queue.put(SymbolsRestored({symbol: dict(settings) for symbol, settings in self.symbol_settings.items()}))
+        self.add_log(
+            f"Restored {len(self.symbol_settings)} symbol(s), {len(self.total_profits)} total profit(s) and "
+            f"{len(live)} TP state(s) ({len(tp_status) - len(live)} closed) in {(time.perf_counter() - started) * 1000:.1f} ms"
+        )
+        self.save_state()
+
     def create_balance_file(self):
         create_balance_file()
 
@@ -142,550 +2115,324 @@ class TradingDashboard(QtWidgets.QWidget):
     def write_balance_to_file(self, balance):
         write_balance_to_file(balance)
 
-    def init_ui(self):
-        self.setWindowTitle(f"Hani Trading Dashboard,     Platform: {strategy_name},      Account Number: {mt5.account_info().login}")
-        self.setGeometry(100, 100, 1920, 1080)
-
-        layout = QtWidgets.QVBoxLayout(self)
-
-        self.table = QtWidgets.QTableWidget(self)
-        self.table.setColumnCount(18)
-        self.table.setHorizontalHeaderLabels([
-            'Keys', 'Ticket', 'Symbol', 'Type', 'Volume', 'Open Price', 'Current Price',
-            'Stop Loss', 'Take Profit', 'Commission', 'Total Profit', 'Profit', 'Real Profit',
-            'Real Profit(%)', 'TP1 Level', 'TP2 Level', 'Full Close', 'Real SL'
-        ])
-        layout.addWidget(self.table)
-
-        # Set column widths
-        self.table.setColumnWidth(0, 280)  # Keys (adjust as needed for action buttons)
-        self.table.setColumnWidth(1, 120)  # Ticket
-        self.table.setColumnWidth(2, 120)  # Symbol
-        self.table.setColumnWidth(3, 80)   # Type
-        self.table.setColumnWidth(4, 60)   # Volume
-        self.table.setColumnWidth(5, 110)  # Open Price
-        self.table.setColumnWidth(6, 110)  # Current Price
-        self.table.setColumnWidth(7, 110)  # Stop Loss
-        self.table.setColumnWidth(8, 110)  # Take Profit
-        self.table.setColumnWidth(9, 80)   # Commission
-        self.table.setColumnWidth(10, 90)  # Total Profit
-        self.table.setColumnWidth(11, 90)  # Profit
-        self.table.setColumnWidth(12, 90)  # Real Profit
-        self.table.setColumnWidth(13, 95)  # Real Profit(%)
-        self.table.setColumnWidth(14, 80)  # TP1 Level
-        self.table.setColumnWidth(15, 80)  # TP2 Level
-        self.table.setColumnWidth(16, 80)  # Full Close
-        self.table.setColumnWidth(17, 80)  # Real SL
-
-        controls_layout = QtWidgets.QHBoxLayout()
-        controls_layout.setSpacing(5)  # Add spacing between elements
-        controls_layout.setContentsMargins(5, 5, 5, 5)  # Set margins
-
-        self.required_profit_label = QtWidgets.QLabel("Required Profit to Close all: 0.00", self)
-
-        self.buy_price_label = QtWidgets.QLabel("|                                             Buy Price: 0.00", self)
-
-        self.sell_price_label = QtWidgets.QLabel("|                                            Sell Price: 0.00", self)
-        
-        self.total_real_profit_label = QtWidgets.QLabel("Total Real Profit: 0.00", self)
-        self.total_real_profit_label.setAlignment(QtCore.Qt.AlignmentFlag.AlignRight)
-
-        price_layout = QtWidgets.QHBoxLayout()
-        price_layout.addWidget(self.required_profit_label)
-        price_layout.addWidget(self.buy_price_label)
-        price_layout.addWidget(self.sell_price_label)
-        price_layout.addWidget(self.total_real_profit_label)
-
-        self.price_group_box = QtWidgets.QGroupBox("Important Data")
-        self.price_group_box.setLayout(price_layout)
-
-        layout.addWidget(self.price_group_box)
-
-
-        self.update_daily_profit_button = QtWidgets.QPushButton("Change D P T", self)
-        self.update_daily_profit_button.setStyleSheet("background-color: grey; color: white;")
-        self.update_daily_profit_button.clicked.connect(self.update_daily_profit_target)
-        self.update_daily_profit_button.setMaximumWidth(100)
-        controls_layout.addWidget(self.update_daily_profit_button)
-
-        self.add_symbol_button = QtWidgets.QPushButton("Add/Update", self)
-        self.add_symbol_button.setStyleSheet("background-color: grey; color: white;")
-        self.add_symbol_button.clicked.connect(self.add_symbol)
-        self.add_symbol_button.setMaximumWidth(100)
-        controls_layout.addWidget(self.add_symbol_button)
-
-        self.symbol_combobox = QtWidgets.QComboBox(self)
-        self.symbol_combobox.addItems(fixed_symbols)
-        font = self.symbol_combobox.font()
-        font.setPointSize(8)
-        self.symbol_combobox.setFont(font)
-        self.symbol_combobox.setMaximumWidth(140)
-        self.symbol_combobox.view().setSpacing(3)
-
-        controls_layout.addWidget(self.symbol_combobox)
-
-        # Add the control buttons for new features
-        self.close_all_button = QtWidgets.QPushButton("Close All", self)
-        self.close_all_button.setStyleSheet("background-color: orange; color: white;")
-        self.close_all_button.clicked.connect(self.close_all_positions)
-        self.close_all_button.setMaximumWidth(140)
-        controls_layout.addWidget(self.close_all_button)
-
-        # Add the "Clear All Orders" button
-        self.clear_all_orders_button = QtWidgets.QPushButton("Clear All Orders", self)
-        self.clear_all_orders_button.setStyleSheet("background-color: grey; color: white;")
-        self.clear_all_orders_button.clicked.connect(self.clear_all_orders)
-        self.clear_all_orders_button.setMaximumWidth(150)
-        controls_layout.addWidget(self.clear_all_orders_button)
-
-        self.close_all_profit_button = QtWidgets.QPushButton("Close All on Profit", self)
-        self.close_all_profit_button.setStyleSheet("background-color: green; color: white;")
-        self.close_all_profit_button.clicked.connect(self.close_all_in_profit)
-        self.close_all_profit_button.setMaximumWidth(160)
-        controls_layout.addWidget(self.close_all_profit_button)
-
-        self.close_all_loss_button = QtWidgets.QPushButton("Close All in Loss", self)
-        self.close_all_loss_button.setStyleSheet("background-color: red; color: white;")
-        self.close_all_loss_button.clicked.connect(self.close_all_in_loss)
-        self.close_all_loss_button.setMaximumWidth(160)
-        controls_layout.addWidget(self.close_all_loss_button)
-
-        self.auto_trading_button = QtWidgets.QPushButton("Auto Trading: On", self)
-        self.auto_trading_button.setStyleSheet("background-color: green; color: white;")
-        self.auto_trading_button.clicked.connect(self.toggle_auto_trading)
-        self.auto_trading_button.setMaximumWidth(120)
-        controls_layout.addWidget(self.auto_trading_button)
-
-        self.news_management_button = QtWidgets.QPushButton("News Management: on", self)
-        self.news_management_button.setStyleSheet("background-color: green; color: white;")
-        self.news_management_button.clicked.connect(self.toggle_news_management)
-        self.news_management_button.setMaximumWidth(165)
-        controls_layout.addWidget(self.news_management_button)
-
-        self.usetotal_button = QtWidgets.QPushButton("Use Total Profit: On", self)
-        self.usetotal_button.setStyleSheet("background-color: green; color: white;")
-        self.usetotal_button.clicked.connect(self.toggle_usetotal)
-        self.usetotal_button.setMaximumWidth(150)
-        controls_layout.addWidget(self.usetotal_button)
-
-        self.reset_total_profit_button = QtWidgets.QPushButton("Reset Total Profit", self)
-        self.reset_total_profit_button.setStyleSheet("background-color: orange; color: black;")
-        self.reset_total_profit_button.clicked.connect(self.reset_total_profit)
-        self.reset_total_profit_button.setMaximumWidth(150)
-        controls_layout.addWidget(self.reset_total_profit_button)
-
-        self.trade_mode_combobox = QtWidgets.QComboBox(self)
-        self.trade_mode_combobox.addItems(["Single Direction", "Hedging", "All Signals", "Smart Hedging"])
-        self.trade_mode_combobox.setCurrentIndex(trade_management_mode - 1)
-        self.trade_mode_combobox.currentIndexChanged.connect(self.update_trade_management_mode)
-        self.trade_mode_combobox.setMaximumWidth(160)
-        controls_layout.addWidget(self.trade_mode_combobox)
-
-        layout.addLayout(controls_layout)
-
-        self.variables_layout = QtWidgets.QGridLayout()
-        self.variables_layout.setSpacing(5)
-        self.variables_layout.setContentsMargins(5, 5, 5, 5)
-
-        self.variables_layout.addWidget(QtWidgets.QLabel("Daily Profit Target (%):"), 0, 0)
-        self.daily_profit_target_entry = QtWidgets.QDoubleSpinBox(self)
-        self.daily_profit_target_entry.setValue(self.daily_profit_target)
-        self.daily_profit_target_entry.setMaximum(100000.00)
-        self.daily_profit_target_entry.setFixedWidth(100)
-        self.daily_profit_target_entry.setMaximumWidth(200)
-        self.daily_profit_target_entry.setToolTip("Daily profit target to stop trading for All symbol")
-        self.variables_layout.addWidget(self.daily_profit_target_entry, 0, 1)
-
-        spacer_item = QtWidgets.QSpacerItem(20, 20, QtWidgets.QSizePolicy.Policy.Expanding, QtWidgets.QSizePolicy.Policy.Minimum)
-        self.variables_layout.addItem(spacer_item, 0, 2)  # Add spacer between widgets
-
-        self.variables_layout.addWidget(QtWidgets.QLabel("TP1 (%):"), 0, 3)
-        self.tp1_entry = QtWidgets.QDoubleSpinBox(self)
-        self.tp1_entry.setValue(self.tp1)
-        self.tp1_entry.setMinimumWidth(100)
-        self.tp1_entry.setMaximumWidth(200)
-        self.tp1_entry.setToolTip("Take Profit level 1 percentage for All symbol")
-        self.variables_layout.addWidget(self.tp1_entry, 0, 4)
-
-        spacer_item = QtWidgets.QSpacerItem(20, 20, QtWidgets.QSizePolicy.Policy.Expanding, QtWidgets.QSizePolicy.Policy.Minimum)
-        self.variables_layout.addItem(spacer_item, 0, 5)  # Add spacer between widgets
-
-        self.variables_layout.addWidget(QtWidgets.QLabel("TP2 (%):"), 0, 6)
-        self.tp2_entry = QtWidgets.QDoubleSpinBox(self)
-        self.tp2_entry.setValue(self.tp2)
-        self.tp2_entry.setMinimumWidth(100)
-        self.tp2_entry.setMaximumWidth(200)
-        self.tp2_entry.setToolTip("Take Profit level 2 percentage for All symbol")
-        self.variables_layout.addWidget(self.tp2_entry, 0, 7)
-
-        spacer_item_1 = QtWidgets.QSpacerItem(20, 20, QtWidgets.QSizePolicy.Policy.Expanding, QtWidgets.QSizePolicy.Policy.Minimum)
-        self.variables_layout.addItem(spacer_item_1, 0, 8)  # Add spacer between widgets
-
-        self.variables_layout.addWidget(QtWidgets.QLabel("Commission:"), 0, 9)
-        self.commission_entry = QtWidgets.QDoubleSpinBox(self)
-        self.commission_entry.setValue(self.commission)
-        self.commission_entry.setMaximumWidth(140)
-        self.commission_entry.setFixedWidth(100)
-        self.commission_entry.setToolTip("Commission per lot for each symbol")
-        self.variables_layout.addWidget(self.commission_entry, 0, 10)
-
-        spacer_item_2 = QtWidgets.QSpacerItem(20, 20, QtWidgets.QSizePolicy.Policy.Expanding, QtWidgets.QSizePolicy.Policy.Fixed)
-        self.variables_layout.addItem(spacer_item_2, 0, 11)  # Add spacer between widgets
-
-        self.variables_layout.addWidget(QtWidgets.QLabel("R1 (%):"), 0, 12)
-        self.R1_entry = QtWidgets.QDoubleSpinBox(self)
-        self.R1_entry.setValue(self.R1)
-        self.R1_entry.setMaximum(100.00)
-        self.R1_entry.setMinimumWidth(100)
-        self.R1_entry.setMaximumWidth(200)
-        self.R1_entry.setToolTip("Required profit level 1 as a percentage of balance for each symbol")
-        self.variables_layout.addWidget(self.R1_entry, 0, 13)
-
-        spacer_item_3 = QtWidgets.QSpacerItem(20, 20, QtWidgets.QSizePolicy.Policy.Expanding, QtWidgets.QSizePolicy.Policy.Fixed)
-        self.variables_layout.addItem(spacer_item_3, 0, 14)
-
-        self.variables_layout.addWidget(QtWidgets.QLabel("R2 (%):"), 0, 15)
-        self.R2_entry = QtWidgets.QDoubleSpinBox(self)
-        self.R2_entry.setValue(self.R2)
-        self.R2_entry.setMaximum(100.00)
-        self.R2_entry.setMinimumWidth(100)
-        self.R2_entry.setMaximumWidth(200)
-        self.R2_entry.setToolTip("Required profit level 2 as a percentage of balance for each symbol")
-        self.variables_layout.addWidget(self.R2_entry, 0, 16)
-
-        spacer_item_4 = QtWidgets.QSpacerItem(20, 20, QtWidgets.QSizePolicy.Policy.Expanding, QtWidgets.QSizePolicy.Policy.Fixed)
-        self.variables_layout.addItem(spacer_item_4, 0, 17)
-
-        self.variables_layout.addWidget(QtWidgets.QLabel("R3 (%):"), 0, 18)
-        self.R3_entry = QtWidgets.QDoubleSpinBox(self)
-        self.R3_entry.setValue(self.R3)
-        self.R3_entry.setMaximum(100.00)
-        self.R3_entry.setMinimumWidth(100)
-        self.R3_entry.setMaximumWidth(200)
-        self.R3_entry.setToolTip("Additional required profit level for total profit check as a percentage of balance for each symbol")
-        self.variables_layout.addWidget(self.R3_entry, 0, 19)
-
-        layout.addLayout(self.variables_layout)
-
-        self.news_info_label = QtWidgets.QLabel("News Info: No upcoming news", self)
-        layout.addWidget(self.news_info_label)
-
-        self.time_to_news_label = QtWidgets.QLabel("Time to News: N/A", self)
-        layout.addWidget(self.time_to_news_label)
-
-        self.time_after_news_label = QtWidgets.QLabel("Time After News: N/A", self)
-        layout.addWidget(self.time_after_news_label)
-
-        self.quiet_hours_label = QtWidgets.QLabel("Quiet Hours: Trading hours active", self)
-        layout.addWidget(self.quiet_hours_label)
-
-        # Create a layout for manual trading buttons
-        self.manual_trade_layout = QtWidgets.QVBoxLayout()
-        self.manual_trade_buttons = {}
-        layout.addLayout(self.manual_trade_layout)
-
-        # Log Display Widget
-        self.log_display = QtWidgets.QPlainTextEdit(self)
-        self.log_display.setReadOnly(True)
-        self.log_display.setFixedHeight(120)
-        layout.addWidget(self.log_display)
-
-        self.setLayout(layout)
+    def broker_snapshot(self, symbol=None, ticket=None):
+        """Return the snapshot of the running cycle, or a fresh one when called outside a cycle.
+
+        Outside a cycle a command that only acts on one symbol or ticket passes it, so that only
+        its positions and orders are fetched, kept apart from the engine's position store.
+        """
+        if self.snapshot is None:
+            if symbol is not None or ticket is not None:
+                return BrokerSnapshot((), PositionStore(), self.tick_stream.latest(), self.symbol_catalog, symbol, ticket)
+            return BrokerSnapshot(self.symbol_settings, self.position_store, self.tick_stream.latest(), self.symbol_catalog)
+        if self.snapshot.stale:
+            # An order was sent during this cycle, later stages must see its effect
+            self.snapshot = BrokerSnapshot(self.symbol_settings, self.position_store, self.tick_stream.latest(), self.symbol_catalog)
+        return self.snapshot
+
+    def invalidate_snapshot(self):
+        if self.snapshot is not None:
+            self.snapshot.stale = True
+
+    def order_completed(self, outcome):
+        """Handle an order that the pipeline finished with, on the engine thread."""
+        self.invalidate_snapshot()
+        symbol, ticket, intent = outcome.key
+        if outcome.ok:
+            self.add_log(f"Order {intent} for {symbol} filled in {outcome.latency * 1000:.0f} ms ({outcome.attempts} attempt(s))")
+            if outcome.signal_latency is not None and self.metrics is not None:
+                self.metrics.observe('signal_to_fill_seconds', outcome.signal_latency)
+        else:
+            self.add_log(f"Order {intent} for {symbol} gave up after {outcome.attempts} attempt(s): {outcome.reason}")
+        if outcome.callback is not None:
+            outcome.callback(outcome)
 
     def clear_all_orders(self):
         """Clear all pending orders."""
         try:
-            orders = mt5.orders_get()
-            if orders:
-                for order in orders:
-                    result = mt5.order_send(
-                        action=mt5.TRADE_ACTION_REMOVE,
-                        order=order.ticket,
-                        symbol=order.symbol,
-                        type=order.type
-                    )
-                    if result.retcode == mt5.TRADE_RETCODE_DONE:
-                        self.add_log(f"Successfully removed order {order.symbol}, ticket {order.ticket}")
-                    else:
-                        self.add_log(f"Failed to remove order {order.symbol}, ticket {order.ticket}: {result.comment}")
-            else:
-                self.add_log("No pending orders found.")
+            self.cancel_orders_many(name="Clear all orders")
         except Exception as e:
             self.add_log(f"Error in removing orders: {e}")
 
+    def close_many(self, predicate=None, name="Close positions", on_done=None):
+        """Close every position matching predicate in parallel and return the OrderBatch of results.
+
+        The positions are taken from one snapshot, on_done(batch) runs when the last close has completed.
+        """
+        batch = OrderBatch(name, lambda b: self.batch_finished(b, on_done))
+        positions = [pos for pos in self.broker_snapshot().positions if predicate is None or predicate(pos)]
+        if not positions:
+            self.add_log("No open positions found.")
+        for pos in positions:
+            batch.add(pos.ticket, self.close_position(pos, batch.record))
+        batch.seal()
+        return batch
+
+    def modify_sltp_many(self, changes, comment, name="Modify SL/TP", on_done=None):
+        """Send (position, sl) stop loss changes in parallel, keeping each position's TP, and return the OrderBatch."""
+        batch = OrderBatch(name, lambda b: self.batch_finished(b, on_done))
+        for position, sl in changes:
+            batch.add(position.ticket, self.modify_sltp(position, sl, comment, batch.record))
+        batch.seal()
+        return batch
+
+    def cancel_orders_many(self, predicate=None, name="Remove pending orders", on_done=None):
+        """Remove every pending order matching predicate in parallel and return the OrderBatch of results."""
+        batch = OrderBatch(name, lambda b: self.batch_finished(b, on_done))
+        orders = [order for order in self.broker_snapshot().orders if predicate is None or predicate(order)]
+        if not orders:
+            self.add_log("No pending orders found.")
+        for order in orders:
+            batch.add(order.ticket, self.cancel_order(order, batch.record))
+        batch.seal()
+        return batch
+
+    def batch_finished(self, batch, on_done=None):
+        if batch.results:
+            self.add_log(batch.summary())
+        if on_done is not None:
+            on_done(batch)
+
+    def modify_sltp(self, position, sl, comment, callback=None):
+        """Set the stop loss of a position through the order pipeline, return False if one is already in flight."""
+        request = {
+            "action": mt5.TRADE_ACTION_SLTP,
+            "position": position.ticket,
+            "sl": sl,
+            "comment": comment
+        }
+
+        if position.tp > 0:
+            request["tp"] = position.tp
+
+        request["symbol"] = position.symbol
+        request["type"] = position.type
+
+        def done(outcome):
+            if outcome.ok:
+                self.add_log(f"{comment} set for {position.symbol}, ticket {position.ticket}")
+            else:
+                self.add_log(f"Failed to set {comment} for {position.symbol}, ticket {position.ticket}: {outcome.reason}")
+            if callback is not None:
+                callback(outcome)
+
+        return self.order_pipeline.submit((position.symbol, position.ticket, comment), lambda: request, done)
+
+    def cancel_order(self, order, callback=None):
+        """Remove a pending order through the order pipeline, return False if its removal is already in flight."""
+        request = {
+            "action": mt5.TRADE_ACTION_REMOVE,
+            "order": order.ticket,
+            "symbol": order.symbol,
+            "type": order.type
+        }
+
+        def done(outcome):
+            if outcome.ok:
+                self.add_log(f"Successfully removed pending order {order.symbol}, ticket {order.ticket}")
+            else:
+                self.add_log(f"Failed to remove pending order {order.symbol}, ticket {order.ticket}: {outcome.reason}")
+            if callback is not None:
+                callback(outcome)
+
+        return self.order_pipeline.submit((order.symbol, order.ticket, "remove"), lambda: request, done)
+
     def close_all_in_profit(self):
         self.add_log(f"Attempting to close all profitable positions...")
-        positions = mt5.positions_get()
-        if positions:
-            for pos in positions:
-                if pos.profit > 0:
-                    self.close_position(pos)
-            self.add_log(f"All profitable positions closed.")
-        else:
-            self.add_log("No open positions found.")
+        self.close_many(lambda pos: pos.profit > 0, name="Close all in profit")
 
     def close_all_in_loss(self):
         self.add_log(f"Attempting to close all losing positions...")
-        positions = mt5.positions_get()
-        if positions:
-            for pos in positions:
-                if pos.profit < 0:
-                    self.close_position(pos)
-            self.add_log(f"All losing positions closed.")
-        else:
-            self.add_log("No open positions found.")
-
-    def update_trade_management_mode(self):
-        global trade_management_mode
-        trade_management_mode = self.trade_mode_combobox.currentIndex() + 1
-        self.add_log(f"Trade management mode updated to {trade_management_mode}")
+        self.close_many(lambda pos: pos.profit < 0, name="Close all in loss")
 
-    def toggle_auto_trading(self):
-        self.auto_trading = not self.auto_trading
-        self.auto_trading_button.setText("Auto Trading: On" if self.auto_trading else "Auto Trading: Off")
-        self.auto_trading_button.setStyleSheet("background-color: green; color: white;" if self.auto_trading else "background-color: red; color: white;")
+    def set_auto_trading(self, enabled):
+        self.auto_trading = enabled
         self.add_log(f"Auto Trading {'enabled' if self.auto_trading else 'disabled'}")
 
-    def toggle_news_management(self):
-        self.news_management_active = not self.news_management_active
-        self.news_management_button.setText("News Management: On" if self.news_management_active else "News Management: Off")
-        self.news_management_button.setStyleSheet("background-color: green; color: white;" if self.news_management_active else "background-color: red; color: white;")
+    def set_news_management(self, enabled):
+        self.news_management_active = enabled
         self.add_log(f"News management is now {'active' if self.news_management_active else 'inactive'}")
 
-    def toggle_usetotal(self):
-        self.usetotal = not self.usetotal
-        self.usetotal_button.setText("Use Total Profit: On" if self.usetotal else "Use Total Profit: Off")
-        self.usetotal_button.setStyleSheet("background-color: green; color: white;" if self.usetotal else "background-color: red; color: white;")
+    def set_usetotal(self, enabled):
+        self.usetotal = enabled
         self.add_log(f"Total Profit usage is now {'enabled' if self.usetotal else 'disabled'}")
 
-    def reset_total_profit(self):
-        self.total_profits = {symbol: 0 for symbol in self.total_profits}
-        self.add_log("Total Profit has been reset to zero for all symbols")
-        self.update_gui()
-
-    def update_variables(self):
-        current_symbol = self.symbol_combobox.currentText()
-        self.symbol_settings[current_symbol] = {
-            'commission': self.commission_entry.value(),
-            'tp1': self.tp1_entry.value(),
-            'tp2': self.tp2_entry.value(),
-            'R1': self.R1_entry.value(),
-            'R2': self.R2_entry.value(),
-            'R3': self.R3_entry.value()
-        }
-        self.add_log(f"Updated variables for {current_symbol}: {self.symbol_settings[current_symbol]}")
+    def set_trade_management_mode(self, mode):
+        global trade_management_mode
+        trade_management_mode = mode
+        self.add_log(f"Trade management mode updated to {trade_management_mode}")
 
-    def update_daily_profit_target(self):
-        self.daily_profit_target = self.daily_profit_target_entry.value()
+    def set_daily_profit_target(self, daily_profit_target):
+        self.daily_profit_target = daily_profit_target
         self.add_log(f"Updated daily profit target: {self.daily_profit_target}")
 
-    def manual_buy(self):
-        symbol = self.symbol_combobox.currentText()
-        volume = float(self.volume_entry.text())
-        self.open_position(symbol, volume, "Buy")
-
-    def manual_sell(self):
-        symbol = self.symbol_combobox.currentText()
-        volume = float(self.volume_entry.text())
-        self.open_position(symbol, volume, "Sell")
-
-    def open_position(self, symbol, lot, direction, retries=5, delay=60000):
-        attempt = 0
+    def select_symbol(self, symbol):
+        self.selected_symbol = symbol
+        self.tick_stream.subscribe([symbol])
 
-        def attempt_open():
-            nonlocal attempt
-            try:
-                if direction == "Buy":
-                    result = mt5.order_send(
-                        action=mt5.TRADE_ACTION_DEAL,
-                        symbol=symbol,
-                        volume=lot,
-                        type=mt5.ORDER_TYPE_BUY,
-                        price=mt5.symbol_info_tick(symbol).ask,
-                        deviation=20,
-                        magic=234000,
-                        comment=strategy_name,
-                        type_time=mt5.ORDER_TIME_GTC,
-                        type_filling=mt5.ORDER_FILLING_IOC
-                    )
-                    if result.retcode == mt5.TRADE_RETCODE_DONE:
-                        self.add_log(f"Buy trade executed successfully for {symbol} with lot size {lot}")
-                    else:
-                        self.add_log(f"Failed to execute buy trade for {symbol}: {result.comment}")
-                        retry()
-
-                elif direction == "Sell":
-                    result = mt5.order_send(
-                        action=mt5.TRADE_ACTION_DEAL,
-                        symbol=symbol,
-                        volume=lot,
-                        type=mt5.ORDER_TYPE_SELL,
-                        price=mt5.symbol_info_tick(symbol).bid,
-                        deviation=20,
-                        magic=234000,
-                        comment=strategy_name,
-                        type_time=mt5.ORDER_TIME_GTC,
-                        type_filling=mt5.ORDER_FILLING_IOC
-                    )
-                    if result.retcode == mt5.TRADE_RETCODE_DONE:
-                        self.add_log(f"Sell trade executed successfully for {symbol} with lot size {lot}")
-                    else:
-                        self.add_log(f"Failed to execute sell trade for {symbol}: {result.comment}")
-                        retry()
+    def publish_settings(self):
+        values = {name: getattr(self, name) for name in self.setting_commands if name != 'trade_management_mode'}
+        values['trade_management_mode'] = trade_management_mode
+        values['account_login'] = self.account_login
+        self.event_queue.put(EngineSettings(values, {symbol: dict(settings) for symbol, settings in self.symbol_settings.items()}))
 
-            except Exception as e:
-                self.add_log(f"Error in opening position: {e}")
-                retry()
+    def record_dashboard_log(self, text):
+        self.journal.record('log', text=text, source='dashboard')
 
-        def retry():
-            nonlocal attempt
-            attempt += 1
-            if attempt < retries:
-                self.add_log(f"Retrying to open position for {symbol} (Attempt {attempt + 1}/{retries})...")
-                QtCore.QTimer.singleShot(delay, attempt_open)
+    def reset_total_profit(self):
+        self.total_profits.update(dict.fromkeys(self.total_profits, 0))
+        self.add_log("Total Profit has been reset to zero for all symbols")
+        self.publish_state()
 
-        attempt_open()
+    def open_position(self, symbol, lot, direction, open_id=None):
+        """Open a position through the order pipeline.
 
-    def close_position(self, position, retries=5, delay=60000):
-        attempt = 0
+        Opens are keyed by symbol and direction, so a hedge or a signal repeated while the first
+        open is still in flight or waiting to be retried is refused instead of sent twice. An
+        explicit open_id, e.g. one per click of a manual trade button, makes the open a request
+        of its own.
+        """
+        if direction not in ("Buy", "Sell"):
+            return
+        order_type = mt5.ORDER_TYPE_BUY if direction == "Buy" else mt5.ORDER_TYPE_SELL
+
+        def build_request():
+            tick = mt5.symbol_info_tick(symbol)
+            return {
+                "action": mt5.TRADE_ACTION_DEAL,
+                "symbol": symbol,
+                "volume": lot,
+                "type": order_type,
+                "price": tick.ask if direction == "Buy" else tick.bid,
+                "deviation": 20,
+                "magic": 234000,
+                "comment": strategy_name,
+                "type_time": mt5.ORDER_TIME_GTC,
+                "type_filling": mt5.ORDER_FILLING_IOC
+            }
 
-        def attempt_close():
-            nonlocal attempt
-            try:
-                result = mt5.order_send(
-                    action=mt5.TRADE_ACTION_DEAL,
-                    symbol=position.symbol,
-                    volume=position.volume,
-                    type=mt5.ORDER_TYPE_BUY if position.type == mt5.ORDER_TYPE_SELL else mt5.ORDER_TYPE_SELL,
-                    position=position.ticket,
-                    price=mt5.symbol_info_tick(position.symbol).bid if position.type == mt5.ORDER_TYPE_BUY else mt5.symbol_info_tick(position.symbol).ask,
-                    deviation=20,
-                    magic=234000,
-                    comment="Closing position",
-                    type_time=mt5.ORDER_TIME_GTC,
-                    type_filling=mt5.ORDER_FILLING_IOC
-                )
-                if result.retcode == mt5.TRADE_RETCODE_DONE:
-                    self.add_log(f"Closed position for {position.symbol} with profit {position.profit}")
-                else:
-                    self.add_log(f"Failed to close position for {position.symbol}: {result.comment}")
-                    retry()
+        def done(outcome):
+            if outcome.ok:
+                self.add_log(f"{direction} trade executed successfully for {symbol} with lot size {lot}")
+            else:
+                self.add_log(f"Failed to execute {direction.lower()} trade for {symbol}: {outcome.reason}")
 
-            except Exception as e:
-                self.add_log(f"Error in closing position: {e}")
-                retry()
+        intent = f"open {direction}" if open_id is None else f"open {direction} {open_id}"
+        if not self.order_pipeline.submit((symbol, 0, intent), build_request, done):
+            self.add_log(f"A {direction} order for {symbol} is already in flight, not sending another one")
 
-        def retry():
-            nonlocal attempt
-            attempt += 1
-            if attempt < retries:
-                self.add_log(f"Retrying to close position for {position.symbol} (Attempt {attempt + 1}/{retries})...")
-                QtCore.QTimer.singleShot(delay, attempt_close)
+    def close_position(self, position, callback=None):
+        """Close a position through the order pipeline, return False if its close is already in flight."""
+        waits = self.order_pipeline.ticket_busy(position.ticket)
 
-        attempt_close()
+        def build_request():
+            volume = position.volume
+            if waits:
+                # A partial close of the ticket may have filled while this close waited for it
+                current = mt5.positions_get(ticket=position.ticket)
+                if not current:
+                    return None
+                volume = current[0].volume
+            tick = mt5.symbol_info_tick(position.symbol)
+            return {
+                "action": mt5.TRADE_ACTION_DEAL,
+                "symbol": position.symbol,
+                "volume": volume,
+                "type": mt5.ORDER_TYPE_BUY if position.type == mt5.ORDER_TYPE_SELL else mt5.ORDER_TYPE_SELL,
+                "position": position.ticket,
+                "price": tick.bid if position.type == mt5.ORDER_TYPE_BUY else tick.ask,
+                "deviation": 20,
+                "magic": 234000,
+                "comment": "Closing position",
+                "type_time": mt5.ORDER_TIME_GTC,
+                "type_filling": mt5.ORDER_FILLING_IOC
+            }
 
-    def apply_tp_logic(self, symbol, lot):
-        positions = mt5.positions_get(symbol=symbol)
-        if positions:
-            for pos in positions:
-                ticket = pos.ticket
-                profit = pos.profit
-
-                real_profit = self.total_profits.get(symbol, 0) + sum([p.profit for p in positions if p.symbol == symbol])
-
-                # TP status for the current trade
-                if ticket not in self.tp_status:
-                    self.tp_status[ticket] = {'tp1_applied': False, 'tp2_applied': False}
-
-                tp1_applied = self.tp_status[ticket]['tp1_applied']
-                tp2_applied = self.tp_status[ticket]['tp2_applied']
-
-                current_balance = mt5.account_info().balance
-                symbol_settings = self.symbol_settings.get(symbol, {
-                    'commission': self.commission,
-                    'tp1': self.tp1,
-                    'tp2': self.tp2,
-                    'R1': self.R1,
-                    'R2': self.R2,
-                    'R3': self.R3,
-                    'loss_threshold': 0.0
-                })
-
-                # Use stored settings
-                tp1_percentage = symbol_settings['tp1']
-                tp2_percentage = symbol_settings['tp2']
-                R1 = symbol_settings['R1']
-                R2 = symbol_settings['R2']
-                R3 = symbol_settings['R3']
-                commission = symbol_settings['commission']
-                loss_threshold = symbol_settings.get('loss_threshold', 0.0)
-
-                # Partial close if profit exceeds R1
-                if profit > (R1 * current_balance / 100) + (lot * commission) and not tp1_applied:
-                    self.add_log(f"Applying TP1: Closing {tp1_percentage}% of position for ticket {ticket}")
-                    self.partial_close_trade(pos.ticket, tp1_percentage)
-                    self.tp_status[ticket]['tp1_applied'] = True
-
-                # Partial close if real profit exceeds R2
-                if real_profit > (R2 * current_balance / 100) + (lot * commission) and not tp2_applied:
-                    self.add_log(f"Applying TP2: Closing {tp2_percentage}% of position for ticket {ticket}")
-                    self.partial_close_trade(pos.ticket, tp2_percentage)
-                    self.tp_status[ticket]['tp2_applied'] = True
-                    self.break_even(ticket)
-
-                # Close entire position if real profit exceeds R3 and total profit is positive
-                if real_profit > (R3 * current_balance / 100) and self.total_profits.get(symbol, 0) > 0:
-                    self.add_log(f"Closing entire position for {symbol} as real profit exceeds R3")
-                    for p in positions:
-                        self.close_position(p)
-                    self.add_log(f"Updated total profit for {symbol} after closing: {self.total_profits.get(symbol, 0)}")
-
-                # Check for loss threshold
-                if loss_threshold > 0:
-                    # Compute loss percentage based on account balance
-                    position_value = mt5.account_info().balance
-                    if pos.profit < 0:
-                        loss_percentage = (-pos.profit / position_value) * 100
-                        if tp1_applied:
-                            loss_threshold = loss_threshold / 2
-
-                        # Check if the loss percentage exceeds the threshold
-                        if loss_percentage >= loss_threshold:
-                            self.add_log(f"Position {pos.ticket} for {pos.symbol} reached loss threshold of {loss_threshold}%, closing position.")
-                            self.close_position(pos)
-
-                self.update_required_profit_label()
-        # Remove closed positions from tp_status
-        for pos_ticket in list(self.tp_status.keys()):
-            if not any(p.ticket == pos_ticket for p in mt5.positions_get()):
-                self.add_log(f"Removing closed position ticket {pos_ticket} from tp_status")
-                del self.tp_status[pos_ticket]
-                positions = mt5.positions_get(symbol=symbol)
-                if not positions:
-                    self.total_profits[symbol] = 0
+        def done(outcome):
+            if outcome.ok:
+                self.add_log(f"Closed position for {position.symbol} with profit {position.profit}")
+            else:
+                self.add_log(f"Failed to close position for {position.symbol}: {outcome.reason}")
+            if callback is not None:
+                callback(outcome)
+
+        return self.order_pipeline.submit((position.symbol, position.ticket, "close"), build_request, done)
+
+    def apply_tp_logic(self):
+        """Evaluate every open position against its TP and R levels and carry out the resulting actions."""
+        snapshot = self.broker_snapshot()
+        defaults = {
+            'commission': self.commission,
+            'tp1': self.tp1,
+            'tp2': self.tp2,
+            'R1': self.R1,
+            'R2': self.R2,
+            'R3': self.R3,
+            'loss_threshold': 0.0
+        }
+        actions = evaluate_tp_levels(snapshot.positions, self.tp_status, self.symbol_settings,
+                                     defaults, self.total_profits, snapshot.balance)
+        for action in actions:
+            ticket = action.ticket
+            # A position with an order in flight is evaluated again once the order has filled,
+            # so that TP2 after TP1 is taken from the reduced volume
+            if ticket and self.order_pipeline.ticket_busy(ticket):
+                continue
+            # The positions are read again after every order of this loop, a position that an
+            # earlier action closed gets no further action
+            if ticket and self.broker_snapshot().position(ticket) is None:
+                continue
+            self.journal.record('tp', action=action.kind, symbol=action.symbol, ticket=ticket,
+                                percentage=action.percentage, threshold=action.threshold)
+            if action.kind == 'tp1':
+                self.add_log(f"Applying TP1: Closing {action.percentage}% of position for ticket {ticket}")
+                self.partial_close_trade(ticket, action.percentage, "tp1")
+                self.tp_status.setdefault(ticket, {'tp1_applied': False, 'tp2_applied': False})['tp1_applied'] = True
+            elif action.kind == 'tp2':
+                self.add_log(f"Applying TP2: Closing {action.percentage}% of position for ticket {ticket}")
+                self.partial_close_trade(ticket, action.percentage, "tp2")
+                self.tp_status.setdefault(ticket, {'tp1_applied': False, 'tp2_applied': False})['tp2_applied'] = True
+                self.break_even(ticket)
+            elif action.kind == 'close_symbol':
+                self.add_log(f"Closing entire position for {action.symbol} as real profit exceeds R3")
+                for p in self.broker_snapshot().positions_for(action.symbol):
+                    self.close_position(p)
+                self.add_log(f"Updated total profit for {action.symbol} after closing: {self.total_profits.get(action.symbol, 0)}")
+            elif action.kind == 'loss_close':
+                self.add_log(f"Position {ticket} for {action.symbol} reached loss threshold of {action.threshold}%, closing position.")
+                self.close_trade(ticket)
+
+    def handle_position_changes(self):
+        """Drop the state of positions that closed since the last cycle."""
+        opened, closed = self.position_store.take_changes()
+        for ticket, pos in closed.items():
+            if self.tp_status.pop(ticket, None) is not None:
+                self.add_log(f"Removing closed position ticket {ticket} from tp_status")
+            if not self.position_store.for_symbol(pos.symbol):
+                self.total_profits[pos.symbol] = 0
 
     def close_trade(self, ticket):
-        position = mt5.positions_get(ticket=ticket)
+        position = self.broker_snapshot(ticket=ticket).position(ticket)
         if position:
-            self.close_position(position[0])
+            self.close_position(position)
 
-    def partial_close_trade(self, ticket, tp_percentage):
+    def partial_close_trade(self, ticket, tp_percentage, intent="partial close"):
         try:
             # Get the position by ticket
-            position = next((pos for pos in mt5.positions_get() if pos.ticket == ticket), None)
+            position = self.broker_snapshot(ticket=ticket).position(ticket)
             if position:
                 # Calculate the volume to close based on tp_percentage
                 volume_to_close = round(position.volume * (tp_percentage / 100.0), 2)
 
                 # Close the calculated volume
-                self.partial_close_position(position, volume_to_close)
+                self.partial_close_position(position, volume_to_close, intent)
             else:
                 self.add_log(f"No position found for ticket {ticket}")
 
         except Exception as e:
             self.add_log(f"Error in partial closing trade: {e}")
 
-    def partial_close_position(self, position, volume_to_close):
+    def partial_close_position(self, position, volume_to_close, intent="partial close"):
         try:
             # Check if volume to close is greater than or equal to current volume
             if volume_to_close >= position.volume:
@@ -695,20 +2442,33 @@ class TradingDashboard(QtWidgets.QWidget):
             # Save current position profit before closing
             current_profit = position.profit
 
-            result = mt5.order_send(
-                action=mt5.TRADE_ACTION_DEAL,
-                symbol=position.symbol,
-                volume=volume_to_close,
-                type=mt5.ORDER_TYPE_BUY if position.type == mt5.ORDER_TYPE_SELL else mt5.ORDER_TYPE_SELL,
-                position=position.ticket,
-                price=mt5.symbol_info_tick(position.symbol).bid if position.type == mt5.ORDER_TYPE_BUY else mt5.symbol_info_tick(position.symbol).ask,
-                deviation=20,
-                magic=234000,
-                comment="Partial Close",
-                type_time=mt5.ORDER_TIME_GTC,
-                type_filling=mt5.ORDER_FILLING_IOC
-            )
-            if result.retcode == mt5.TRADE_RETCODE_DONE:
+            waits = self.order_pipeline.ticket_busy(position.ticket)
+
+            def build_request():
+                if waits:
+                    # Another order of the ticket may have closed the position while this one waited for it
+                    current = mt5.positions_get(ticket=position.ticket)
+                    if not current or current[0].volume < volume_to_close:
+                        return None
+                tick = mt5.symbol_info_tick(position.symbol)
+                return {
+                    "action": mt5.TRADE_ACTION_DEAL,
+                    "symbol": position.symbol,
+                    "volume": volume_to_close,
+                    "type": mt5.ORDER_TYPE_BUY if position.type == mt5.ORDER_TYPE_SELL else mt5.ORDER_TYPE_SELL,
+                    "position": position.ticket,
+                    "price": tick.bid if position.type == mt5.ORDER_TYPE_BUY else tick.ask,
+                    "deviation": 20,
+                    "magic": 234000,
+                    "comment": "Partial Close",
+                    "type_time": mt5.ORDER_TIME_GTC,
+                    "type_filling": mt5.ORDER_FILLING_IOC
+                }
+
+            def done(outcome):
+                if not outcome.ok:
+                    self.add_log(f"Failed to close position for {position.symbol}: {outcome.reason}")
+                    return
                 self.add_log(f"Successfully closed {volume_to_close} volume for {position.symbol}")
                 # Update total profit using current profit before closing
                 symbol_settings = self.symbol_settings.get(position.symbol, {'commission': self.commission})
@@ -717,286 +2477,183 @@ class TradingDashboard(QtWidgets.QWidget):
                     self.total_profits[position.symbol] += (current_profit - (volume_to_close * commission)) / position.volume * volume_to_close
                 else:
                     self.total_profits[position.symbol] = round((current_profit - (volume_to_close * commission)) / position.volume * volume_to_close, 2)
-                
+
                 self.add_log(f"Updated total profit for {position.symbol}: {self.total_profits[position.symbol]}")
-            else:
-                self.add_log(f"Failed to close position for {position.symbol}: {result.comment}")
+
+            if not self.order_pipeline.submit((position.symbol, position.ticket, intent), build_request, done):
+                self.add_log(f"A {intent} of {position.symbol} ticket {position.ticket} is already in flight")
         except Exception as e:
             self.add_log(f"Error in partial closing trade: {e}")
 
     def is_time_between(self, start_time, end_time, current_time=None):
         if current_time is None:
-            current_time = datetime.now().time()
+            current_time = self.now().time()
         if start_time < end_time:
             return start_time <= current_time <= end_time
         else:
             return start_time <= current_time or current_time <= end_time
 
     def check_trading_hours(self):
-        current_time = datetime.now().time()
+        current_time = self.now().time()
         
         if self.is_time_between(self.quiet_hours_start, self.quiet_hours_end):
-            self.quiet_hours_label.setText(f"Quiet Hours: Trading off from {self.quiet_hours_start.strftime('%H:%M')} to {self.quiet_hours_end.strftime('%H:%M')}")
+            self.labels['quiet_hours'] = f"Quiet Hours: Trading off from {self.quiet_hours_start.strftime('%H:%M')} to {self.quiet_hours_end.strftime('%H:%M')}"
             self.manage_trades_during_quiet_hours()
             return False
         else:
-            self.quiet_hours_label.setText("Quiet Hours: Trading hours active")
+            self.labels['quiet_hours'] = "Quiet Hours: Trading hours active"
             return True
 
     def start_daily_timer(self):
-        current_time = datetime.now()
+        current_time = self.now()
         daily_time = datetime.combine(current_time.date(), self.quiet_hours_end)
-        if current_time > daily_time:
+        if current_time >= daily_time:
             daily_time += timedelta(days=1)
         
         delay = (daily_time - current_time).total_seconds()
 
-        QtCore.QTimer.singleShot(int(delay * 1000), self.daily_update)
+        self.call_later(delay, self.daily_update)
+
+    def refresh_symbol_catalog(self):
+        """Reload the symbols' static properties every symbol_catalog_refresh seconds."""
+        self.symbol_catalog.refresh()
+        for symbol in self.symbol_settings:
+            self.update_entry_levels(symbol)
+        self.call_later(symbol_catalog_refresh, self.refresh_symbol_catalog)
 
     def daily_update(self):
-        self.add_log("Daily update triggered, checking for Excel modifications...")
-        self.get_forex_news()
-        self.read_news_from_excel()
+        self.add_log("Daily update triggered, refreshing the news...")
+        self.refresh_news()
 
         self.resume_trading_next_day()
         self.start_daily_timer()
 
-    def update_total_real_profit(self):
-        total_real_profit = 0.0
-        positions = mt5.positions_get()
-        if positions:
-            for pos in positions:
-                symbol_settings = self.symbol_settings.get(pos.symbol, {'commission': self.commission})
-                commission = symbol_settings['commission']
-                real_profit = self.total_profits.get(pos.symbol, 0) + pos.profit - (pos.volume * commission)
-                total_real_profit += real_profit
-        
-        total_real_profit_percentage = round((total_real_profit / mt5.account_info().balance) * 100,2)
-        self.total_real_profit_label.setText(f" Total Real Profit{total_real_profit:.2f} USD ({total_real_profit_percentage:.2f}%)")
-
-    def update_gui(self):
-        positions = mt5.positions_get()
-        self.table.setRowCount(0)
-        if positions:
-            self.table.setRowCount(len(positions))
-            for row, pos in enumerate(positions):
-                symbol_info = mt5.symbol_info(pos.symbol)
-                if symbol_info is None:
-                    continue
-
-                # Get symbol settings
-                symbol_settings = self.symbol_settings.get(pos.symbol, {
-                    'commission': self.commission,
-                    'tp1': self.tp1,
-                    'tp2': self.tp2,
-                    'R1': self.R1,
-                    'R2': self.R2,
-                    'R3': self.R3,
-                    'loss_threshold': 0.0
-                })
-                commission = symbol_settings['commission']
-                R1 = symbol_settings['R1']
-                R2 = symbol_settings['R2']
-                lot = pos.volume
-                current_balance = mt5.account_info().balance
-
-                # Calculate Real Profit and Real Profit Percentage
-                real_profit = self.total_profits.get(pos.symbol, 0) + pos.profit - (pos.volume * commission)
-                real_profit_percentage = round((real_profit / mt5.account_info().balance) * 100, 2)
-
-                # Calculate TP1 and TP2 Levels
-                TP1_Level = round((R1 * current_balance / 100) + (lot * commission), 2)
-                TP2_Level = round((R2 * current_balance / 100) + (lot * commission), 2)
-
-                # Column 0: 'Keys' - action buttons
-                actions_widget = QtWidgets.QWidget()
-                actions_layout = QtWidgets.QHBoxLayout(actions_widget)
-                actions_layout.setContentsMargins(0, 0, 0, 0)
-                actions_layout.setSpacing(5)
-
-                close_button = QtWidgets.QPushButton(f"✖")
-                close_button.setStyleSheet("background-color: red; color: white;")
-                close_button.setFixedSize(25, 20)
-                close_button.clicked.connect(lambda _, t=pos.ticket: self.close_trade(t))
-                actions_layout.addWidget(close_button)
-
-                # Modify TP1 Button
-                tp1_button = QtWidgets.QPushButton(f"TP1")
-                tp1_button.setStyleSheet("background-color: green; color: white;")
-                tp1_button.setFixedSize(25, 20)
-                tp1_button.clicked.connect(lambda _, t=pos.ticket: self.apply_tp1_manual(t))
-                actions_layout.addWidget(tp1_button)
-
-                # Modify TP2 Button
-                tp2_button = QtWidgets.QPushButton(f"TP2")
-                tp2_button.setStyleSheet("background-color: yellow; color: black;")
-                tp2_button.setFixedSize(25, 20)
-                tp2_button.clicked.connect(lambda _, t=pos.ticket: self.apply_tp2_manual(t))
-                actions_layout.addWidget(tp2_button)
-
-                break_even_button = QtWidgets.QPushButton(f"BE")
-                break_even_button.setStyleSheet("background-color: blue; color: white;")
-                break_even_button.setFixedSize(25, 20)
-                break_even_button.clicked.connect(lambda _, t=pos.ticket: self.break_even(t))
-                actions_layout.addWidget(break_even_button)
-
-                reset_profit_button = QtWidgets.QPushButton(f"Reset-P")
-                reset_profit_button.setStyleSheet("background-color: blue; color: white;")
-                reset_profit_button.setFixedSize(55, 20)
-                reset_profit_button.clicked.connect(lambda _, s=pos.symbol: self.reset_symbol_profit(s))
-                actions_layout.addWidget(reset_profit_button)
-
-                reverse_button = QtWidgets.QPushButton(f"REVERSE")
-                reverse_button.setStyleSheet("background-color: purple; color: white;")
-                reverse_button.setFixedSize(55, 20)
-                reverse_button.clicked.connect(lambda _, t=pos.ticket: self.reverse_trade(t))
-                actions_layout.addWidget(reverse_button)
-
-                self.table.setCellWidget(row, 0, actions_widget)
-
-                # Column 1: 'Ticket'
-                self.table.setItem(row, 1, QtWidgets.QTableWidgetItem(str(pos.ticket)))
-
-                # Column 2: 'Symbol'
-                self.table.setItem(row, 2, QtWidgets.QTableWidgetItem(pos.symbol))
-
-                # Column 3: 'Type'
-                self.table.setItem(row, 3, QtWidgets.QTableWidgetItem("Buy" if pos.type == mt5.ORDER_TYPE_BUY else "Sell"))
-
-                # Column 4: 'Volume'
-                self.table.setItem(row, 4, QtWidgets.QTableWidgetItem(str(pos.volume)))
+        for name, stats in http_client.stats.items():
+            self.add_log(f"HTTP {name}: {stats.summary()}")
 
-                # Column 5: 'Open Price'
-                self.table.setItem(row, 5, QtWidgets.QTableWidgetItem(str(round(pos.price_open, symbol_info.digits))))
+    def update_portfolio(self):
+        """Sum up the account for the daily target check, the labels and the published state of this cycle."""
+        self.portfolio = summarize_portfolio(self.broker_snapshot(), self.total_profits, self.symbol_settings, self.commission,
+                                             self.previous_day_balance, self.daily_profit_target)
+        return self.portfolio
 
-                # Column 6: 'Current Price'
-                current_price = mt5.symbol_info_tick(pos.symbol).bid if pos.type == mt5.ORDER_TYPE_BUY else mt5.symbol_info_tick(pos.symbol).ask
-                self.table.setItem(row, 6, QtWidgets.QTableWidgetItem(str(round(current_price, symbol_info.digits))))
-
-                # Column 7: 'Stop Loss' (Actual SL placed)
-                if pos.sl not in (0.0, None):
-                    sl_value = str(round(pos.sl, symbol_info.digits))
-                else:
-                    sl_value = '0'
-                self.table.setItem(row, 7, QtWidgets.QTableWidgetItem(sl_value))
-                self.table.item(row, 7).setTextAlignment(QtCore.Qt.AlignmentFlag.AlignCenter)
-
-                # Column 8: 'Take Profit'
-                if pos.tp not in (0.0, None):
-                    tp_value = str(round(pos.tp, symbol_info.digits))
-                else:
-                    tp_value = '0'
-                self.table.setItem(row, 8, QtWidgets.QTableWidgetItem(tp_value))
-                self.table.item(row, 8).setTextAlignment(QtCore.Qt.AlignmentFlag.AlignCenter)
-
-                # Column 9: 'Commission'
-                self.table.setItem(row, 9, QtWidgets.QTableWidgetItem(str(round(pos.volume * commission, 2))))
-
-                # Column 10: 'Total Profit'
-                self.table.setItem(row, 10, QtWidgets.QTableWidgetItem(str(round(self.total_profits.get(pos.symbol, 0), 2))))
-
-                # Column 11: 'Profit'
-                self.table.setItem(row, 11, QtWidgets.QTableWidgetItem(str(round(pos.profit, 2))))
-
-                # Column 12: 'Real Profit'
-                self.table.setItem(row, 12, QtWidgets.QTableWidgetItem(str(round(real_profit, 2))))
-
-                # Column 13: 'Real Profit(%)'
-                self.table.setItem(row, 13, QtWidgets.QTableWidgetItem(f"{real_profit_percentage:.2f}%"))
-
-                # Column 14: 'TP1 Level'
-                self.table.setItem(row, 14, QtWidgets.QTableWidgetItem(str(TP1_Level)))
-
-                # Column 15: 'TP2 Level'
-                self.table.setItem(row, 15, QtWidgets.QTableWidgetItem(str(TP2_Level)))
-
-                # Column 16: 'Full Close'
-                full_close_value = round((symbol_settings['R3'] * current_balance / 100) + (lot * commission), 2)
-                self.table.setItem(row, 16, QtWidgets.QTableWidgetItem(str(full_close_value)))
+    def update_total_real_profit(self):
+        total_real_profit = self.portfolio.real_profit
+        self.total_real_profit = total_real_profit
+        total_real_profit_percentage = round((total_real_profit / self.portfolio.balance) * 100,2)
+        self.labels['total_real_profit'] = f" Total Real Profit{total_real_profit:.2f} USD ({total_real_profit_percentage:.2f}%)"
+
+    def position_rows(self, snapshot):
+        """Build the cell texts of the positions table from the snapshot."""
+        rows = []
+        current_balance = snapshot.balance
+        for pos in snapshot.positions:
+            symbol_info = snapshot.symbol_info(pos.symbol)
+            if symbol_info is None:
+                continue
 
-                # Column 17: 'Real SL' (Calculated based on Close Loss (%))
-                loss_threshold = symbol_settings.get('loss_threshold', 0.0)
-                if loss_threshold > 0:
-                    if pos.type == mt5.ORDER_TYPE_BUY:
-                        # For Buy positions, SL is below the open price
-                        real_sl = pos.price_open - (current_balance * loss_threshold / 100)
-                    else:
-                        # For Sell positions, SL is above the open price
-                        real_sl = pos.price_open + (current_balance * loss_threshold / 100)
-                    # Round the SL to the symbol's digits
-                    real_sl = round(real_sl, symbol_info.digits)
-                    self.table.setItem(row, 17, QtWidgets.QTableWidgetItem(str(real_sl)))
+            # Get symbol settings
+            symbol_settings = self.symbol_settings.get(pos.symbol, {
+                'commission': self.commission,
+                'tp1': self.tp1,
+                'tp2': self.tp2,
+                'R1': self.R1,
+                'R2': self.R2,
+                'R3': self.R3,
+                'loss_threshold': 0.0
+            })
+            commission = symbol_settings['commission']
+            R1 = symbol_settings['R1']
+            R2 = symbol_settings['R2']
+            lot = pos.volume
+
+            # Calculate Real Profit and Real Profit Percentage
+            real_profit = self.total_profits.get(pos.symbol, 0) + pos.profit - (pos.volume * commission)
+            real_profit_percentage = round((real_profit / current_balance) * 100, 2)
+
+            # Calculate TP1 and TP2 Levels
+            TP1_Level = round((R1 * current_balance / 100) + (lot * commission), 2)
+            TP2_Level = round((R2 * current_balance / 100) + (lot * commission), 2)
+
+            tick = snapshot.tick(pos.symbol)
+            current_price = tick.bid if pos.type == mt5.ORDER_TYPE_BUY else tick.ask
+
+            # 'Stop Loss' (Actual SL placed) and 'Take Profit'
+            sl_value = str(round(pos.sl, symbol_info.digits)) if pos.sl not in (0.0, None) else '0'
+            tp_value = str(round(pos.tp, symbol_info.digits)) if pos.tp not in (0.0, None) else '0'
+
+            # 'Full Close'
+            full_close_value = round((symbol_settings['R3'] * current_balance / 100) + (lot * commission), 2)
+
+            # 'Real SL' (Calculated based on Close Loss (%))
+            loss_threshold = symbol_settings.get('loss_threshold', 0.0)
+            if loss_threshold > 0:
+                if pos.type == mt5.ORDER_TYPE_BUY:
+                    # For Buy positions, SL is below the open price
+                    real_sl = pos.price_open - (current_balance * loss_threshold / 100)
                 else:
-                    self.table.setItem(row, 17, QtWidgets.QTableWidgetItem('0'))
-
-                # Initialize actions_widget and actions_layout here
-                actions_widget = QtWidgets.QWidget()
-                actions_layout = QtWidgets.QHBoxLayout(actions_widget)
-                actions_layout.setContentsMargins(0, 0, 0, 0)
-                actions_layout.setSpacing(5)
-
-                # Initialize actions_widget and actions_layout here
-                actions_widget = QtWidgets.QWidget()
-                actions_layout = QtWidgets.QHBoxLayout(actions_widget)
-                actions_layout.setContentsMargins(0, 0, 0, 0)
-                actions_layout.setSpacing(5)
-
-                close_button = QtWidgets.QPushButton(f"✖")
-                close_button.setStyleSheet("background-color: red; color: white;")
-                close_button.setFixedSize(25, 20)
-                close_button.clicked.connect(lambda _, t=pos.ticket: self.close_trade(t))
-                actions_layout.addWidget(close_button)
-
-                # Modify TP1 Button
-                tp1_button = QtWidgets.QPushButton(f"TP1")
-                tp1_button.setStyleSheet("background-color: green; color: white;")
-                tp1_button.setFixedSize(25, 20)
-                tp1_button.clicked.connect(lambda _, t=pos.ticket: self.apply_tp1_manual(t))
-                actions_layout.addWidget(tp1_button)
-
-                # Modify TP2 Button
-                tp2_button = QtWidgets.QPushButton(f"TP2")
-                tp2_button.setStyleSheet("background-color: yellow; color: black;")
-                tp2_button.setFixedSize(25, 20)
-                tp2_button.clicked.connect(lambda _, t=pos.ticket: self.apply_tp2_manual(t))
-                actions_layout.addWidget(tp2_button)
-
-                break_even_button = QtWidgets.QPushButton(f"BE")
-                break_even_button.setStyleSheet("background-color: blue; color: white;")
-                break_even_button.setFixedSize(25, 20)
-                break_even_button.clicked.connect(lambda _, t=pos.ticket: self.break_even(t))
-                actions_layout.addWidget(break_even_button)
-
-                reset_profit_button = QtWidgets.QPushButton(f"Reset-P")
-                reset_profit_button.setStyleSheet("background-color: blue; color: white;")
-                reset_profit_button.setFixedSize(55, 20)
-                reset_profit_button.clicked.connect(lambda _, s=pos.symbol: self.reset_symbol_profit(s))
-                actions_layout.addWidget(reset_profit_button)
-
-                reverse_button = QtWidgets.QPushButton(f"REVERSE")
-                reverse_button.setStyleSheet("background-color: purple; color: white;")
-                reverse_button.setFixedSize(55, 20)
-                reverse_button.clicked.connect(lambda _, t=pos.ticket: self.reverse_trade(t))
-                actions_layout.addWidget(reverse_button)
-
-                self.table.setCellWidget(row, 0, actions_widget)
-
-        self.update_total_real_profit()
+                    # For Sell positions, SL is above the open price
+                    real_sl = pos.price_open + (current_balance * loss_threshold / 100)
+                # Round the SL to the symbol's digits
+                real_sl = str(round(real_sl, symbol_info.digits))
+            else:
+                real_sl = '0'
+
+            rows.append(PositionRow(pos.ticket, pos.symbol, (
+                str(pos.ticket),
+                pos.symbol,
+                "Buy" if pos.type == mt5.ORDER_TYPE_BUY else "Sell",
+                str(pos.volume),
+                str(round(pos.price_open, symbol_info.digits)),
+                str(round(current_price, symbol_info.digits)),
+                sl_value,
+                tp_value,
+                str(round(pos.volume * commission, 2)),
+                str(round(self.total_profits.get(pos.symbol, 0), 2)),
+                str(round(pos.profit, 2)),
+                str(round(real_profit, 2)),
+                f"{real_profit_percentage:.2f}%",
+                str(TP1_Level),
+                str(TP2_Level),
+                str(full_close_value),
+                real_sl
+            )))
+        return tuple(rows)
+
+    def order_rows(self, snapshot):
+        """Build the cell texts of the pending orders part of the table from the snapshot."""
+        rows = []
+        for order in snapshot.orders:
+            rows.append(OrderRow(order.ticket, (
+                str(order.ticket),
+                order.symbol,
+                "Buy" if order.type == mt5.ORDER_TYPE_BUY_LIMIT else "Sell",
+                str(order.volume_initial),
+                str(order.price_open),
+                "Pending",
+                "N/A",  # Commission not relevant for orders
+                "N/A",  # R3 Close not relevant
+                "N/A",  # Total profit not relevant
+                "N/A",  # Profit not relevant for pending orders
+                "N/A",  # Real profit not relevant
+                "N/A"  # RP not relevant for orders
+            )))
+        return tuple(rows)
 
     def break_even(self, ticket):
         try:
-            positions = mt5.positions_get(ticket=ticket)
-            if positions is None or len(positions) == 0:
+            snapshot = self.broker_snapshot(ticket=ticket)
+            position = snapshot.position(ticket)
+            if position is None:
                 self.add_log(f"No position found for ticket {ticket}")
                 return
-            position = positions[0]
 
-            symbol_info = mt5.symbol_info(position.symbol)
+            symbol_info = snapshot.symbol_info(position.symbol)
             if symbol_info is None:
                 self.add_log(f"Symbol info not found for {position.symbol}")
                 return
 
-            tick = mt5.symbol_info_tick(position.symbol)
+            tick = snapshot.tick(position.symbol)
             if tick is None:
                 self.add_log(f"Failed to get tick for {position.symbol}")
                 return
@@ -1008,44 +2665,29 @@ class TradingDashboard(QtWidgets.QWidget):
                 if current_price <= position.price_open:
                     self.add_log(f"Position {ticket} is not in profit. Current price: {current_price}, Open price: {position.price_open}")
                     return
-                sl = position.price_open + (12 / 10 ** digits)
+                sl = position.price_open + symbol_info.break_even_offset
             elif position.type == mt5.ORDER_TYPE_SELL:
                 current_price = tick.bid
                 if current_price >= position.price_open:
                     self.add_log(f"Position {ticket} is not in profit. Current price: {current_price}, Open price: {position.price_open}")
                     return
-                sl = position.price_open - (12 / 10 ** digits)
+                sl = position.price_open - symbol_info.break_even_offset
             else:
                 self.add_log(f"Unknown position type for ticket {ticket}")
                 return
 
             sl = round(sl, digits)
 
-            request = {
-                "action": mt5.TRADE_ACTION_SLTP,
-                "position": position.ticket,
-                "sl": sl,
-                "comment": "Break Even"
-            }
-
-            if position.tp > 0:
-                request["tp"] = position.tp
-
-            request["symbol"] = position.symbol
-            request["type"] = position.type
-            self.add_log(f"Sending SLTP request: {request}")
-            result = mt5.order_send(request)
-            if result.retcode == mt5.TRADE_RETCODE_DONE:
-                self.add_log(f"Break Even set for {position.symbol}, ticket {position.ticket}")
-            else:
-                self.add_log(f"Failed to set Break Even for {position.symbol}, ticket {position.ticket}: {result.comment}")
+            self.add_log(f"Sending Break Even for ticket {position.ticket}, sl {sl}")
+            self.modify_sltp(position, sl, "Break Even")
         except Exception as e:
             self.add_log(f"Error in setting Break Even: {e}")
 
     def reverse_trade(self, ticket):
         try:
             # Get the position by ticket
-            position = next((pos for pos in mt5.positions_get() if pos.ticket == ticket), None)
+            snapshot = self.broker_snapshot(ticket=ticket)
+            position = snapshot.position(ticket)
             if position:
                 symbol = position.symbol
                 # Get symbol settings
@@ -1054,8 +2696,9 @@ class TradingDashboard(QtWidgets.QWidget):
 
                 # Calculate adjusted volume with martingale multiplier
                 adjusted_volume = round(position.volume * martingale_multiplier, 2)
-                if adjusted_volume < mt5.symbol_info(symbol).volume_min:
-                    adjusted_volume = mt5.symbol_info(symbol).volume_min
+                volume_min = snapshot.symbol_info(symbol).volume_min
+                if adjusted_volume < volume_min:
+                    adjusted_volume = volume_min
 
                 # Determine reverse direction
                 direction = "Sell" if position.type == mt5.ORDER_TYPE_BUY else "Buy"
@@ -1083,102 +2726,81 @@ class TradingDashboard(QtWidgets.QWidget):
             self.add_log(f"Total Profit for {symbol} has been reset to zero.")
         else:
             self.add_log(f"Symbol {symbol} not found in total profits.")
-        self.update_gui()  # Update table to reflect changes
-
-    def get_forex_news(self):
-        news_url = "https://nfs.faireconomy.media/ff_calendar_thisweek.json"
-        response = requests.get(news_url)
-        if response.status_code == 200:
-            news_data = response.json()
-            news_list = []
-            for news in news_data:
-                if news['impact'] == 'High' and news['country'] == 'USD':
-                    news_time = pd.to_datetime(news['date']).tz_convert(None) + timedelta(hours=4)
-                    news_list.append({
-                        "date": news_time.date().strftime("%Y-%m-%d"),
-                        "time": news_time.time().strftime("%H:%M:%S"),
-                        "currency": news['country'],
-                        "impact": news['impact']
-                    })
-            
-            df_news = pd.DataFrame(news_list)
+        self.publish_state()  # Update table to reflect changes
 
-            if os.path.exists("forex_news.xlsx"):
-                os.remove("forex_news.xlsx")
-
-            df_news.to_excel("forex_news.xlsx", index=False, engine='openpyxl')
-            self.add_log(f"High Impact News saved to forex_news.xlsx")
-        else:
-            self.add_log("Failed to fetch news data")
+    def load_news(self):
+        """Trade on the news events in the cache, from a day back on."""
+        self.set_news(self.news_store.load(since=self.now() - timedelta(days=1)))
 
-    def read_news_from_excel(self):
-        try:
-            with pd.ExcelFile("forex_news.xlsx", engine='openpyxl') as xls:
-                df_news = pd.read_excel(xls)
-                self.high_impact_news = []
-
-                for _, row in df_news.iterrows():
-                    date_time = datetime.combine(pd.to_datetime(row['date']).date(), pd.to_datetime(row['time']).time())
-                    self.high_impact_news.append({
-                        "date": date_time,
-                        "currency": row['currency'],
-                        "impact": row['impact']
-                    })
-
-                self.add_log(f"Loaded high impact news from forex_news.xlsx: {self.high_impact_news}")
-        except Exception as e:
-            self.add_log(f"Error reading news from Excel: {e}")
+    def refresh_news(self):
+        """Import the Excel backup if it changed and download the feed on a background thread."""
+        if self._news_refreshing:
+            return
+        self._news_refreshing = True
 
-    def show_news_alert(self, news):
-        alert_message = f"High Impact News Alert!\n\nCurrency: {news['currency']}\nImpact: {news['impact']}\nTime: {news['date'].strftime('%Y-%m-%d %H:%M:%S')}"
-        
-        msg_box = QMessageBox()
-        msg_box.setIcon(QMessageBox.Icon.Information)
-        msg_box.setWindowTitle("News Alert")
-        msg_box.setText(alert_message)
-        msg_box.setStandardButtons(QMessageBox.StandardButton.Ok)
-        
-        self.add_log(f"Displaying news alert: {alert_message}")
-        msg_box.exec()
+        def refresh():
+            log = self.add_log
+            imported = fetched = None
+            try:
+                imported = import_news_excel(self.news_store, log=log)
+                if imported is not None:
+                    log(f"Imported {imported} news events from {news_excel_path}")
+                fetched = fetch_news(self.news_store, log=log)
+                if fetched:
+                    log(f"Stored {fetched} high impact news events from the news feed")
+                elif fetched == 0:
+                    log("News feed unchanged since the last download")
+            finally:
+                self.submit('news_refreshed', imported is not None or bool(fetched), fetched is not None)
+
+        threading.Thread(target=refresh, name="NewsRefresh", daemon=True).start()
+
+    def news_refreshed(self, changed, downloaded=True):
+        self._news_refreshing = False
+        # A failed download keeps trading on the cached news
+        self.set_readiness('news', "ready" if downloaded else "cached, download failed")
+        if changed:
+            self.load_news()
+            self.add_log(f"Trading on {len(self.news_calendar)} high impact news events")
+
+    def set_news(self, news):
+        """Replace the news calendar with the high impact news events."""
+        self.news_calendar = NewsCalendar(news)
+
+    def outside_news_window(self):
+        return self.news_calendar.window(self.now(), news_currencies) is None
 
     def manage_trades_around_news(self):
         global one_time
-        current_time = datetime.now()
-        upcoming_news = None
-        is_within_news_window = False
-        time_to_news = None
-        time_after_news = None
-        
-        for news in self.high_impact_news:
-            news_time = news['date']
-            if news_time - timedelta(minutes=15) <= current_time <= news_time + timedelta(minutes=15):
-                is_within_news_window = True
-                upcoming_news = news
-                time_after_news = (news_time + timedelta(minutes=10)) - current_time
-                break
-            elif news_time > current_time:
-                upcoming_news = news
-                time_to_news = news_time - current_time
-                break
-        if is_within_news_window:
+        current_time = self.now()
+        window = self.news_calendar.window(current_time, news_currencies)
+        if window is not None:
+            upcoming_news = window.news
+            time_after_news = window.end - current_time
+        else:
+            upcoming_news = self.news_calendar.next_event(current_time, news_currencies)
+            time_to_news = upcoming_news['date'] - current_time if upcoming_news else None
+        if window is not None:
             if one_time:
                 # self.show_news_alert(upcoming_news)
                 one_time = False
             
-            self.news_info_label.setText(f"News Info: {upcoming_news['currency']} - {upcoming_news['impact']} at {upcoming_news['date'].strftime('%Y-%m-%d %H:%M:%S')}")
-            self.time_to_news_label.setText(f"Time to News: In news window")
-            self.time_after_news_label.setText(f"Time After News: {int(time_after_news.total_seconds() // 60)} minutes left")
-            re = requests.get(url, timeout=10)
-            positions = mt5.positions_get()
+            self.labels['news_info'] = f"News Info: {upcoming_news['currency']} - {upcoming_news['impact']} at {upcoming_news['date'].strftime('%Y-%m-%d %H:%M:%S')}"
+            self.labels['time_to_news'] = f"Time to News: In news window"
+            self.labels['time_after_news'] = f"Time After News: {int(time_after_news.total_seconds() // 60)} minutes left"
+            self.discard_pending_signals()
+            snapshot = self.broker_snapshot()
+            positions = snapshot.positions
             for pos in positions:
-                symbol_positions = mt5.positions_get(symbol=pos.symbol)
+                symbol_positions = snapshot.positions_for(pos.symbol)
                 if symbol_positions and len(symbol_positions) == 2:
-                    buy_positions = [p for p in symbol_positions if p.type == mt5.ORDER_TYPE_BUY]
-                    sell_positions = [p for p in symbol_positions if p.type == mt5.ORDER_TYPE_SELL]
+                    buy_positions = snapshot.positions_for(pos.symbol, mt5.ORDER_TYPE_BUY)
+                    sell_positions = snapshot.positions_for(pos.symbol, mt5.ORDER_TYPE_SELL)
                     if buy_positions and sell_positions:
                         continue
 
-                if upcoming_news['currency'] == "USD" and self.news_management_active:  # upcoming_news['currency'] in pos.symbol or
+                affected = news_affects_all_symbols or self.news_calendar.window(current_time, news_currencies, pos.symbol) is not None
+                if affected and self.news_management_active:
                     self.add_log(f"Managing position {pos.symbol}, ticket {pos.ticket}, current profit: {pos.profit}")
 
                     if pos.profit > 0 and len(symbol_positions) == 1:
@@ -1192,25 +2814,26 @@ class TradingDashboard(QtWidgets.QWidget):
         else:
             one_time = True
             if upcoming_news:
-                self.news_info_label.setText(f"News Info: {upcoming_news['currency']} - {upcoming_news['impact']} at {upcoming_news['date'].strftime('%Y-%m-%d %H:%M:%S')}")
-                self.time_to_news_label.setText(f"Time to News: {int(time_to_news.total_seconds() // 60)} minutes")
-                self.time_after_news_label.setText(f"Time After News: Not applicable")
+                self.labels['news_info'] = f"News Info: {upcoming_news['currency']} - {upcoming_news['impact']} at {upcoming_news['date'].strftime('%Y-%m-%d %H:%M:%S')}"
+                self.labels['time_to_news'] = f"Time to News: {int(time_to_news.total_seconds() // 60)} minutes"
+                self.labels['time_after_news'] = f"Time After News: Not applicable"
             else:
-                self.news_info_label.setText("News Info: No upcoming news")
-                self.time_to_news_label.setText("Time to News: N/A")
-                self.time_after_news_label.setText("Time After News: N/A")
+                self.labels['news_info'] = "News Info: No upcoming news"
+                self.labels['time_to_news'] = "Time to News: N/A"
+                self.labels['time_after_news'] = "Time After News: N/A"
 
             return True
 
     def manage_trades_during_quiet_hours(self):
-        current_time = datetime.now()
-        re = requests.get(url, timeout=10)
-        positions = mt5.positions_get()
+        current_time = self.now()
+        self.discard_pending_signals()
+        snapshot = self.broker_snapshot()
+        positions = snapshot.positions
         for pos in positions:
-            symbol_positions = mt5.positions_get(symbol=pos.symbol)
+            symbol_positions = snapshot.positions_for(pos.symbol)
             if symbol_positions and len(symbol_positions) == 2:
-                buy_positions = [p for p in symbol_positions if p.type == mt5.ORDER_TYPE_BUY]
-                sell_positions = [p for p in symbol_positions if p.type == mt5.ORDER_TYPE_SELL]
+                buy_positions = snapshot.positions_for(pos.symbol, mt5.ORDER_TYPE_BUY)
+                sell_positions = snapshot.positions_for(pos.symbol, mt5.ORDER_TYPE_SELL)
                 if buy_positions and sell_positions:
                     continue
 
@@ -1222,9 +2845,9 @@ class TradingDashboard(QtWidgets.QWidget):
                 # self.hedge_trade(pos.symbol)
 
     def hedge_trade(self, symbol):
-        positions = mt5.positions_get(symbol=symbol)
+        positions = self.broker_snapshot(symbol=symbol).positions_for(symbol)
         
-        if positions is None:
+        if not positions:
             self.add_log(f"No positions to hedge for {symbol}")
             return
 
@@ -1244,54 +2867,37 @@ class TradingDashboard(QtWidgets.QWidget):
             self.add_log(f"No positions to hedge for {symbol}")
 
     def check_daily_balance(self):
-        current_equity = mt5.account_info().equity
-        if current_equity >= self.previous_day_balance + (self.daily_profit_target * self.previous_day_balance / 100):
+        if self.portfolio.target_reached:
             self.trading_stopped = True
             self.close_all_positions()
 
             # Step 1: Remove all pending orders after reaching daily target
             try:
-                orders = mt5.orders_get()
-                if orders:
-                    for order in orders:
-                        result = mt5.order_send(
-                            action=mt5.TRADE_ACTION_REMOVE,
-                            order=order.ticket,
-                            symbol=order.symbol,
-                            type=order.type
-                        )
-                        if result.retcode == mt5.TRADE_RETCODE_DONE:
-                            self.add_log(f"Successfully removed pending order {order.symbol}, ticket {order.ticket}")
-                        else:
-                            self.add_log(f"Failed to remove pending order {order.symbol}, ticket {order.ticket}: {result.comment}")
-                else:
-                    self.add_log("No pending orders found.")
+                self.cancel_orders_many(name="Remove pending orders at daily target")
             except Exception as e:
                 self.add_log(f"Error while removing pending orders: {e}")
 
             self.add_log(f"Daily profit target reached. All positions and pending orders closed. Trading stopped until the next day.")
-        else:
-            self.update_required_profit_label()
 
-    def close_all_positions(self):
+    def close_all_positions(self, attempt=1):
         self.add_log(f"Attempting to close all positions...")
-        positions = mt5.positions_get()
-        if positions:
-            for pos in positions:
-                self.close_position(pos)
-        
-        QtCore.QTimer.singleShot(5000, self.verify_positions_closed) 
+        self.close_many(name="Close all positions", on_done=lambda batch: self.verify_positions_closed(attempt))
 
-    def verify_positions_closed(self):
+    def verify_positions_closed(self, attempt=1):
+        """Check the account right after a round of closes has completed and send another round if needed."""
         if self.check_all_positions_closed():
             self.add_log("All positions closed successfully.")
-        else:
+        elif any(self.order_pipeline.ticket_busy(pos.ticket) for pos in self.broker_snapshot().positions):
+            # Closes sent from elsewhere are still in flight, look again once they had time to fill
+            self.call_later(0.5, lambda: self.verify_positions_closed(attempt))
+        elif attempt < flatten_rounds:
             self.add_log("Some positions are still open, sending close request again...")
-            self.close_all_positions()
-            QtCore.QTimer.singleShot(5000, self.verify_positions_closed)
+            self.close_all_positions(attempt + 1)
+        else:
+            self.add_log(f"Positions are still open after {flatten_rounds} rounds of close requests.")
 
     def check_all_positions_closed(self):
-        positions = mt5.positions_get()
+        positions = self.broker_snapshot().positions
         if positions and len(positions) > 0:
             self.add_log(f"There are still open positions. Waiting for them to close...")
             return False
@@ -1301,9 +2907,10 @@ class TradingDashboard(QtWidgets.QWidget):
 
     def resume_trading_next_day(self):
         self.trading_stopped = False
-        current_balance = mt5.account_info().balance
-        positions = mt5.positions_get()
-        re = requests.get(url, timeout=10)
+        snapshot = self.broker_snapshot()
+        current_balance = snapshot.balance
+        positions = snapshot.positions
+        self.discard_pending_signals()
         self.add_log("New day started. Trading resumed.")
         if len(positions) == 0:  # بررسی وجود نداشتن معاملات باز
             if current_balance > self.previous_day_balance:
@@ -1313,27 +2920,56 @@ class TradingDashboard(QtWidgets.QWidget):
         else:
             self.add_log("Cannot update balance, there are open positions.")
 
+        self.update_portfolio()
         self.update_required_profit_label()
 
     def process_signals(self):
+        """Execute every pending signal in arrival order."""
         try:
-            if self.auto_trading and self.check_trading_hours() and self.manage_trades_around_news():
-                response = requests.get(url)
-                if response.status_code == 200:
-                    signal = response.json()
-                    if signal:
-                        if 'event' in signal:
-                            self.add_log(f"Received signal: {signal}")
-                            self.execute_trade(signal)
-                    else:
-                        self.add_log("No valid signal found")
-                else:
-                    self.add_log("No new signal found or failed to fetch signal")
-
-            self.update_gui()
+            # Positions are managed around news by the cycle, signals only need to know whether a window is on
+            if self.auto_trading and self.check_trading_hours() and self.outside_news_window():
+                if poll_webhook_signals:
+                    self.poll_webhook_signal()
+                for received_at, signal in self.signal_receiver.drain():
+                    age = self.monotonic() - received_at
+                    if age > signal_max_age:
+                        self.journal.record('signal', signal=signal, age=round(age, 3), dropped=True)
+                        self.add_log(f"Dropping signal older than {signal_max_age} seconds: {signal}")
+                        continue
+                    self.journal.record('signal', signal=signal, age=round(age, 3), dropped=False)
+                    self.add_log(f"Received signal: {signal}")
+                    self.order_pipeline.signal_received_at = received_at
+                    try:
+                        self.execute_trade(signal)
+                    finally:
+                        self.order_pipeline.signal_received_at = None
         except Exception as e:
             self.add_log(f"Error fetching or processing signal: {e}")
+
+    def poll_webhook_signal(self):
+        response = http_client.get('signals')
+        if response.status_code == 200:
+            signal = response.json()
+            if signal:
+                if 'event' in signal:
+                    self.signal_receiver.push(signal)
+            else:
+                self.add_log("No valid signal found")
+        else:
+            self.add_log("No new signal found or failed to fetch signal")
+
+    def discard_pending_signals(self):
+        """Drop signals received while trading is paused so they do not fire once it resumes."""
+        if poll_webhook_signals:
+            try:
+                http_client.get('signals')
+            except requests.RequestException as e:
+                self.add_log(f"Failed to clear the webhook signal: {e}")
+        discarded = self.signal_receiver.drain()
+        if discarded:
+            self.add_log(f"Discarded {len(discarded)} signal(s) received while trading was paused")
  
+
     def execute_trade(self, signal):
         try:
             if isinstance(signal, str):
@@ -1353,22 +2989,23 @@ class TradingDashboard(QtWidgets.QWidget):
                         lotbase = float(data[1]) # lot for 1000$
                         direction = data[2]
                         action_type = parts[0]
-                        current_balance = mt5.account_info().balance
+                        snapshot = self.broker_snapshot()
+                        current_balance = snapshot.balance
                         lot = round(current_balance / 1000 * lotbase,2)
                         if lot < 0.02:
                             lot = 0.02
 
                         if action_type == "Trade":
                             # Get list of open positions for the symbol
-                            open_positions = [{"symbol": pos.symbol, "type": pos.type, "ticket": pos.ticket, "profit": pos.profit, "lot": pos.volume} for pos in mt5.positions_get()]
+                            open_positions = [{"symbol": pos.symbol, "type": pos.type, "ticket": pos.ticket, "profit": pos.profit, "lot": pos.volume} for pos in snapshot.positions_for(symbol)]
 
                             # Manage trade based on trade_management_mode
                             if trade_management_mode == 1:
                                 # Mode 1: Single direction, single position per symbol
                                 existing_positions = [pos for pos in open_positions if pos['symbol'] == symbol]
-                                positions = mt5.positions_get(symbol=symbol)
-                                buy_positions = [pos for pos in positions if pos.type == mt5.ORDER_TYPE_BUY]
-                                sell_positions = [pos for pos in positions if pos.type == mt5.ORDER_TYPE_SELL]
+                                positions = snapshot.positions_for(symbol)
+                                buy_positions = snapshot.positions_for(symbol, mt5.ORDER_TYPE_BUY)
+                                sell_positions = snapshot.positions_for(symbol, mt5.ORDER_TYPE_SELL)
                                 if len(existing_positions) == 1:
                                     if direction == "Buy" and sell_positions:
                                         sell_profit = sell_positions[0].profit
@@ -1477,9 +3114,9 @@ class TradingDashboard(QtWidgets.QWidget):
 
                             elif trade_management_mode == 4:
                                 # Mode 4: Smart Hedging
-                                positions = mt5.positions_get(symbol=symbol)
-                                buy_positions = [pos for pos in positions if pos.type == mt5.ORDER_TYPE_BUY]
-                                sell_positions = [pos for pos in positions if pos.type == mt5.ORDER_TYPE_SELL]
+                                positions = snapshot.positions_for(symbol)
+                                buy_positions = snapshot.positions_for(symbol, mt5.ORDER_TYPE_BUY)
+                                sell_positions = snapshot.positions_for(symbol, mt5.ORDER_TYPE_SELL)
                                 if len(positions) == 0:
                                     self.add_log(f"No open positions, opening first {direction} trade")
                                     self.open_position(symbol, lot, direction)
@@ -1548,18 +3185,16 @@ class TradingDashboard(QtWidgets.QWidget):
                                             
                         elif action_type == "Close":
                             # Close the specified position
-                            open_positions = [{"symbol": pos.symbol, "type": pos.type, "ticket": pos.ticket, "profit": pos.profit, "lot": pos.volume} for pos in mt5.positions_get()]
-
-                            for pos in open_positions:
-                                if pos['symbol'] == symbol and pos['type'] == (mt5.ORDER_TYPE_BUY if direction == "Buy" else mt5.ORDER_TYPE_SELL):
-                                    if lotbase >= 100:
-                                        self.close_trade(pos['ticket'])
-                                        self.add_log("Position closed by signal")
-                                    else:
-                                        volume_percentage = lotbase
-                                        self.add_log("Partial close position by signal")
-                                        self.partial_close_trade(pos['ticket'], volume_percentage)
-                                    break
+                            side = mt5.ORDER_TYPE_BUY if direction == "Buy" else mt5.ORDER_TYPE_SELL
+                            for pos in snapshot.positions_for(symbol, side):
+                                if lotbase >= 100:
+                                    self.close_trade(pos.ticket)
+                                    self.add_log("Position closed by signal")
+                                else:
+                                    volume_percentage = lotbase
+                                    self.add_log("Partial close position by signal")
+                                    self.partial_close_trade(pos.ticket, volume_percentage)
+                                break
                     else:
                         self.add_log("Signal data does not have the expected format")
                 else:
@@ -1571,124 +3206,121 @@ class TradingDashboard(QtWidgets.QWidget):
             self.add_log(f"Error in executing trade: {e}")
 
     def update_required_profit_label(self):
-        current_equity = mt5.account_info().equity
-        current_balance = mt5.account_info().balance
-        self.required_profit_to_close = self.previous_day_balance + (self.daily_profit_target * self.previous_day_balance / 100) - current_equity
-        self.required_profit_label.setText(
+        portfolio = self.portfolio
+        current_equity = portfolio.equity
+        current_balance = portfolio.balance
+        self.required_profit_to_close = portfolio.required_profit
+        self.labels['required_profit'] = (
             f"Required Profit to Close All: {self.required_profit_to_close:.2f}   |   Balance: {current_balance:.2f} USD   |   Equity: {current_equity:.2f} USD   |   previous day balance: {self.previous_day_balance:.2f} USD                                          |"
         )
 
-    def update_orders(self):
-        orders = mt5.orders_get()
-        
-        if orders:
-            # Set the table row count to include both positions and orders
-            total_rows = len(orders) + len(mt5.positions_get()) + 1  # +1 for the separator row
-            self.table.setRowCount(total_rows)
-            
-            row_offset = len(mt5.positions_get())  # Start adding orders after the positions
-
-            # Add a separator row with the label "Pending Orders"
-            self.table.setItem(row_offset, 0, QtWidgets.QTableWidgetItem("Pending Orders"))
-            self.table.setSpan(row_offset, 0, 1, self.table.columnCount())  # Merge the cells for the row
-            item = self.table.item(row_offset, 0)
-            item.setTextAlignment(QtCore.Qt.AlignmentFlag.AlignCenter)
-            item.setBackground(QtGui.QColor(100, 100, 100))  # Set background color to distinguish the separator row
-            item.setForeground(QtGui.QColor(255, 255, 255))  # Set text color to white for visibility
-
-            # Increment row offset to start adding orders after the separator
-            row_offset += 1
-
-            for row, order in enumerate(orders):
-                self.table.setItem(row_offset + row, 0, QtWidgets.QTableWidgetItem(f"Order {row + 1}"))
-                self.table.setItem(row_offset + row, 1, QtWidgets.QTableWidgetItem(str(order.ticket)))
-                self.table.setItem(row_offset + row, 2, QtWidgets.QTableWidgetItem(order.symbol))
-                self.table.setItem(row_offset + row, 3, QtWidgets.QTableWidgetItem("Buy" if order.type == mt5.ORDER_TYPE_BUY_LIMIT else "Sell"))
-                self.table.setItem(row_offset + row, 4, QtWidgets.QTableWidgetItem(str(order.volume_initial)))
-                self.table.setItem(row_offset + row, 5, QtWidgets.QTableWidgetItem(str(order.price_open)))
-                self.table.setItem(row_offset + row, 6, QtWidgets.QTableWidgetItem("Pending"))
-                self.table.setItem(row_offset + row, 7, QtWidgets.QTableWidgetItem("N/A"))  # Commission not relevant for orders
-                self.table.setItem(row_offset + row, 8, QtWidgets.QTableWidgetItem("N/A"))  # R3 Close not relevant
-                self.table.setItem(row_offset + row, 9, QtWidgets.QTableWidgetItem("N/A"))  # Total profit not relevant
-                self.table.setItem(row_offset + row, 10, QtWidgets.QTableWidgetItem("N/A"))  # Profit not relevant for pending orders
-                self.table.setItem(row_offset + row, 11, QtWidgets.QTableWidgetItem("N/A"))  # Real profit not relevant
-                self.table.setItem(row_offset + row, 12, QtWidgets.QTableWidgetItem("N/A"))  # RP not relevant for orders
-
-                # Set background color for pending orders and text color for readability
-                for col in range(self.table.columnCount()):
-                    item = self.table.item(row_offset + row, col)
-                    if item:
-                        item.setBackground(QtGui.QColor(150, 150, 150))  # Darker grey background for better contrast
-                        item.setForeground(QtGui.QColor(0, 0, 0))  # Set text color to black for readability
-
-                # Add the delete button for orders
-                actions_widget = QtWidgets.QWidget()
-                actions_layout = QtWidgets.QHBoxLayout(actions_widget)
-                actions_layout.setContentsMargins(0, 0, 0, 0)
-                actions_layout.setSpacing(5)
-
-                close_button = QtWidgets.QPushButton(f"✖")
-                close_button.setStyleSheet("background-color: red; color: white;")
-                close_button.setFixedSize(25, 20)
-                close_button.clicked.connect(lambda _, t=order.ticket: self.close_order(t))
-                actions_layout.addWidget(close_button)
-
-                self.table.setCellWidget(row_offset + row, 0, actions_widget)
-
     def close_order(self, ticket):
         try:
             # Get the pending order by ticket
-            order = next((o for o in mt5.orders_get() if o.ticket == ticket), None)
+            order = next((o for o in self.broker_snapshot(ticket=ticket).orders if o.ticket == ticket), None)
             if order:
-                result = mt5.order_send(
-                    action=mt5.TRADE_ACTION_REMOVE,
-                    order=order.ticket,
-                    symbol=order.symbol,
-                    type=order.type
-                )
-                if result.retcode == mt5.TRADE_RETCODE_DONE:
-                    self.add_log(f"Successfully removed pending order {order.symbol}, ticket {order.ticket}")
-                else:
-                    self.add_log(f"Failed to remove order {order.symbol}, ticket {order.ticket}: {result.comment}")
+                self.cancel_order(order)
             else:
                 self.add_log(f"No pending order found with ticket {ticket}")
         except Exception as e:
             self.add_log(f"Error in removing order: {e}")
 
-    def update_gui_loop(self):
+    def stage(self, name):
+        """Run the cycle stage method name, timing it unless metrics are off."""
+        if self.metrics is None:
+            return getattr(self, name)()
+        with self.metrics.timer('cycle_stage_seconds', 'stage', name):
+            return getattr(self, name)()
+
+    def run_cycle(self):
         if not self.trading_stopped:
-            self.process_signals()
-            self.check_trading_hours()
-            self.manage_trades_around_news()
+            started = time.perf_counter()
+            # Every stage of this cycle reads from the same broker snapshot
+            self.snapshot = self.stage('take_snapshot')
+            try:
+                self.stage('handle_position_changes')
+                self.stage('process_signals')
+                trading_hours = self.stage('check_trading_hours')
+                outside_news = self.stage('manage_trades_around_news')
+                self.entries_allowed = trading_hours and outside_news
+                if not self.entries_allowed:
+                    self.disarm_entries()
 
-            self.update_pivot_data()
+                self.stage('update_pivot_data')
 
-            self.reset_total_profit_if_no_position()
+                self.stage('reset_total_profit_if_no_position')
 
-            positions = mt5.positions_get()
-            if positions:
-                for pos in positions:
-                    symbol = pos.symbol
-                    lot = pos.volume
-                    self.apply_tp_logic(symbol, lot)
+                self.stage('apply_tp_logic')
 
-            # Check and update pending orders
-            self.update_orders()
-            self.set_stop_loss_for_all_positions()
-            self.check_daily_balance()
-            self.update_required_profit_label()
-            self.update_buy_sell_price_labels()
+                self.stage('set_stop_loss_for_all_positions')
+                # The daily target check and the labels read the same summary of the account
+                self.stage('update_portfolio')
+                self.stage('check_daily_balance')
+                self.stage('update_required_profit_label')
+                self.stage('update_buy_sell_price_labels')
 
-            # Continuously check price conditions
-            self.check_price_conditions()
+                # Price conditions are also checked on every tick in between cycles
+                self.stage('check_price_conditions')
 
-        # Set timer to call this function again after one second
-        QtCore.QTimer.singleShot(500, self.update_gui_loop)
+                self.stage('publish_state')
+            except Exception as e:
+                self.add_log(f"Error in trading cycle: {e}")
+            finally:
+                self.snapshot = None
+                if self.metrics is not None:
+                    self.metrics.observe('cycle_stage_seconds', time.perf_counter() - started, 'stage', 'cycle')
+
+    def take_snapshot(self):
+        snapshot = BrokerSnapshot(self.snapshot_symbols(), self.position_store, self.tick_stream.latest(), self.symbol_catalog)
+        if snapshot.account is not None and self.symbol_catalog.use_server(snapshot.account.server):
+            self.add_log(f"Trade server changed to {snapshot.account.server}, reloading the symbols")
+            for symbol in self.symbol_settings:
+                self.update_entry_levels(symbol)
+        return snapshot
+
+    def publish_state(self):
+        """Publish the table rows and label texts for the dashboard to render."""
+        snapshot = self.broker_snapshot()
+        if self.snapshot is None:
+            # Published by a command between two cycles, e.g. after the total profits were reset
+            self.update_portfolio()
+        self.update_total_real_profit()
+        self.journal_profit_changes()
+        self.event_queue.put(StateEvent(
+            positions=self.position_rows(snapshot),
+            orders=self.order_rows(snapshot),
+            labels=dict(self.labels),
+            summary={
+                'account_login': self.account_login,
+                'balance': self.portfolio.balance,
+                'equity': self.portfolio.equity,
+                'real_profit': self.total_real_profit,
+                'positions': self.portfolio.positions,
+                'commission': self.portfolio.commission,
+                'target_equity': self.portfolio.target_equity,
+                'trading_stopped': self.trading_stopped,
+            },
+            diagnostics=tuple(self.metrics.summary()) if self.metrics is not None else ()
+        ))
+
+    def journal_profit_changes(self):
+        """Journal the total profits that changed since they were last journaled."""
+        for symbol, profit in self.total_profits.items():
+            if self._journaled_profits.get(symbol) != profit:
+                self.journal.record('profit', symbol=symbol, total_profit=profit)
+        self._journaled_profits = dict(self.total_profits)
+
+    def snapshot_symbols(self):
+        """Symbols whose ticks are taken with every cycle snapshot."""
+        symbols = set(self.symbol_settings)
+        symbols.add(self.selected_symbol)
+        return symbols
 
     def reset_total_profit_if_no_position(self):
         """If there are no open positions for a symbol, reset its total profit to zero and handle flag."""
+        snapshot = self.broker_snapshot()
         for symbol in self.symbol_settings:
-            positions = mt5.positions_get(symbol=symbol)
+            positions = snapshot.positions_for(symbol)
             if positions:
                 if not self.symbol_settings[symbol]['open_position_flag']:
                     self.symbol_settings[symbol]['open_position_flag'] = True
@@ -1700,10 +3332,11 @@ class TradingDashboard(QtWidgets.QWidget):
                     self.add_log(f"Total profit for {symbol} reset to zero as no open positions found, open_position_flag set to False.")
 
     def set_stop_loss_for_all_positions(self):
-        positions = mt5.positions_get()
-        for position in positions:
+        snapshot = self.broker_snapshot()
+        changes = []
+        for position in snapshot.positions:
             symbol = position.symbol
-            symbol_info = mt5.symbol_info(symbol)
+            symbol_info = snapshot.symbol_info(symbol)
             if symbol_info is None:
                 continue
 
@@ -1723,43 +3356,17 @@ class TradingDashboard(QtWidgets.QWidget):
             else:
                 continue
 
-            new_sl = round(new_sl, symbol_info.digits)
+            changes.append((position, round(new_sl, symbol_info.digits)))
 
-            request = {
-                "action": mt5.TRADE_ACTION_SLTP,
-                "position": position.ticket,
-                "sl": new_sl,
-                "comment": "Set Stop Loss"
-            }
+        if changes:
+            self.modify_sltp_many(changes, "Stop Loss", name="Set stop loss")
 
-            if position.tp > 0:
-                request["tp"] = position.tp
-
-            request["symbol"] = position.symbol
-            request["type"] = position.type
-
-            result = mt5.order_send(request)
-            if result.retcode == mt5.TRADE_RETCODE_DONE:
-                self.add_log(f"Stop loss set for {symbol}, ticket {position.ticket}")
-            else:
-                self.add_log(f"Failed to set stop loss for {symbol}, ticket {position.ticket}: {result.comment}")
-
-    def add_symbol(self):
-        symbol = self.symbol_combobox.currentText()
-        commission = self.commission_entry.value()
-        tp1 = self.tp1_entry.value()
-        tp2 = self.tp2_entry.value()
-        R1 = self.R1_entry.value()
-        R2 = self.R2_entry.value()
-        R3 = self.R3_entry.value()
-
-        if symbol not in self.symbol_settings:
+    def add_symbol(self, symbol, commission, tp1, tp2, R1, R2, R3):
+        new_symbol = symbol not in self.symbol_settings
+        if new_symbol:
             self.symbol_settings[symbol] = {}
-        # Ensure that loss_threshold_entry is always set
-        loss_threshold_entry = self.symbol_settings[symbol].get('loss_threshold_entry', 0.0)
-
-        # Get the value from the loss_threshold_entry
-        loss_threshold_entry_value = loss_threshold_entry
+        # Keep the loss threshold already applied to the symbol
+        loss_threshold = self.symbol_settings[symbol].get('loss_threshold', 0.0)
 
         # Update symbol settings
         self.symbol_settings[symbol].update({
@@ -1772,329 +3379,147 @@ class TradingDashboard(QtWidgets.QWidget):
             'open_position_flag': False,
             'use_pivot': False,  # Default: don't use pivot prices
             'allow_new_trade': False,  # Default: don't allow new trades if there's an open trade
-            'loss_threshold': loss_threshold_entry_value
+            'loss_threshold': loss_threshold
         })
 
+        if new_symbol:
+            # Same defaults as the symbol's entries in the dashboard until they are applied with Update
+            self.symbol_settings[symbol].update({
+                'risk': 0.0,
+                'distance': 0.0,
+                'volume': 0.01,
+                'martingale_multiplier': 1.0,
+                'sl_adjust': 0.0
+            })
+            self.entry_triggers.place(PriceTrigger((symbol, 'sell'), symbol, 'above'))
+            self.entry_triggers.place(PriceTrigger((symbol, 'buy'), symbol, 'below'))
+
+        self.update_entry_levels(symbol)
+        self.tick_stream.subscribe([symbol])
         self.add_log(f"Symbol {symbol} settings added/updated: {self.symbol_settings[symbol]}")
 
-        if symbol not in self.manual_trade_buttons:
-            # Create manual trade buttons for the new symbol
-            symbol_layout = QtWidgets.QHBoxLayout()
-            symbol_layout.setSpacing(5)
+    def update_symbol_settings(self, symbol, values):
+        settings = self.symbol_settings[symbol]
+        settings.update(values)
 
-            label = QtWidgets.QLabel(symbol, self)
-            symbol_layout.addWidget(label)
+        # Arm the entries again at the new levels
+        self.update_entry_levels(symbol)
+        self.entry_triggers.arm((symbol, 'sell'))
+        self.entry_triggers.arm((symbol, 'buy'))
 
-            # Spacer for proper alignment
-            spacer_item_1 = QtWidgets.QSpacerItem(
-                1000, 15, QtWidgets.QSizePolicy.Policy.Expanding, QtWidgets.QSizePolicy.Policy.Minimum
-            )
-            symbol_layout.addItem(spacer_item_1)
-
-            # Toggle Pivot usage button
-            pivot_toggle_button = QtWidgets.QPushButton("Use Pivot: Off", self)
-            pivot_toggle_button.setCheckable(True)
-            pivot_toggle_button.setChecked(False)
-            pivot_toggle_button.setStyleSheet("background-color: red; color: white;")
-            pivot_toggle_button.clicked.connect(lambda _, s=symbol: self.toggle_pivot_usage(s))
-            symbol_layout.addWidget(pivot_toggle_button)
-            # Store the button reference
-            self.symbol_settings[symbol]['pivot_toggle_button'] = pivot_toggle_button
-
-            # Allow new trades button
-            allow_new_trade_button = QtWidgets.QPushButton("Allow New Trade: Off", self)
-            allow_new_trade_button.setCheckable(True)
-            allow_new_trade_button.setChecked(False)
-            allow_new_trade_button.setStyleSheet("background-color: red; color: white;")
-            allow_new_trade_button.clicked.connect(lambda _, s=symbol: self.toggle_new_trade_permission(s))
-            symbol_layout.addWidget(allow_new_trade_button)
-            # Store the button reference
-            self.symbol_settings[symbol]['allow_new_trade_button'] = allow_new_trade_button
-
-            self.manual_trade_buttons[symbol] = symbol_layout
-            self.manual_trade_layout.addLayout(symbol_layout)
-
-            # Add new fields for risk and price distance
-            risk_label = QtWidgets.QLabel("Risk (%):", self)
-            symbol_layout.addWidget(risk_label)
-
-            risk_entry = QtWidgets.QLineEdit(self)
-            risk_entry.setText("0.00")  # Default to zero risk for static lot size
-            risk_entry.setMaximumWidth(60)
-            symbol_layout.addWidget(risk_entry)
-
-            distance_label = QtWidgets.QLabel("Distance:", self)
-            symbol_layout.addWidget(distance_label)
-
-            distance_entry = QtWidgets.QLineEdit(self)
-            distance_entry.setText("0.0")  # Default to zero distance
-            distance_entry.setMaximumWidth(60)
-            symbol_layout.addWidget(distance_entry)
-
-            # Existing manual trade entries (lot size, martingale multiplier, etc.)
-            volume_label = QtWidgets.QLabel("Lot Size:", self)
-            symbol_layout.addWidget(volume_label)
-
-            volume_entry = QtWidgets.QLineEdit(self)
-            volume_entry.setText("0.01")
-            volume_entry.setMaximumWidth(60)
-            symbol_layout.addWidget(volume_entry)
-
-            # Spacer for proper alignment
-            spacer_item_2 = QtWidgets.QSpacerItem(
-                10, 15, QtWidgets.QSizePolicy.Policy.Expanding, QtWidgets.QSizePolicy.Policy.Minimum
-            )
-            symbol_layout.addItem(spacer_item_2)
+        self.add_log(f"Settings updated for {symbol}: {settings}")
 
-            martingale_label = QtWidgets.QLabel("Martingale Multiplier:", self)
-            symbol_layout.addWidget(martingale_label)
+    def update_entry_levels(self, symbol):
+        """Move the symbol's entry triggers to its buy/sell prices, or to the pivots when it uses them."""
+        settings = self.symbol_settings[symbol]
+        if settings['use_pivot']:
+            buy_price = last_pivot_low_value
+            sell_price = last_pivot_high_value
+        else:
+            buy_price = settings.get('buy_price', 0)
+            sell_price = settings.get('sell_price', 0)
+
+        spec = self.symbol_catalog.get(symbol)
+        sell_level = buy_level = None
+        if spec is not None:
+            # Entries are taken 40 points before the price is reached
+            if sell_price and sell_price > 0:
+                sell_level = sell_price - spec.entry_offset
+            if buy_price and buy_price > 0:
+                buy_level = buy_price + spec.entry_offset
+        self.entry_triggers.get((symbol, 'sell')).data = sell_price
+        self.entry_triggers.get((symbol, 'buy')).data = buy_price
+        self.entry_triggers.set_level((symbol, 'sell'), sell_level)
+        self.entry_triggers.set_level((symbol, 'buy'), buy_level)
+
+    def ticks_changed(self, symbols):
+        """Called from the tick stream thread, wakes the engine once for all symbols that ticked meanwhile."""
+        with self._ticked_lock:
+            wake = not self._ticked_symbols
+            self._ticked_symbols.update(symbols)
+        if wake:
+            self.submit('process_ticks')
+
+    def process_ticks(self):
+        with self._ticked_lock:
+            symbols, self._ticked_symbols = self._ticked_symbols, set()
+        if not self.trading_stopped:
+            self.check_price_conditions(symbols)
 
-            martingale_entry = QtWidgets.QLineEdit(self)
-            martingale_entry.setText("1.0")  # Default multiplier
-            martingale_entry.setMaximumWidth(60)
-            symbol_layout.addWidget(martingale_entry)
+    def check_price_conditions(self, symbols=None):
+        """Enter at the buy and sell levels the price of the given symbols reached, all configured symbols by default."""
+        if not self.entries_allowed:
+            return
+        for symbol in (self.symbol_settings if symbols is None else symbols):
+            if symbol not in self.symbol_settings:
+                continue
 
-            # Add new field for loss threshold
-            loss_threshold_label = QtWidgets.QLabel("Close Loss (%):", self)
-            loss_threshold_label.setAlignment(
-                QtCore.Qt.AlignmentFlag.AlignRight | QtCore.Qt.AlignmentFlag.AlignVCenter
-            )
-            symbol_layout.addWidget(loss_threshold_label)
-
-            loss_threshold_entry = QtWidgets.QDoubleSpinBox(self)
-            loss_threshold_entry.setValue(0.0)
-            loss_threshold_entry.setDecimals(2)
-            loss_threshold_entry.setSingleStep(0.1)
-            loss_threshold_entry.setMaximum(120.0)
-            loss_threshold_entry.setFixedWidth(100)
-            loss_threshold_entry.setSizePolicy(
-                QtWidgets.QSizePolicy.Policy.Fixed, QtWidgets.QSizePolicy.Policy.Fixed
-            )
-            loss_threshold_entry.setToolTip("Close position if loss percentage exceeds this value")
-            symbol_layout.addWidget(loss_threshold_entry)
-
-            # Add new fields for Sell Price and Buy Price
-            sell_price_label = QtWidgets.QLabel("Sell Price:", self)
-            symbol_layout.addWidget(sell_price_label)
-
-            sell_price_entry = QtWidgets.QLineEdit(self)
-            sell_price_entry.setText("100000.0")  # Default to zero, meaning no action
-            sell_price_entry.setMaximumWidth(100)
-            sell_price_entry.setFixedWidth(85)
-            symbol_layout.addWidget(sell_price_entry)
-
-            buy_price_label = QtWidgets.QLabel("Buy Price:", self)
-            symbol_layout.addWidget(buy_price_label)
-
-            buy_price_entry = QtWidgets.QLineEdit(self)
-            buy_price_entry.setText("0.0")  # Default to zero, meaning no action
-            buy_price_entry.setMaximumWidth(100)
-            buy_price_entry.setFixedWidth(85)
-            symbol_layout.addWidget(buy_price_entry)
-
-            sl_adjust_label = QtWidgets.QLabel("SL Adjust (Points):", self)
-            symbol_layout.addWidget(sl_adjust_label)
-
-            sl_adjust_entry = QtWidgets.QLineEdit(self)
-            sl_adjust_entry.setText("0.0")  # Default to zero
-            sl_adjust_entry.setMaximumWidth(100)
-            sl_adjust_entry.setFixedWidth(85)
-            symbol_layout.addWidget(sl_adjust_entry)
-
-            # Store the entry in symbol_settings
-            self.symbol_settings[symbol]['sl_adjust_entry'] = sl_adjust_entry
-
-            # Store entries in symbol settings
-            self.symbol_settings[symbol]['risk_entry'] = risk_entry
-            self.symbol_settings[symbol]['distance_entry'] = distance_entry
-            self.symbol_settings[symbol]['volume_entry'] = volume_entry
-            self.symbol_settings[symbol]['martingale_entry'] = martingale_entry
-            self.symbol_settings[symbol]['sell_price_entry'] = sell_price_entry
-            self.symbol_settings[symbol]['buy_price_entry'] = buy_price_entry
-            self.symbol_settings[symbol]['loss_threshold_entry'] = loss_threshold_entry
-
-            # Initialize trade executed flags
-            self.symbol_settings[symbol]['sell_trade_executed'] = False
-            self.symbol_settings[symbol]['buy_trade_executed'] = False
-
-            # Add an "Update" button
-            update_button = QtWidgets.QPushButton("Update", self)
-            update_button.setStyleSheet("background-color: grey; color: white;")
-            update_button.setMaximumWidth(80)
-            update_button.clicked.connect(
-                lambda _, s=symbol: self.update_symbol_settings(s)
-            )
-            symbol_layout.addWidget(update_button)
+            # Streamed tick when there is one, the snapshot's in a cycle before the first poll
+            tick = self.tick_stream.last(symbol)
+            if tick is None and self.snapshot is not None:
+                tick = self.snapshot.tick(symbol)
+            current_bid = tick.bid if tick else None
 
-            # Spacer for proper alignment before buttons
-            spacer_item_4 = QtWidgets.QSpacerItem(
-                10, 15, QtWidgets.QSizePolicy.Policy.Expanding, QtWidgets.QSizePolicy.Policy.Minimum
-            )
-            symbol_layout.addItem(spacer_item_4)
-
-            # Manual trade buttons
-            sell_button = QtWidgets.QPushButton("Sell", self)
-            sell_button.setStyleSheet("background-color: red; color: white;")
-            sell_button.clicked.connect(
-                lambda _, s=symbol: self.manual_trade(
-                    s, "Sell", self.symbol_settings[s]['risk_entry'], self.symbol_settings[s]['distance_entry'],
-                    self.symbol_settings[s]['volume_entry'], self.symbol_settings[s]['martingale_entry']
-                )
-            )
-            sell_button.setMaximumWidth(100)
-            symbol_layout.addWidget(sell_button)
-
-            buy_button = QtWidgets.QPushButton("Buy", self)
-            buy_button.setStyleSheet("background-color: green; color: white;")
-            buy_button.clicked.connect(
-                lambda _, s=symbol: self.manual_trade(
-                    s, "Buy", self.symbol_settings[s]['risk_entry'], self.symbol_settings[s]['distance_entry'],
-                    self.symbol_settings[s]['volume_entry'], self.symbol_settings[s]['martingale_entry']
-                )
-            )
-            buy_button.setMaximumWidth(100)
-            symbol_layout.addWidget(buy_button)
-
-            reverse_button = QtWidgets.QPushButton("Reverse", self)
-            reverse_button.setStyleSheet("background-color: purple; color: white;")
-            reverse_button.clicked.connect(
-                lambda _, s=symbol: self.manual_reverse(
-                    s, self.symbol_settings[s]['risk_entry'], self.symbol_settings[s]['distance_entry'],
-                    self.symbol_settings[s]['volume_entry'], self.symbol_settings[s]['martingale_entry']
-                )
-            )
-            reverse_button.setMaximumWidth(100)
-            symbol_layout.addWidget(reverse_button)
+            if not current_bid:  # Handling case where the current bid is missing
+                self.add_log(f"Error: Could not retrieve current price for {symbol}")
+                continue
 
-            self.manual_trade_buttons[symbol] = symbol_layout
-            self.manual_trade_layout.addLayout(symbol_layout)
+            for trigger in self.entry_triggers.check(symbol, current_bid):
+                self.enter_at_level(symbol, "Sell" if trigger.key[1] == 'sell' else "Buy", current_bid, trigger.data)
 
-    def update_symbol_settings(self, symbol):
-        settings = self.symbol_settings[symbol]
-        try:
-            # Read values from input fields
-            settings['sell_price'] = float(settings['sell_price_entry'].text())
-            settings['buy_price'] = float(settings['buy_price_entry'].text())
-            settings['risk'] = float(settings['risk_entry'].text())
-            settings['distance'] = float(settings['distance_entry'].text())
-            settings['volume'] = float(settings['volume_entry'].text())
-            settings['martingale_multiplier'] = float(settings['martingale_entry'].text())
-            settings['loss_threshold'] = settings['loss_threshold_entry'].value()
-            settings['sl_adjust'] = float(settings['sl_adjust_entry'].text())
-
-            # Reset trade executed flags
-            settings['sell_trade_executed'] = False
-            settings['buy_trade_executed'] = False
-
-            self.add_log(f"Settings updated for {symbol}: {settings}")
-        except ValueError as e:
-            self.add_log(f"Invalid input for {symbol}: {e}")
-
-    def check_price_conditions(self):
-        global last_pivot_high_value, last_pivot_low_value
+    def disarm_entries(self):
+        """Outside trading hours and around news the entry levels are disarmed until they are updated again."""
         for symbol in self.symbol_settings:
-            settings = self.symbol_settings[symbol]
+            self.entry_triggers.disarm((symbol, 'sell'))
+            self.entry_triggers.disarm((symbol, 'buy'))
 
-            if settings['use_pivot']:
-                buy_price = last_pivot_low_value
-                sell_price = last_pivot_high_value
-            else:
-                buy_price = settings.get('buy_price', 0)
-                sell_price = settings.get('sell_price', 0)
+    def enter_at_level(self, symbol, direction, current_bid, price):
+        settings = self.symbol_settings[symbol]
+        if direction == "Sell":
+            self.add_log(f"Sell condition met for {symbol}: current bid {current_bid} >= sell price {price}")
+        else:
+            self.add_log(f"Buy condition met for {symbol}: current bid {current_bid} <= buy price {price}")
 
-            current_bid = mt5.symbol_info_tick(symbol).bid if mt5.symbol_info_tick(symbol) else None
-            positions = mt5.positions_get(symbol=symbol)
-            symbol_info = mt5.symbol_info(symbol)
-            
-            if not current_bid or not symbol_info:  # Handling case where symbol info or current bid is missing
-                self.add_log(f"Error: Could not retrieve current price for {symbol}")
-                continue
-            
-            digits = symbol_info.digits
-            
-            # Check if we already have an open Buy or Sell position
-            has_buy_position = any(pos.type == mt5.ORDER_TYPE_BUY for pos in positions)
-            has_sell_position = any(pos.type == mt5.ORDER_TYPE_SELL for pos in positions)
-            
-            # Sell condition
-            if self.check_trading_hours() and self.manage_trades_around_news():
-                if sell_price > 0 and current_bid >= sell_price - (40 / 10 ** digits) and not settings['sell_trade_executed']:
-                    self.add_log(f"Sell condition met for {symbol}: current bid {current_bid} >= sell price {sell_price}")
-                    if positions and len(positions) > 0:
-                        if not has_sell_position:  # Check if no Sell position is open
-                            if settings['allow_new_trade']:
-                                for pos in positions:
-                                    self.close_position(pos)
-                                self.add_log(f"Closed previous trades for {symbol}. Now checking conditions for new trade.")
-                                self.manual_trade(symbol, 'Sell', settings['risk_entry'], settings['distance_entry'], settings['volume_entry'], settings['martingale_entry'])
-                                settings['sell_trade_executed'] = True
-                            else:
-                                self.add_log(f"Trade already open for {symbol}. No new trade opened.")
-                                settings['sell_trade_executed'] = True
-                                return
-                        else:
-                            self.add_log(f"Sell position already exists for {symbol}. No new Sell trade opened.")
-                            settings['sell_trade_executed'] = True
-                            return
-                    else:
-                        self.manual_trade(symbol, 'Sell', settings['risk_entry'], settings['distance_entry'], settings['volume_entry'], settings['martingale_entry'])
-                        settings['sell_trade_executed'] = True
-                        return
-                
-                # Buy condition
-                if buy_price > 0 and current_bid <= buy_price + (40 / 10 ** digits) and not settings['buy_trade_executed']:
-                    self.add_log(f"Buy condition met for {symbol}: current bid {current_bid} <= buy price {buy_price}")
-                    if positions and len(positions) > 0:
-                        if not has_buy_position:  # Check if no Buy position is open
-                            if settings['allow_new_trade']:
-                                for pos in positions:
-                                    self.close_position(pos)
-                                self.add_log(f"Closed previous trades for {symbol}. Now checking conditions for new trade.")
-                                self.manual_trade(symbol, 'Buy', settings['risk_entry'], settings['distance_entry'], settings['volume_entry'], settings['martingale_entry'])
-                                settings['buy_trade_executed'] = True
-                            else:
-                                self.add_log(f"Trade already open for {symbol}. No new trade opened.")
-                                settings['buy_trade_executed'] = True
-                                return
-                        else:
-                            self.add_log(f"Buy position already exists for {symbol}. No new Buy trade opened.")
-                            settings['buy_trade_executed'] = True
-                            return
-                    else:
-                        self.manual_trade(symbol, 'Buy', settings['risk_entry'], settings['distance_entry'], settings['volume_entry'], settings['martingale_entry'])
-                        settings['buy_trade_executed'] = True
-                        return
+        positions = self.position_store.for_symbol(symbol)
+        side = mt5.ORDER_TYPE_SELL if direction == "Sell" else mt5.ORDER_TYPE_BUY
+        if positions:
+            if not self.position_store.for_symbol(symbol, side):  # Check if no position in this direction is open
+                if settings['allow_new_trade']:
+                    for pos in positions:
+                        self.close_position(pos)
+                    self.add_log(f"Closed previous trades for {symbol}. Now checking conditions for new trade.")
+                    self.manual_trade(symbol, direction, settings['risk'], settings['distance'], settings['volume'], settings['martingale_multiplier'])
+                else:
+                    self.add_log(f"Trade already open for {symbol}. No new trade opened.")
             else:
-                if not settings['buy_trade_executed']:
-                    settings['buy_trade_executed'] = True
-                if not settings['sell_trade_executed']:
-                    settings['sell_trade_executed'] = True
+                self.add_log(f"{direction} position already exists for {symbol}. No new {direction} trade opened.")
+        else:
+            self.manual_trade(symbol, direction, settings['risk'], settings['distance'], settings['volume'], settings['martingale_multiplier'])
 
     def update_buy_sell_price_labels(self):
-        symbol = self.symbol_combobox.currentText()
+        symbol = self.selected_symbol
         if symbol:
             settings = self.symbol_settings.get(symbol, {})
-            symbol_info = mt5.symbol_info(symbol)
-            digits = symbol_info.digits
-            
+            symbol_info = self.broker_snapshot().symbol_info(symbol)
+            if symbol_info is None:
+                # The terminal does not know the symbol, there is no price to show
+                self.labels['buy_price'] = f"Buy Price ({symbol}): N/A"
+                self.labels['sell_price'] = f"Sell Price ({symbol}): N/A"
+                return
+
             if settings.get('use_pivot', False):
-                buy_price = last_pivot_low_value + (40 / 10 ** digits)
-                sell_price = last_pivot_high_value - (40 / 10 ** digits)
-            else:
-                buy_price = settings.get('buy_price', 0) + (40 / 10 ** digits)
-                sell_price = settings.get('sell_price', 100000) - (40 / 10 ** digits)
-            symbol_info = mt5.symbol_info(symbol)
-            if symbol_info:
-                digits = symbol_info.digits
-                # Round the prices according to the symbol's digits
-                buy_price_formatted = f"{float(buy_price):.{digits}f}" if isinstance(buy_price, (int, float)) else buy_price
-                sell_price_formatted = f"{float(sell_price):.{digits}f}" if isinstance(sell_price, (int, float)) else sell_price
+                buy_price = last_pivot_low_value + symbol_info.entry_offset
+                sell_price = last_pivot_high_value - symbol_info.entry_offset
             else:
-                buy_price_formatted = buy_price
-                sell_price_formatted = sell_price
+                buy_price = settings.get('buy_price', 0) + symbol_info.entry_offset
+                sell_price = settings.get('sell_price', 100000) - symbol_info.entry_offset
+            # Round the prices according to the symbol's digits
+            digits = symbol_info.digits
+            buy_price_formatted = f"{float(buy_price):.{digits}f}" if isinstance(buy_price, (int, float)) else buy_price
+            sell_price_formatted = f"{float(sell_price):.{digits}f}" if isinstance(sell_price, (int, float)) else sell_price
             # Update labels
-            self.buy_price_label.setText(f"Buy Price ({symbol}): {buy_price_formatted}")
-            self.sell_price_label.setText(f"Sell Price ({symbol}): {sell_price_formatted}")
+            self.labels['buy_price'] = f"Buy Price ({symbol}): {buy_price_formatted}"
+            self.labels['sell_price'] = f"Sell Price ({symbol}): {sell_price_formatted}"
         else:
             self.add_log("No symbol selected in the combobox")
 
@@ -2104,9 +3529,8 @@ class TradingDashboard(QtWidgets.QWidget):
             settings = self.symbol_settings[symbol]
 
             if settings['use_pivot']:
-                url = "http://127.0.0.1:5000/receive_pivot_data"  # Local Flask server URL
                 try:
-                    response = requests.get(url)
+                    response = http_client.get('pivot')
                     if response.status_code == 200:
                         data = response.json()
 
@@ -2115,57 +3539,43 @@ class TradingDashboard(QtWidgets.QWidget):
 
                         if new_pivot_high != last_pivot_high_value:
                             last_pivot_high_value = new_pivot_high
-                            settings['sell_trade_executed'] = False  
-                            self.add_log(f"Pivot high for {symbol} updated to {new_pivot_high}. Reset sell_trade_executed flag.")
+                            self.update_pivot_entry_levels()
+                            self.entry_triggers.arm((symbol, 'sell'))
+                            self.add_log(f"Pivot high for {symbol} updated to {new_pivot_high}. Sell entry armed again.")
                         
                         if new_pivot_low != last_pivot_low_value:
                             last_pivot_low_value = new_pivot_low
-                            settings['buy_trade_executed'] = False
-                            self.add_log(f"Pivot low for {symbol} updated to {new_pivot_low}. Reset buy_trade_executed flag.")
+                            self.update_pivot_entry_levels()
+                            self.entry_triggers.arm((symbol, 'buy'))
+                            self.add_log(f"Pivot low for {symbol} updated to {new_pivot_low}. Buy entry armed again.")
                         
                     else:
                         self.add_log(f"Failed to get pivot data. Status code: {response.status_code}")
                 except Exception as e:
                     self.add_log(f"Error fetching pivot data: {e}")
 
-    def toggle_pivot_usage(self, symbol):
-        """Toggle the use of pivot prices for the given symbol."""
-        settings = self.symbol_settings[symbol]
-        settings['use_pivot'] = not settings['use_pivot']
-        status = "On" if settings['use_pivot'] else "Off"
-        self.add_log(f"Pivot usage for {symbol} set to {status}")
-        # Update the button appearance
-        pivot_button = settings.get('pivot_toggle_button')
-        if pivot_button:
-            pivot_button.setText(f"Use Pivot: {status}")
+    def update_pivot_entry_levels(self):
+        for symbol, settings in self.symbol_settings.items():
             if settings['use_pivot']:
-                pivot_button.setStyleSheet("background-color: green; color: white;")
-            else:
-                pivot_button.setStyleSheet("background-color: red; color: white;")
+                self.update_entry_levels(symbol)
 
-    def toggle_new_trade_permission(self, symbol):
-        """Toggle whether new trades can be opened when an existing trade is open."""
-        settings = self.symbol_settings[symbol]
-        settings['allow_new_trade'] = not settings['allow_new_trade']
-        status = "On" if settings['allow_new_trade'] else "Off"
-        self.add_log(f"New trades permission for {symbol} set to {status}")
-        # Update the button appearance
-        new_trade_button = settings.get('allow_new_trade_button')
-        if new_trade_button:
-            new_trade_button.setText(f"Allow New Trade: {status}")
-            if settings['allow_new_trade']:
-                new_trade_button.setStyleSheet("background-color: green; color: white;")
-            else:
-                new_trade_button.setStyleSheet("background-color: red; color: white;")
+    def set_pivot_usage(self, symbol, enabled):
+        """Switch the symbol between its own buy/sell prices and the pivot prices."""
+        self.symbol_settings[symbol]['use_pivot'] = enabled
+        self.update_entry_levels(symbol)
+        self.add_log(f"Pivot usage for {symbol} set to {'On' if enabled else 'Off'}")
 
-    def manual_trade(self, symbol, direction, risk_entry, distance_entry, volume_entry, martingale_entry):
+    def set_new_trade_permission(self, symbol, enabled):
+        """Set whether new trades can be opened when an existing trade is open."""
+        self.symbol_settings[symbol]['allow_new_trade'] = enabled
+        self.add_log(f"New trades permission for {symbol} set to {'On' if enabled else 'Off'}")
+
+    def manual_trade(self, symbol, direction, risk, distance_price, volume, martingale_multiplier, open_id=None):
         try:
-            balance = mt5.account_info().equity
-            contract_size = mt5.symbol_info(symbol).trade_contract_size
-            risk = float(risk_entry.text())
-            distance_price = float(distance_entry.text())
-            volume = float(volume_entry.text())
-            martingale_multiplier = float(martingale_entry.text())
+            snapshot = self.broker_snapshot(symbol=symbol)
+            balance = snapshot.equity
+            symbol_info = snapshot.symbol_info(symbol)
+            contract_size = symbol_info.trade_contract_size
 
             if risk > 0 and distance_price > 0 and contract_size > 0:
                 lot = balance * (risk / 100) / (distance_price * contract_size)
@@ -2174,26 +3584,24 @@ class TradingDashboard(QtWidgets.QWidget):
                 lot = volume  # Use static lot size if risk is zero
 
             adjusted_lot = round(lot, 2)
-            if adjusted_lot < mt5.symbol_info(symbol).volume_min:
-                adjusted_lot = mt5.symbol_info(symbol).volume_min
+            if adjusted_lot < symbol_info.volume_min:
+                adjusted_lot = symbol_info.volume_min
                 self.add_log(f"Adjusted lot size is below minimum. Set to minimum lot size: {adjusted_lot}")
 
-            self.open_position(symbol, adjusted_lot, direction)
+            self.open_position(symbol, adjusted_lot, direction, open_id)
             self.add_log(f"Manual {direction} trade executed for {symbol} with adjusted lot size {adjusted_lot}")
             self.total_profits[symbol] = 0
         except Exception as e:
             self.add_log(f"Error in manual_trade: {e}")
 
-    def manual_reverse(self, symbol, risk_entry, distance_entry, volume_entry, martingale_entry):
+    def manual_reverse(self, symbol, risk, distance_price, volume, martingale_multiplier):
         try:
-            position = next((pos for pos in mt5.positions_get(symbol=symbol)), None)
+            snapshot = self.broker_snapshot(symbol=symbol)
+            position = next((pos for pos in snapshot.positions_for(symbol)), None)
             if position:
-                balance = mt5.account_info().equity
-                contract_size = mt5.symbol_info(symbol).trade_contract_size
-                risk = float(risk_entry.text())
-                distance_price = float(distance_entry.text())
-                volume = float(volume_entry.text())
-                martingale_multiplier = float(martingale_entry.text())
+                balance = snapshot.equity
+                symbol_info = snapshot.symbol_info(symbol)
+                contract_size = symbol_info.trade_contract_size
 
                 if risk > 0 and distance_price > 0 and contract_size > 0:
                     lot = balance * (risk / 100) / (distance_price * contract_size)
@@ -2202,8 +3610,8 @@ class TradingDashboard(QtWidgets.QWidget):
                     lot = volume  # Use static lot size if risk is zero
 
                 adjusted_volume = round(lot * martingale_multiplier, 2)
-                if adjusted_volume < mt5.symbol_info(symbol).volume_min:
-                    adjusted_volume = mt5.symbol_info(symbol).volume_min
+                if adjusted_volume < symbol_info.volume_min:
+                    adjusted_volume = symbol_info.volume_min
 
                 direction = "Sell" if position.type == mt5.ORDER_TYPE_BUY else "Buy"
                 symbol_settings = self.symbol_settings.get(symbol, {'commission': self.commission})
@@ -2221,53 +3629,2529 @@ class TradingDashboard(QtWidgets.QWidget):
         except Exception as e:
             self.add_log(f"Error in manual_reverse: {e}")
 
-    def add_log(self, message):
-        timestamp = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-        self.log_display.appendPlainText(f"{timestamp}: {message}")
+    def add_log(self, message, journal=True):
+        timestamp = self.now().strftime('%Y-%m-%d %H:%M:%S')
+        if journal:
+            self.journal.record('log', text=message)
+        self.event_queue.put(LogEvent(f"{timestamp}: {message}"))
+
+class EngineApiServer:
+    """Local HTTP API of a headless engine, which any number of dashboards can attach to.
+
+    POST /command with {"name": ..., "args": [...]} queues one of the engine's remote_commands.
+    GET /events?after=<seq> returns the log lines published after seq together with the latest
+    state, settings and readiness, so attached dashboards follow the engine by polling. GET /metrics serves
+    the hot path metrics in the Prometheus text format. The server is the only reader of the
+    engine's event queue and echoes every log line to log.
+    """
+
+    def __init__(self, engine, address, log=print, max_lines=log_display_lines):
+        self.engine = engine
+        self.address = address
+        self.log = log
+        self.lines = deque(maxlen=max_lines)  # (seq, text) of the latest log lines
+        self.state = None  # (seq, StateEvent JSON) of the latest state
+        self.settings = None  # (seq, EngineSettings JSON) of the latest settings
+        self.readiness = None  # (seq, Readiness JSON) of the latest readiness
+        self.seq = 0
+        self.server = None
+        self._running = False
+        self._lock = threading.Lock()
+
+    def start(self):
+        api = self
+
+        class ApiHandler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                parts = urlsplit(self.path)
+                if parts.path == '/metrics':
+                    send_metrics(self)
+                    return
+                if parts.path != '/events':
+                    self.reply(404, {'error': f"Unknown path {parts.path}"})
+                    return
+                try:
+                    after = int(parse_qs(parts.query).get('after', ['0'])[0])
+                except ValueError:
+                    self.reply(400, {'error': "after must be an integer"})
+                    return
+                self.reply(200, api.events_after(after))
 
-    def closeEvent(self, event):
-        # Step 1: Remove all pending orders
+            def do_POST(self):
+                if urlsplit(self.path).path != '/command':
+                    self.reply(404, {'error': f"Unknown path {self.path}"})
+                    return
+                try:
+                    command = json.loads(self.rfile.read(int(self.headers.get('Content-Length', 0))))
+                    name, args = command['name'], list(command.get('args', []))
+                except (ValueError, KeyError, TypeError, AttributeError):
+                    self.reply(400, {'error': "Expected {\"name\": ..., \"args\": [...]}"})
+                    return
+                if name not in api.engine.remote_commands:
+                    self.reply(403, {'error': f"Command {name} is not allowed"})
+                    return
+                api.engine.submit(name, *args)
+                self.reply(202, {'queued': name})
+
+            def reply(self, status, payload):
+                body = json.dumps(payload).encode('utf-8')
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(self.address, ApiHandler)
+        self._running = True
+        threading.Thread(target=self.pump, name="EngineApiPump", daemon=True).start()
+        threading.Thread(target=self.server.serve_forever, name="EngineApi", daemon=True).start()
+
+    def stop(self):
+        self._running = False
+        if self.server is not None:
+            self.server.shutdown()
+            self.server.server_close()
+            self.server = None
+
+    def pump(self):
+        """Move the engine's events into the buffers served to the dashboards."""
+        while self._running:
+            try:
+                event = self.engine.event_queue.get(timeout=0.5)
+            except queue.Empty:
+                continue
+            with self._lock:
+                self.seq += 1
+                if isinstance(event, LogEvent):
+                    self.lines.append((self.seq, event.text))
+                elif isinstance(event, StateEvent):
+                    self.state = (self.seq, event.to_json())
+                elif isinstance(event, EngineSettings):
+                    self.settings = (self.seq, {'values': event.values, 'symbols': event.symbols})
+                elif isinstance(event, Readiness):
+                    self.readiness = (self.seq, {'subsystems': event.subsystems, 'account_login': event.account_login})
+            if isinstance(event, LogEvent):
+                self.log(event.text)
+
+    def events_after(self, after):
+        with self._lock:
+            return {
+                'seq': self.seq,
+                'lines': [text for seq, text in self.lines if seq > after],
+                'state': self.state[1] if self.state is not None and self.state[0] > after else None,
+                'settings': self.settings[1] if self.settings is not None and self.settings[0] > after else None,
+                'readiness': self.readiness[1] if self.readiness is not None and self.readiness[0] > after else None,
+            }
+
+def load_engine_config(path):
+    """Read an engine config file, JSON with optional 'terminal', 'mock', 'api_address', 'signal_address',
+    'settings' and 'symbols' keys.
+
+    'mock' configures a MockBroker that the engine trades instead of the terminal, see MockBroker.
+    'settings' holds engine attributes listed in TradingEngine.setting_commands, e.g. "auto_trading",
+    and 'symbols' maps every symbol to its settings as shown by the dashboard's symbol entries.
+    """
+    with open(path, 'r', encoding='utf-8') as file:
+        return json.load(file)
+
+def apply_engine_config(engine, config):
+    """Queue the commands that apply config to engine, a TradingEngine or a RemoteEngine."""
+    settings = config.get('settings', {})
+    for name, command in TradingEngine.setting_commands.items():
+        if command is not None and name in settings:
+            engine.submit(command, settings[name])
+
+    for symbol, values in config.get('symbols', {}).items():
+        values = dict(values)
+        # Settings the symbol does not set fall back to the engine defaults, as in the dashboard
+        defaults = [values.pop(name, settings.get(name, getattr(engine, name))) for name in ('commission', 'tp1', 'tp2', 'R1', 'R2', 'R3')]
+        use_pivot = values.pop('use_pivot', None)
+        allow_new_trade = values.pop('allow_new_trade', None)
+        engine.submit('add_symbol', symbol, *defaults)
+        if values:
+            engine.submit('update_symbol_settings', symbol, values)
+        if use_pivot is not None:
+            engine.submit('set_pivot_usage', symbol, use_pivot)
+        if allow_new_trade is not None:
+            engine.submit('set_new_trade_permission', symbol, allow_new_trade)
+
+class HeadlessEngine:
+    """The trading engine without a dashboard or QApplication, configured from a config dict.
+
+    The config's 'terminal' selects the MT5 terminal and account, which the engine connects in the
+    background, or its 'mock' a MockBroker that posts its scenario's signals to the engine's signal
+    receiver. Its settings and symbols are applied once the engine has restored its saved state. Afterwards the engine is configured and
+    watched through its EngineApiServer. Log lines are printed to the console.
+    """
+
+    def __init__(self, config=None, log=print):
+        self.config = config or {}
+        signal_address = tuple(self.config.get('signal_address', signal_receiver_address))
+        mock = self.config.get('mock')
+        if mock is not None:
+            mock = {'signal_url': "http://{}:{}/{}".format(*signal_address, strategy_name), **mock}
+        self.broker = select_mt5_backend(mock)
+        self.engine = TradingEngine(signal_address, terminal=self.config.get('terminal'))
+        if self.broker is not None:
+            self.broker.log = self.engine.add_log
+        self.api = EngineApiServer(self.engine, tuple(self.config.get('api_address', engine_api_address)), log=log)
+
+    def submit(self, name, *args):
+        self.engine.submit(name, *args)
+
+    def start(self):
+        self.api.start()
+        self.engine.start()
+        apply_engine_config(self.engine, self.config)
+
+    def wait(self):
+        """Block until the engine has shut down, also when it was shut down over the API."""
+        while self.engine.is_alive():
+            self.engine.join(0.5)
+        self.api.stop()
+        if self.broker is not None:
+            self.broker.stop()
+
+    def stop(self, timeout=10):
+        self.engine.submit('shutdown')
+        self.engine.join(timeout)
+        self.api.stop()
+        if self.broker is not None:
+            self.broker.stop()
+
+class RemoteEngine:
+    """Stands in for the TradingEngine of a dashboard attached to a headless engine.
+
+    Commands are POSTed to the engine API and its events are polled into event_queue, so the
+    dashboard renders a remote engine exactly like one running in its own process.
+    """
+
+    poll_interval = 0.2
+
+    def __init__(self, address, timeout=(1, 5)):
+        self.base_url = f"http://{address[0]}:{address[1]}"
+        self.timeout = timeout
+        self.session = requests.Session()
+        self.event_queue = queue.Queue()
+        self.seq = 0
+        self._stopped = threading.Event()
+        self._thread = None
+
+    def attach(self, timeout=10):
+        """Fetch the engine's log and settings, raises requests.RequestException when it is unreachable."""
+        self.poll()
+        self.submit('publish_settings', raise_errors=True)
+        deadline = time.monotonic() + timeout
+        while True:
+            settings = self.poll()
+            if settings is not None:
+                break
+            if time.monotonic() > deadline:
+                raise requests.Timeout(f"The engine at {self.base_url} did not publish its settings")
+            time.sleep(self.poll_interval)
+
+        for name, value in settings['values'].items():
+            setattr(self, name, value)
+        self.event_queue.put(SymbolsRestored(settings['symbols']))
+        self.event_queue.put(LogEvent(f"Attached to the engine at {self.base_url}"))
+
+    def start(self):
+        self._thread = threading.Thread(target=self.run, name="RemoteEngine", daemon=True)
+        self._thread.start()
+
+    def run(self):
+        connected = True
+        while not self._stopped.wait(self.poll_interval):
+            try:
+                self.poll()
+                if not connected:
+                    self.event_queue.put(LogEvent(f"Reconnected to the engine at {self.base_url}"))
+                connected = True
+            except requests.RequestException as e:
+                if connected:
+                    self.event_queue.put(LogEvent(f"Lost the engine at {self.base_url}: {e}"))
+                connected = False
+
+    def poll(self):
+        """Queue the events published since the last poll and return the settings if they were published."""
+        response = self.session.get(f"{self.base_url}/events", params={'after': self.seq}, timeout=self.timeout)
+        response.raise_for_status()
+        payload = response.json()
+        if payload['seq'] < self.seq:
+            # The engine restarted, its sequence starts over
+            self.seq = 0
+            return self.poll()
+        self.seq = payload['seq']
+        for text in payload['lines']:
+            self.event_queue.put(LogEvent(text))
+        if payload['state'] is not None:
+            self.event_queue.put(StateEvent.from_json(payload['state']))
+        if payload.get('readiness') is not None:
+            self.event_queue.put(Readiness(**payload['readiness']))
+        return payload['settings']
+
+    def submit(self, name, *args, raise_errors=False):
         try:
-            orders = mt5.orders_get()
+            response = self.session.post(f"{self.base_url}/command", json={'name': name, 'args': list(args)}, timeout=self.timeout)
+            response.raise_for_status()
+        except requests.RequestException as e:
+            if raise_errors:
+                raise
+            self.event_queue.put(LogEvent(f"Failed to send {name} to the engine at {self.base_url}: {e}"))
+
+    def detach(self):
+        self._stopped.set()
+        if self._thread is not None:
+            self._thread.join(timeout=2)
+        self.session.close()
+
+
+class AccountWorker:
+    """The headless engine process of one account, started and watched by the Orchestrator."""
+
+    def __init__(self, name, config, index):
+        self.name = name
+        self.config = dict(config)
+        self.config.setdefault('api_address', ["127.0.0.1", orchestrator_first_port + 2 * index])
+        self.config.setdefault('signal_address', ["127.0.0.1", orchestrator_first_port + 2 * index + 1])
+        self.directory = self.config.pop('directory', os.getcwd())
+        # Signals for symbols the account does not trade are not sent to it, no symbols means all signals
+        self.symbols = set(self.config.get('symbols', {}))
+        self.api_url = "http://{}:{}".format(*self.config['api_address'])
+        self.signal_url = "http://{}:{}/{}".format(*self.config['signal_address'], strategy_name)
+        self.process = None
+        self.restarts = 0
+        self.started_at = None
+        self.restart_at = None  # Monotonic time of the next start after a crash
+        self.restart_delay = Orchestrator.restart_delay
+        self.seq = 0
+        self.summary = None  # Summary of the engine's latest state
+        self.undelivered = deque()  # (received_at, signal) the engine was not reachable for
+
+    def start(self):
+        os.makedirs(os.path.join(self.directory, journal_dir), exist_ok=True)
+        config_path = os.path.join(self.directory, f"engine {self.name}.json")
+        with open(config_path, 'w', encoding='utf-8') as file:
+            json.dump(self.config, file, indent=2)
+        output = open(os.path.join(self.directory, journal_dir, f"engine {self.name}.out"), 'a', encoding='utf-8')
+        try:
+            self.process = subprocess.Popen(
+                [sys.executable, "-u", os.path.abspath(__file__), '--headless', '--config', config_path],
+                cwd=self.directory, stdout=output, stderr=subprocess.STDOUT
+            )
+        finally:
+            output.close()
+        self.started_at = time.monotonic()
+        self.restart_at = None
+        self.seq = 0
+
+    @property
+    def alive(self):
+        return self.process is not None and self.process.poll() is None
+
+    def trades(self, symbol):
+        return not self.symbols or symbol in self.symbols
+
+class Orchestrator:
+    """Runs one headless engine process per account, with one signal endpoint and one view for all.
+
+    Every account keeps its own terminal, balance file, state store and journal in its engine process.
+    Signals pushed to the orchestrator are forwarded to the accounts listed in the signal's 'accounts',
+    or else to every account trading the signal's symbol. The engines' summaries are polled over their
+    APIs and served together with the totals on GET /status. An engine whose process exited is started
+    again after restart_delay seconds, doubling up to max_restart_delay while it keeps crashing.
+    """
+
+    poll_interval = 1.0  # Seconds between two polls of the engines' summaries
+    restart_delay = 2.0
+    max_restart_delay = 60.0
+    stable_after = 300.0  # Seconds an engine has to run before its restart delay is reset
+
+    def __init__(self, config, log=print):
+        self.log = log
+        self.workers = {name: AccountWorker(name, account, index) for index, (name, account) in enumerate(config['accounts'].items())}
+        self.receiver = SignalReceiver(tuple(config.get('signal_address', signal_receiver_address)), on_signal=self.wake)
+        self.api_address = tuple(config.get('api_address', engine_api_address))
+        self.session = requests.Session()
+        self.server = None
+        self.running = False
+        self._wake = threading.Event()
+        self._lock = threading.Lock()
+
+    def wake(self):
+        self._wake.set()
+
+    def start(self):
+        orchestrator = self
+
+        class StatusHandler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if urlsplit(self.path).path != '/status':
+                    self.send_error(404)
+                    return
+                body = json.dumps(orchestrator.status()).encode('utf-8')
+                self.send_response(200)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        for worker in self.workers.values():
+            worker.start()
+            self.log(f"Started the engine of {worker.name} (pid {worker.process.pid}), API on {worker.api_url}")
+        self.receiver.start()
+        self.server = ThreadingHTTPServer(self.api_address, StatusHandler)
+        threading.Thread(target=self.server.serve_forever, name="OrchestratorStatus", daemon=True).start()
+        self.running = True
+        self.log(f"Receiving signals on http://{self.receiver.address[0]}:{self.receiver.address[1]}, "
+                 f"status on http://{self.api_address[0]}:{self.api_address[1]}/status")
+
+    def run(self):
+        next_poll = time.monotonic()
+        while self.running:
+            self._wake.wait(max(0.0, next_poll - time.monotonic()))
+            self._wake.clear()
+            self.route_signals()
+            if time.monotonic() >= next_poll:
+                self.supervise()
+                self.poll_workers()
+                next_poll = time.monotonic() + self.poll_interval
+
+    def stop(self, timeout=10):
+        """Shut every engine down over its API and terminate the ones that do not exit in time."""
+        self.running = False
+        self.receiver.stop()
+        for worker in self.workers.values():
+            if worker.alive:
+                try:
+                    self.session.post(f"{worker.api_url}/command", json={'name': 'shutdown'}, timeout=(1, 2))
+                except requests.RequestException:
+                    worker.process.terminate()
+        deadline = time.monotonic() + timeout
+        for worker in self.workers.values():
+            if worker.process is None:
+                continue
+            try:
+                worker.process.wait(max(0.0, deadline - time.monotonic()))
+            except subprocess.TimeoutExpired:
+                self.log(f"The engine of {worker.name} did not shut down, terminating it")
+                worker.process.kill()
+        if self.server is not None:
+            self.server.shutdown()
+            self.server.server_close()
+            self.server = None
+
+    def route_signals(self):
+        for received_at, signal in self.receiver.drain():
+            targets = self.targets(signal)
+            if not targets:
+                self.log(f"No account trades the signal {signal}")
+            for worker in targets:
+                worker.undelivered.append((received_at, signal))
+
+        for worker in self.workers.values():
+            while worker.undelivered:
+                received_at, signal = worker.undelivered[0]
+                if time.monotonic() - received_at > signal_max_age:
+                    worker.undelivered.popleft()
+                    self.log(f"Dropping signal for {worker.name} older than {signal_max_age} seconds: {signal}")
+                    continue
+                try:
+                    self.session.post(worker.signal_url, json=signal, timeout=(0.5, 2)).raise_for_status()
+                except requests.RequestException:
+                    break  # Sent again once the engine is back
+                worker.undelivered.popleft()
+
+    def targets(self, signal):
+        accounts = signal.get('accounts')
+        if accounts is not None:
+            return [self.workers[name] for name in accounts if name in self.workers]
+        # Signal events look like "Trade|EURUSD.r,0.01,Buy"
+        parts = str(signal['event']).split('|')
+        symbol = parts[1].split(',')[0] if len(parts) > 1 else None
+        return [worker for worker in self.workers.values() if symbol is None or worker.trades(symbol)]
+
+    def supervise(self):
+        """Restart the engines whose process exited, waiting longer after each crash in a row."""
+        now = time.monotonic()
+        for worker in self.workers.values():
+            if worker.alive:
+                if now - worker.started_at > self.stable_after:
+                    worker.restart_delay = self.restart_delay
+                continue
+            if worker.restart_at is None:
+                worker.restart_at = now + worker.restart_delay
+                self.log(f"The engine of {worker.name} exited with code {worker.process.returncode}, "
+                         f"restarting it in {worker.restart_delay:g} s")
+                worker.restart_delay = min(worker.restart_delay * 2, self.max_restart_delay)
+            elif now >= worker.restart_at:
+                worker.start()
+                worker.restarts += 1
+                self.log(f"Restarted the engine of {worker.name} (pid {worker.process.pid})")
+
+    def poll_workers(self):
+        for worker in self.workers.values():
+            if not worker.alive:
+                continue
+            try:
+                response = self.session.get(f"{worker.api_url}/events", params={'after': worker.seq}, timeout=(0.5, 2))
+                response.raise_for_status()
+                payload = response.json()
+            except (requests.RequestException, ValueError):
+                continue  # Still starting up, or about to be restarted
+            worker.seq = payload['seq']
+            if payload['state'] is None:
+                continue
+            summary = payload['state']['summary']
+            reached = summary['trading_stopped'] and not (worker.summary or {}).get('trading_stopped')
+            with self._lock:
+                worker.summary = summary
+            if reached:
+                self.log(f"{worker.name} reached its daily profit target")
+
+    def status(self):
+        """Summary of every account and the totals over all accounts."""
+        with self._lock:
+            accounts = {
+                name: {'alive': worker.alive, 'restarts': worker.restarts, 'undelivered': len(worker.undelivered), **(worker.summary or {})}
+                for name, worker in self.workers.items()
+            }
+        summaries = [account for account in accounts.values() if 'balance' in account]
+        totals = {key: sum(account[key] for account in summaries) for key in ('balance', 'equity', 'real_profit', 'positions', 'target_equity')}
+        totals['accounts_at_target'] = sum(1 for account in summaries if account['trading_stopped'])
+        totals['accounts'] = len(accounts)
+        return {'accounts': accounts, 'totals': totals}
+
+
+SimTick = namedtuple('SimTick', 'time bid ask last volume time_msc')
+SimSymbolInfo = namedtuple('SimSymbolInfo', 'name digits point volume_min volume_max volume_step trade_contract_size trade_stops_level trade_freeze_level')
+SimPosition = namedtuple('SimPosition', 'ticket time type magic volume price_open sl tp price_current profit symbol comment')
+SimAccount = namedtuple('SimAccount', 'login balance equity profit margin margin_free leverage currency server')
+SimResult = namedtuple('SimResult', 'retcode deal order volume price bid ask comment request_id')
+
+replay_epoch = datetime(1970, 1, 1)  # Replayed times are naive seconds since this moment
+
+class SimulatedBroker(Mt5Constants):
+    """Stands in for the MetaTrader5 module in a backtest, filling orders at replayed prices.
+
+    ticks maps every symbol to (times, bids, asks) arrays sorted by time in seconds. advance(t)
+    moves each symbol to its last tick at or before t, after filling the stop losses and take
+    profits that the ticks in between reached. Market deals fill at the ask (buy) or the bid
+    (sell). With hedging every deal without a position ticket opens a position, otherwise a
+    symbol has one position that opposite deals reduce, close or reverse. commission is charged
+    per lot on every deal, profits are converted to USD with the symbol's price when USD is not
+    its quote currency, and margin is not simulated.
+    """
+
+    def __init__(self, ticks, balance=10000.0, hedging=True, commission=0.0, symbol_info=None, login=0):
+        self.ticks = {symbol: tuple(np.asarray(column, dtype=float) for column in columns) for symbol, columns in ticks.items()}
+        self.balance = float(balance)
+        self.hedging = hedging
+        self.commission = commission  # Per lot and deal
+        self.login = login
+        self.server = "Simulated"
+        self.symbol_overrides = symbol_info or {}  # Symbol -> SimSymbolInfo fields that differ from the defaults
+        self.time = 0.0
+        self.deals = []  # Every deal as a dict, 'entry' is 'in' for deals opening a position and 'out' for closing ones
+        self._index = {symbol: -1 for symbol in self.ticks}
+        self._positions = {}  # ticket -> dict with the SimPosition fields but profit and price_current
+        self._symbol_info = {}
+        self._tickets = itertools.count(1)
+
+    def initialize(self, *args, **kwargs):
+        return True
+
+    def shutdown(self):
+        return True
+
+    def last_error(self):
+        return (1, "Success")
+
+    def account_info(self):
+        profit = sum(self._profit(position) for position in self._positions.values())
+        equity = self.balance + profit
+        return SimAccount(self.login, self.balance, equity, profit, 0.0, equity, 100, "USD", self.server)
+
+    def positions_get(self, symbol=None, ticket=None, group=None):
+        return tuple(
+            self._position_tuple(position) for position in self._positions.values()
+            if (symbol is None or position['symbol'] == symbol) and (ticket is None or position['ticket'] == ticket)
+        )
+
+    def orders_get(self, symbol=None, ticket=None, group=None):
+        return ()  # The platform never places pending orders
+
+    def knows(self, symbol):
+        return symbol in self.ticks
+
+    def quote(self, symbol):
+        """Return (time, bid, ask) of the symbol's current tick, or None before its first tick."""
+        index = self._index.get(symbol, -1)
+        if index < 0:
+            return None
+        times, bids, asks = self.ticks[symbol]
+        return float(times[index]), float(bids[index]), float(asks[index])
+
+    def symbol_info(self, symbol):
+        if not self.knows(symbol):
+            return None
+        if symbol not in self._symbol_info:
+            digits = 2 if symbol.startswith('XAU') else 3 if 'JPY' in symbol or symbol.startswith('XAG') else 5
+            contract_size = 100 if symbol.startswith('XAU') else 5000 if symbol.startswith('XAG') else 100000
+            fields = {'name': symbol, 'digits': digits, 'point': 10 ** -digits, 'volume_min': 0.01, 'volume_max': 100.0,
+                      'volume_step': 0.01, 'trade_contract_size': contract_size, 'trade_stops_level': 0, 'trade_freeze_level': 0}
+            fields.update(self.symbol_overrides.get(symbol, {}))
+            self._symbol_info[symbol] = SimSymbolInfo(**fields)
+        return self._symbol_info[symbol]
+
+    def symbol_info_tick(self, symbol):
+        quote = self.quote(symbol)
+        if quote is None:
+            return None
+        t, bid, ask = quote
+        return SimTick(int(t), bid, ask, 0.0, 0, int(t * 1000))
+
+    def order_send(self, request):
+        action = request.get('action')
+        if action == self.TRADE_ACTION_DEAL:
+            return self._deal(request)
+        if action == self.TRADE_ACTION_SLTP:
+            position = self._positions.get(request.get('position'))
+            if position is None:
+                return self._result(self.TRADE_RETCODE_POSITION_CLOSED, "Position closed")
+            position['sl'] = float(request.get('sl', 0.0))
+            position['tp'] = float(request.get('tp', 0.0))
+            return self._result(self.TRADE_RETCODE_DONE, "Request executed")
+        return self._result(self.TRADE_RETCODE_INVALID, f"Action {action} is not simulated")
+
+    def advance(self, t):
+        """Move to replayed time t, filling the stops and targets reached by the ticks until t."""
+        stopped = {position['symbol'] for position in self._positions.values() if position['sl'] or position['tp']}
+        for symbol, (times, bids, asks) in self.ticks.items():
+            start = self._index[symbol] + 1
+            end = int(np.searchsorted(times, t, side='right'))
+            if end <= start:
+                continue
+            if symbol in stopped:
+                self._fill_stops(symbol, start, end)
+            self._index[symbol] = end - 1
+        self.time = t
+
+    def equity(self):
+        return self.account_info().equity
+
+    def has_positions(self):
+        return bool(self._positions)
+
+    def _fill_stops(self, symbol, start, end):
+        times, bids, asks = self.ticks[symbol]
+        for position in [p for p in self._positions.values() if p['symbol'] == symbol and (p['sl'] or p['tp'])]:
+            buy = position['type'] == self.ORDER_TYPE_BUY
+            prices = (bids if buy else asks)[start:end]
+            hits = []
+            for level, kind in ((position['sl'], 'sl'), (position['tp'], 'tp')):
+                if not level:
+                    continue
+                # A buy is stopped out below its stop loss and takes profit above its target, a sell the other way
+                reached = prices <= level if buy == (kind == 'sl') else prices >= level
+                if reached.any():
+                    hits.append((int(np.argmax(reached)), level, kind))
+            if not hits:
+                continue
+            index, level, kind = min(hits)
+            # A level already beyond the price when the ticks start is filled at the price
+            previous = (bids if buy else asks)[start - 1] if start else prices[0]
+            gapped = previous <= level if buy == (kind == 'sl') else previous >= level
+            price = float(prices[index]) if gapped else level
+            self._close(position, position['volume'], price, times[start + index], f"[{kind} {level}]")
+
+    def _deal(self, request):
+        symbol = request.get('symbol')
+        tick = self.symbol_info_tick(symbol)
+        if tick is None:
+            return self._result(self.TRADE_RETCODE_MARKET_CLOSED, "Market closed")
+        info = self.symbol_info(symbol)
+        volume = float(request.get('volume', 0.0))
+        steps = volume / info.volume_step
+        if not info.volume_min <= volume <= info.volume_max or abs(steps - round(steps)) > 1e-6:
+            return self._result(self.TRADE_RETCODE_INVALID_VOLUME, "Invalid volume")
+
+        order_type = request.get('type')
+        price = tick.ask if order_type == self.ORDER_TYPE_BUY else tick.bid
+        comment = request.get('comment', '')
+        if request.get('position'):
+            position = self._positions.get(request['position'])
+            if position is None:
+                return self._result(self.TRADE_RETCODE_POSITION_CLOSED, "Position closed")
+            if position['type'] == order_type:
+                return self._result(self.TRADE_RETCODE_INVALID, "Deal in the direction of the position")
+            deal = self._close(position, min(volume, position['volume']), price, self.time, comment)
+        elif self.hedging:
+            deal = self._open(symbol, order_type, volume, price, request)
+        else:
+            position = next((p for p in self._positions.values() if p['symbol'] == symbol), None)
+            if position is None:
+                deal = self._open(symbol, order_type, volume, price, request)
+            elif position['type'] == order_type:
+                total = position['volume'] + volume
+                position['price_open'] = (position['price_open'] * position['volume'] + price * volume) / total
+                position['volume'] = round(total, 8)
+                deal = self._record(position, 'in', volume, price, 0.0, self.time, comment)
+            else:
+                closing = min(volume, position['volume'])
+                deal = self._close(position, closing, price, self.time, comment)
+                if volume - closing > 1e-9:
+                    deal = self._open(symbol, order_type, round(volume - closing, 8), price, request)
+        return self._result(self.TRADE_RETCODE_DONE, "Request executed", deal=deal, volume=volume, price=price, tick=tick)
+
+    def _open(self, symbol, order_type, volume, price, request):
+        ticket = next(self._tickets)
+        position = self._positions[ticket] = {
+            'ticket': ticket, 'time': int(self.time), 'type': order_type, 'magic': request.get('magic', 0),
+            'volume': volume, 'price_open': price, 'sl': float(request.get('sl', 0.0)), 'tp': float(request.get('tp', 0.0)),
+            'symbol': symbol, 'comment': request.get('comment', ''),
+        }
+        return self._record(position, 'in', volume, price, 0.0, self.time, position['comment'])
+
+    def _close(self, position, volume, price, t, comment):
+        profit = self._profit(position, price) * volume / position['volume']
+        self.balance += profit
+        position['volume'] = round(position['volume'] - volume, 8)
+        if position['volume'] <= 1e-9:
+            del self._positions[position['ticket']]
+        return self._record(position, 'out', volume, price, profit, t, comment)
+
+    def _record(self, position, entry, volume, price, profit, t, comment):
+        commission = self.commission * volume
+        self.balance -= commission
+        self.deals.append({
+            'deal': len(self.deals) + 1, 'time': float(t), 'position': position['ticket'], 'symbol': position['symbol'],
+            'type': position['type'], 'entry': entry, 'volume': volume, 'price': price, 'profit': profit,
+            'commission': commission, 'comment': comment,
+        })
+        return len(self.deals)
+
+    def _profit(self, position, price=None):
+        symbol = position['symbol']
+        buy = position['type'] == self.ORDER_TYPE_BUY
+        if price is None:
+            _, bid, ask = self.quote(symbol)
+            price = bid if buy else ask
+        profit = (price - position['price_open']) * (1 if buy else -1) * position['volume'] * self.symbol_info(symbol).trade_contract_size
+        if symbol[3:6] == 'USD':
+            return float(profit)
+        if symbol[:3] == 'USD':
+            return float(profit / price)
+        return float(profit)  # Crosses are taken as if quoted in USD
+
+    def _position_tuple(self, position):
+        _, bid, ask = self.quote(position['symbol'])
+        price_current = bid if position['type'] == self.ORDER_TYPE_BUY else ask
+        return SimPosition(price_current=price_current, profit=self._profit(position, price_current), **position)
+
+    def _result(self, retcode, comment, deal=0, volume=0.0, price=0.0, tick=None):
+        return SimResult(retcode, deal, deal, volume, price, tick.bid if tick else 0.0, tick.ask if tick else 0.0, comment, 0)
+
+class MockBroker(SimulatedBroker):
+    """Stands in for the MetaTrader5 module in real time, so the whole platform runs without a terminal.
+
+    Every symbol's mid price is a random walk that moves once per tick_interval seconds of wall
+    time, with volatility as its relative standard deviation over one second, and the stops and
+    targets a new tick reaches are filled at that tick. Every terminal call takes call_latency
+    seconds and every order latency more, and market orders are requoted or rejected at random
+    with requote_rate and reject_rate. The config's scenario lists actions run at 'at' seconds
+    after start():
+      {"action": "jump", "symbol": s, "percent": p}      moves the price of s by p percent
+      {"action": "disconnect", "seconds": n}             no ticks and no orders for n seconds
+      {"action": "reject", "count": n, "retcode": r}     fails the next n orders with retcode r
+      {"action": "set", "latency": 0.5, ...}             changes the latencies, rates or volatility
+      {"action": "signals", "rate": r, "seconds": n}     posts r random trade signals a second for n
+                                                         seconds to the signal receiver, as a load test
+    Failed scenario actions and signal posts are passed to log, which the engine trading on the
+    broker points to its own log.
+    """
+
+    default_prices = {'XAUUSD': 2000.0, 'XAGUSD': 23.0, 'USDJPY': 150.0, 'USDCAD': 1.36, 'USDCHF': 0.88,
+                      'EURUSD': 1.08, 'AUDUSD': 0.66, 'EURCAD': 1.47, 'EURCHF': 0.95, 'EURGBP': 0.86,
+                      'AUDCAD': 0.9, 'EURJPY': 162.0, 'GBPJPY': 190.0, 'NZDUSD': 0.61, 'GBPUSD': 1.26}
+    settable = ('latency', 'call_latency', 'requote_rate', 'reject_rate', 'volatility', 'spread_points', 'tick_interval')
+
+    def __init__(self, config=None, log=print):
+        config = config or {}
+        super().__init__({}, balance=config.get('balance', 10000.0), hedging=config.get('hedging', True),
+                         commission=config.get('commission', 0.0), symbol_info=config.get('symbol_info'),
+                         login=config.get('login', 1000000))
+        self.latency = config.get('latency', 0.0)
+        self.call_latency = config.get('call_latency', 0.0)
+        self.requote_rate = config.get('requote_rate', 0.0)
+        self.reject_rate = config.get('reject_rate', 0.0)
+        self.volatility = config.get('volatility', 0.0001)
+        self.spread_points = config.get('spread_points', 15)
+        self.tick_interval = config.get('tick_interval', 0.1)
+        self.scenario = sorted(config.get('scenario', []), key=lambda action: action.get('at', 0))
+        self.signal_url = config.get('signal_url')
+        self.log = log
+        self.random = np.random.default_rng(config.get('seed'))
+        symbols = config.get('symbols', fixed_symbols)
+        if not isinstance(symbols, dict):
+            symbols = {symbol: self.default_prices.get(symbol[:6], 1.0) for symbol in symbols}
+        self.time = time.time()
+        self._prices = {symbol: [self.time, float(price)] for symbol, price in symbols.items()}
+        self._failures = deque()  # Retcodes of the next orders, queued by the reject action
+        self._disconnected_until = 0.0
+        self._error = (1, "Success")
+        self._lock = threading.RLock()  # The engine, its order workers and the scenario call in concurrently
+        self._stop = threading.Event()
+        self._threads = []
+
+    def start(self):
+        """Run the scenario on its own thread."""
+        if self.scenario:
+            self._spawn(self._run_scenario)
+
+    def stop(self):
+        self._stop.set()
+        for thread in self._threads:
+            thread.join()
+
+    def initialize(self, *args, **kwargs):
+        with self._lock:
+            self.login = kwargs.get('login', self.login)
+            self.server = kwargs.get('server', self.server)
+            return not self._disconnected()
+
+    def last_error(self):
+        return self._error
+
+    def account_info(self):
+        return self._call(super().account_info)
+
+    def positions_get(self, symbol=None, ticket=None, group=None):
+        return self._call(super().positions_get, symbol, ticket, group)
+
+    def orders_get(self, symbol=None, ticket=None, group=None):
+        return self._call(super().orders_get, symbol, ticket, group)
+
+    def symbol_info(self, symbol):
+        with self._lock:
+            return super().symbol_info(symbol)
+
+    def symbol_info_tick(self, symbol):
+        return self._call(super().symbol_info_tick, symbol)
+
+    def order_send(self, request):
+        if self.latency:
+            time.sleep(self.latency)
+        with self._lock:
+            result = self._call(lambda: self._order(request))
+            if result is None:
+                self._error = (-10004, "No IPC connection")
+            return result
+
+    def knows(self, symbol):
+        return symbol in self._prices
+
+    def quote(self, symbol):
+        if symbol not in self._prices:
+            return None
+        t, mid = self._prices[symbol]
+        digits = self.symbol_info(symbol).digits
+        half_spread = self.spread_points * 10 ** -digits / 2
+        return t, round(mid - half_spread, digits), round(mid + half_spread, digits)
+
+    def advance(self, t):
+        """Move every price on to wall time t, filling the stops and targets the new ticks reach."""
+        for symbol, entry in self._prices.items():
+            steps = int((t - entry[0]) / self.tick_interval)
+            if steps <= 0:
+                continue
+            entry[1] *= float(np.exp(self.volatility * np.sqrt(steps * self.tick_interval) * self.random.standard_normal()))
+            entry[0] += steps * self.tick_interval
+            self._fill_stops(symbol)
+        self.time = t
+
+    def _fill_stops(self, symbol):
+        t, bid, ask = self.quote(symbol)
+        for position in [p for p in self._positions.values() if p['symbol'] == symbol and (p['sl'] or p['tp'])]:
+            buy = position['type'] == self.ORDER_TYPE_BUY
+            price = bid if buy else ask
+            for level, kind in ((position['sl'], 'sl'), (position['tp'], 'tp')):
+                if level and (price <= level if buy == (kind == 'sl') else price >= level):
+                    self._close(position, position['volume'], price, t, f"[{kind} {level}]")
+                    break
+
+    def _order(self, request):
+        if self._failures:
+            return self._result(self._failures.popleft(), "Scripted failure")
+        if request.get('action') == self.TRADE_ACTION_DEAL:
+            if self.random.random() < self.requote_rate:
+                return self._result(self.TRADE_RETCODE_REQUOTE, "Requote", tick=self.symbol_info_tick(request.get('symbol')))
+            if self.random.random() < self.reject_rate:
+                return self._result(self.TRADE_RETCODE_REJECT, "Request rejected")
+        return super().order_send(request)
+
+    def _call(self, call, *args):
+        """Run a terminal call after call_latency on the current prices, None while disconnected."""
+        if self.call_latency:
+            time.sleep(self.call_latency)
+        with self._lock:
+            if self._disconnected():
+                return None
+            self.advance(time.time())
+            return call(*args)
+
+    def _disconnected(self):
+        return time.monotonic() < self._disconnected_until
+
+    def _spawn(self, target, *args):
+        thread = threading.Thread(target=target, args=args, daemon=True)
+        self._threads.append(thread)
+        thread.start()
+
+    def _run_scenario(self):
+        started = time.monotonic()
+        for action in self.scenario:
+            if self._stop.wait(max(0.0, action.get('at', 0) - (time.monotonic() - started))):
+                return
+            try:
+                self.apply(action)
+            except Exception as e:
+                self.log(f"Mock broker scenario action {action} failed: {e}")
+
+    def apply(self, action):
+        """Run one scenario action now."""
+        kind = action['action']
+        with self._lock:
+            if kind == 'jump':
+                self.advance(time.time())
+                self._prices[action['symbol']][1] *= 1 + action['percent'] / 100
+                self._fill_stops(action['symbol'])
+            elif kind == 'disconnect':
+                self._disconnected_until = time.monotonic() + action['seconds']
+            elif kind == 'reject':
+                self._failures.extend([action.get('retcode', self.TRADE_RETCODE_REJECT)] * action.get('count', 1))
+            elif kind == 'set':
+                for name in self.settable:
+                    if name in action:
+                        setattr(self, name, action[name])
+            elif kind == 'signals':
+                self._spawn(self._post_signals, action)
+            else:
+                raise ValueError(f"Unknown scenario action {kind}")
+
+    def _post_signals(self, action):
+        address = signal_receiver_address
+        url = self.signal_url or f"http://{address[0]}:{address[1]}/{strategy_name}"
+        symbols = action.get('symbols') or list(self._prices)
+        directions = np.random.default_rng(action.get('seed'))  # self.random belongs to the lock holder
+        interval = 1.0 / action['rate']
+        session = requests.Session()
+        run = int(time.time())
+        started = time.monotonic()
+        failing = False
+        for n in itertools.count():
+            due = started + n * interval
+            if due - started >= action.get('seconds', 60) or self._stop.wait(max(0.0, due - time.monotonic())):
+                return
+            event = f"Trade|{symbols[n % len(symbols)]},{action.get('lot', 0.01)},{'Buy' if directions.random() < 0.5 else 'Sell'}"
+            try:
+                session.post(url, json={'event': event, 'id': f"mock {run} {n}"}, timeout=5)
+                failing = False
+            except requests.RequestException as e:
+                if not failing:  # Once per run of failures, not for each of r signals a second
+                    self.log(f"Mock broker could not post a signal: {e}")
+                failing = True
+
+class ReplayEngine(TradingEngine):
+    """TradingEngine stepped by a Backtest on the broker's replayed time, without its own thread.
+
+    The decisions are the engine's own. Only the clock, the balance file, the news and pivot
+    downloads and the dashboard labels and state are replaced, and orders fill synchronously.
+    """
+
+    metrics = None  # Replayed cycles are not instrumented
+
+    def __init__(self, broker, journal):
+        self.broker = broker
+        super().__init__(signal_address=None, journal=journal, state_store=StateStore(":memory:"), workers=0)
+
+    def now(self):
+        return replay_epoch + timedelta(seconds=self.broker.time)
+
+    def monotonic(self):
+        return self.broker.time
+
+    def start_up(self):
+        self.journal.start()
+        self.terminal_ready = True
+        self.previous_day_balance = self.broker.balance
+        self.tick_stream.subscribe(self.snapshot_symbols())
+        self.start_daily_timer()
+
+    def run_pending(self):
+        """Handle the queued commands and drop the published events, nothing renders them."""
+        while True:
+            try:
+                command = self.command_queue.get_nowait()
+            except queue.Empty:
+                break
+            self.handle_command(command)
+        while True:
+            try:
+                self.event_queue.get_nowait()
+            except queue.Empty:
+                break
+
+    def create_balance_file(self):
+        pass
+
+    def read_balance_from_file(self):
+        return self.previous_day_balance
+
+    def write_balance_to_file(self, balance):
+        pass
+
+    def load_news(self):
+        pass
+
+    def refresh_news(self):
+        pass
+
+    def update_pivot_data(self):
+        pass
+
+    def update_buy_sell_price_labels(self):
+        pass
+
+    def publish_state(self):
+        pass
+
+@dataclass
+class BacktestReport:
+    """PnL, drawdown and deal statistics of one Backtest run."""
+    mode: int
+    start: datetime
+    end: datetime
+    initial_balance: float
+    final_balance: float
+    final_equity: float
+    closing_deals: int
+    win_rate: float
+    profit_factor: float
+    commission: float
+    max_drawdown: float  # Largest fall of the equity from its running peak, in USD
+    max_drawdown_pct: float
+    signals: int
+    steps: int
+    elapsed: float
+    equity: 'pd.Series'  # Equity after every step, indexed by replayed time
+
+    @property
+    def net_profit(self):
+        return self.final_equity - self.initial_balance
+
+    @property
+    def recovery_factor(self):
+        return self.net_profit / self.max_drawdown if self.max_drawdown else 0.0
+
+    def to_json(self):
+        """The figures of the report without the equity curve."""
+        values = {name: getattr(self, name) for name in self.__dataclass_fields__ if name != 'equity'}
+        values.update(start=self.start.isoformat(), end=self.end.isoformat(),
+                      net_profit=self.net_profit, recovery_factor=self.recovery_factor)
+        return values
+
+    @classmethod
+    def from_run(cls, mode, broker, times, equity, initial_balance, signals, elapsed):
+        peak = np.maximum.accumulate(equity)
+        drawdown = peak - equity
+        worst = int(np.argmax(drawdown)) if len(drawdown) else 0
+        deals = pd.DataFrame(broker.deals, columns=['entry', 'profit', 'commission'])
+        profits = deals.loc[deals['entry'] == 'out', 'profit'].to_numpy()
+        gains, losses = profits[profits > 0].sum(), -profits[profits < 0].sum()
+        return cls(
+            mode=mode,
+            start=replay_epoch + timedelta(seconds=float(times[0])),
+            end=replay_epoch + timedelta(seconds=float(times[-1])),
+            initial_balance=initial_balance,
+            final_balance=broker.balance,
+            final_equity=float(equity[-1]),
+            closing_deals=len(profits),
+            win_rate=float((profits > 0).mean()) if len(profits) else 0.0,
+            profit_factor=float(gains / losses) if losses else float('inf') if gains else 0.0,
+            commission=float(deals['commission'].sum()),
+            max_drawdown=float(drawdown[worst]) if len(drawdown) else 0.0,
+            max_drawdown_pct=float(drawdown[worst] / peak[worst] * 100) if len(drawdown) and peak[worst] else 0.0,
+            signals=signals,
+            steps=len(times),
+            elapsed=elapsed,
+            equity=pd.Series(equity, index=pd.to_datetime(times, unit='s')),
+        )
+
+    def summary(self):
+        return (
+            f"Mode {self.mode} {self.start:%Y-%m-%d} to {self.end:%Y-%m-%d}: net {self.net_profit:+.2f} USD "
+            f"({self.net_profit / self.initial_balance * 100:+.2f}%), max drawdown {self.max_drawdown:.2f} USD "
+            f"({self.max_drawdown_pct:.2f}%), {self.closing_deals} closing deals, win rate {self.win_rate:.0%}, "
+            f"profit factor {self.profit_factor:.2f}, commission {self.commission:.2f} USD, {self.signals} signals, "
+            f"{self.steps} steps in {self.elapsed:.1f} s"
+        )
+
+class Backtest:
+    """Replays recorded signals and prices through the engine's decision code on a SimulatedBroker.
+
+    Every step advances the broker, lets the tick stream report the symbols that moved, queues
+    the signals received until then and runs one trading cycle of a ReplayEngine. Steps fall
+    every `step` replayed seconds and at every signal, with step=0 at every tick instead. Cycles
+    in which the engine has no position, no symbol and no signal are skipped. The run is
+    deterministic: the same data and config always give the same deals.
+    """
+
+    def __init__(self, broker, signal_times, signals, config=None, mode=1, news=(), step=60.0, journal=True):
+        self.broker = broker
+        self.signal_times = np.asarray(signal_times, dtype=float)
+        self.signals = list(signals)
+        self.config = config or {}
+        self.mode = mode
+        self.news = sorted(news, key=lambda news: news['date'])
+        self.step = step
+        self.journal = journal  # Journal the run in journal_dir/backtest
+
+    def step_times(self):
+        starts = [times[0] for times, _, _ in self.broker.ticks.values() if len(times)]
+        ends = [times[-1] for times, _, _ in self.broker.ticks.values() if len(times)]
+        start, end = min(starts), max(ends)
+        if self.step:
+            grid = np.arange(start, end + self.step, self.step)
+        else:
+            grid = np.unique(np.concatenate([times for times, _, _ in self.broker.ticks.values()]))
+        signal_times = self.signal_times[(self.signal_times >= start) & (self.signal_times <= end)]
+        return np.union1d(grid, signal_times)
+
+    def run(self):
+        global trade_management_mode
+        started = time.perf_counter()
+        initial_balance = self.broker.balance
+        times = self.step_times()
+        equity = np.empty(len(times))
+        previous_backend = mt5
+        previous_mode = trade_management_mode  # set_trade_management_mode() changes the module's mode
+        use_mt5(self.broker)
+        journal = Journal(f"backtest_mode{self.mode}", os.path.join(journal_dir, "backtest") if self.journal else None)
+        engine = ReplayEngine(self.broker, journal)
+        try:
+            self.broker.advance(times[0])
+            engine.selected_symbol = next(iter(self.broker.ticks))
+            engine.set_news(self.news)
+            engine.set_trade_management_mode(self.mode)
+            engine.start_up()
+            apply_engine_config(engine, self.config)
+            engine.run_pending()
+
+            pending = 0
+            replayed = 0
+            for i, t in enumerate(times):
+                self.broker.advance(t)
+                while pending < len(self.signal_times) and self.signal_times[pending] <= t:
+                    if self.signal_times[pending] >= times[0]:
+                        engine.signal_receiver.push(self.signals[pending])
+                        replayed += 1
+                    pending += 1
+                engine.tick_stream.poll()
+                engine.run_due_timers()
+                engine.run_pending()
+                if self.broker.has_positions() or engine.symbol_settings or not engine.signal_receiver.pending.empty():
+                    engine.run_cycle()
+                    engine.run_pending()
+                equity[i] = self.broker.equity()
+        finally:
+            engine.order_pipeline.close()
+            journal.close()
+            engine.state_store.close()
+            use_mt5(previous_backend)
+            trade_management_mode = previous_mode
+        return BacktestReport.from_run(self.mode, self.broker, times, equity, initial_balance, replayed, time.perf_counter() - started)
+
+def replay_seconds(values):
+    """Convert date/time values to replayed seconds since replay_epoch, as a float array."""
+    stamps = pd.to_datetime(pd.Series(values))
+    if stamps.dt.tz is not None:
+        stamps = stamps.dt.tz_localize(None)
+    return ((stamps - pd.Timestamp(replay_epoch)).dt.total_seconds()).to_numpy(float)
+
+def load_ticks(path):
+    """Read replayed prices from a CSV file into {symbol: (times, bids, asks)}.
+
+    Tick files have time, symbol, bid and ask columns. Bar files have time, symbol, open, high,
+    low and close columns and an optional spread column in price units. Every bar becomes four
+    ticks a quarter of the bar length apart: open, low and high, or high and low for a falling
+    bar, then close.
+    """
+    frame = pd.read_csv(path)
+    frame['time'] = replay_seconds(frame['time'])
+    ticks = {}
+    for symbol, group in frame.groupby('symbol', sort=False):
+        group = group.sort_values('time', kind='stable')
+        times = group['time'].to_numpy(float)
+        if 'bid' in group:
+            bids = group['bid'].to_numpy(float)
+            asks = group['ask'].to_numpy(float) if 'ask' in group else bids
+        else:
+            o, h, l, c = (group[column].to_numpy(float) for column in ('open', 'high', 'low', 'close'))
+            spread = group['spread'].to_numpy(float) if 'spread' in group else np.zeros(len(group))
+            bar = float(np.median(np.diff(times))) if len(times) > 1 else 60.0
+            rising = c >= o
+            bids = np.column_stack([o, np.where(rising, l, h), np.where(rising, h, l), c]).ravel()
+            asks = bids + np.repeat(spread, 4)
+            times = (times[:, None] + bar * np.array([0.0, 0.25, 0.5, 0.75])).ravel()
+        ticks[symbol] = (times, bids, asks)
+    return ticks
+
+def load_signals(path):
+    """Read recorded signals, return their times in replayed seconds and the signals in time order.
+
+    path is a journal directory, whose executed 'signal' entries are replayed, or a CSV or JSON
+    lines file with a time column and the signal fields, at least 'event'.
+    """
+    if os.path.isdir(path):
+        entries = [entry for entry in iter_journal(path, kinds={'signal'}) if not entry.get('dropped')]
+        times = replay_seconds([entry['ts'] for entry in entries])
+        signals = [entry['signal'] for entry in entries]
+    else:
+        frame = pd.read_csv(path) if path.endswith('.csv') else pd.read_json(path, lines=True)
+        times = replay_seconds(frame.pop('time'))
+        signals = [{key: value for key, value in row.items() if pd.notna(value)} for row in frame.to_dict('records')]
+    order = np.argsort(times, kind='stable')
+    return times[order], [signals[i] for i in order]
+
+def load_news(path):
+    """Read news events for a backtest from a CSV or JSON file with date, currency and impact columns."""
+    frame = pd.read_csv(path) if path.endswith('.csv') else pd.read_json(path)
+    dates = pd.to_datetime(frame['date'])
+    return [{'date': date.to_pydatetime(), 'currency': currency, 'impact': impact}
+            for date, currency, impact in zip(dates, frame['currency'], frame['impact'])]
+
+def run_backtest(config_path):
+    """Backtest every mode of the config file and print one summary per mode.
+
+    The config has the engine config keys ('settings', 'symbols') and 'ticks', 'signals', 'news',
+    'balance', 'commission' (per lot and deal), 'hedging', 'symbol_info', 'step' and 'modes'.
+    """
+    config = load_engine_config(config_path)
+    ticks = load_ticks(config['ticks'])
+    signal_times, signals = load_signals(config['signals']) if 'signals' in config else (np.empty(0), [])
+    news = load_news(config['news']) if 'news' in config else []
+    reports = {}
+    for mode in config.get('modes', [1, 2, 3, 4]):
+        broker = SimulatedBroker(ticks, balance=config.get('balance', 10000.0), hedging=config.get('hedging', True),
+                                 commission=config.get('commission', 0.0), symbol_info=config.get('symbol_info'))
+        reports[mode] = Backtest(broker, signal_times, signals, config, mode=mode, news=news, step=config.get('step', 60.0)).run()
+        print(reports[mode].summary())
+    return reports
+
+
+# Per-symbol settings a sweep can vary, as "EURUSD.r.tp1" for one symbol or "tp1" for every symbol
+sweep_symbol_parameters = ('tp1', 'tp2', 'R1', 'R2', 'R3', 'commission', 'loss_threshold', 'sl_adjust', 'martingale_multiplier')
+
+class SharedTicks:
+    """Replayed prices copied once into shared memory, which sweep workers map read-only.
+
+    The times, bids and asks of every symbol lie back to back in one block, so a worker
+    attaches with the block name and the layout instead of receiving a copy of the data.
+    """
+
+    def __init__(self, ticks):
+        self.layout = {}
+        offset = 0
+        for symbol, (times, bids, asks) in ticks.items():
+            self.layout[symbol] = (offset, len(times))
+            offset += 3 * len(times)
+        self.block = shared_memory.SharedMemory(create=True, size=max(offset, 1) * 8)
+        data = np.ndarray(offset, dtype=np.float64, buffer=self.block.buf)
+        for symbol, columns in ticks.items():
+            start, length = self.layout[symbol]
+            for i, column in enumerate(columns):
+                data[start + i * length:start + (i + 1) * length] = column
+
+    def spec(self):
+        return self.block.name, self.layout
+
+    @staticmethod
+    def attach(spec):
+        """Map the block of spec and return it with {symbol: (times, bids, asks)} read-only views."""
+        name, layout = spec
+        block = shared_memory.SharedMemory(name=name)
+        data = np.ndarray(block.size // 8, dtype=np.float64, buffer=block.buf)
+        data.flags.writeable = False
+        ticks = {symbol: tuple(data[start + i * length:start + (i + 1) * length] for i in range(3))
+                 for symbol, (start, length) in layout.items()}
+        return block, ticks
+
+    def close(self):
+        self.block.close()
+        self.block.unlink()
+
+class SweepCache:
+    """Results of sweep runs in SQLite keyed by the hash of their parameters and data, to resume sweeps."""
+
+    def __init__(self, path):
+        self.conn = sqlite3.connect(path)
+        self.conn.execute("CREATE TABLE IF NOT EXISTS results (key TEXT PRIMARY KEY, params TEXT, report TEXT)")
+
+    def get(self, key):
+        row = self.conn.execute("SELECT report FROM results WHERE key = ?", (key,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def put(self, key, params, report):
+        with self.conn:
+            self.conn.execute("INSERT OR REPLACE INTO results VALUES (?, ?, ?)", (key, json.dumps(params), json.dumps(report)))
+
+    def close(self):
+        self.conn.close()
+
+def sweep_parameter_sets(config):
+    """The parameter sets of a sweep config, from its 'grid' of value lists or its random 'search'.
+
+    A search has a 'space' mapping each parameter to [low, high] for uniform draws or to a list
+    of values to choose from, a number of 'samples' and an optional 'seed'.
+    """
+    if 'grid' in config:
+        names = list(config['grid'])
+        return [dict(zip(names, values)) for values in itertools.product(*(config['grid'][name] for name in names))]
+    search = config['search']
+    rng = np.random.default_rng(search.get('seed', 0))
+    sets = []
+    for _ in range(search['samples']):
+        params = {}
+        for name, space in search['space'].items():
+            if len(space) == 2 and all(isinstance(bound, (int, float)) for bound in space):
+                value = rng.uniform(*space)
+                params[name] = int(round(value)) if all(isinstance(bound, int) for bound in space) else round(float(value), 6)
+            else:
+                params[name] = space[int(rng.integers(len(space)))]
+        sets.append(params)
+    return sets
+
+def apply_sweep_parameters(config, params):
+    """Return a copy of the backtest config with the parameters of one sweep run applied, and its mode."""
+    config = json.loads(json.dumps(config))
+    symbols = config.setdefault('symbols', {})
+    mode = config.get('mode', 1)
+    for name, value in params.items():
+        if name == 'mode':
+            mode = value
+        elif name == 'daily_profit_target':
+            config.setdefault('settings', {})['daily_profit_target'] = value
+        elif name in sweep_symbol_parameters:
+            for settings in symbols.values():
+                settings[name] = value
+        else:
+            symbol, _, setting = name.rpartition('.')
+            if setting not in sweep_symbol_parameters or not symbol:
+                raise ValueError(f"Unknown sweep parameter {name}")
+            symbols.setdefault(symbol, {})[setting] = value
+    return config, mode
+
+_sweep_worker = {}  # Data of the sweep worker process, set by sweep_worker_init
+
+def sweep_worker_init(spec, signal_times, signals, news, config):
+    block, ticks = SharedTicks.attach(spec)
+    _sweep_worker.update(block=block, ticks=ticks, signal_times=signal_times, signals=signals, news=news, config=config)
+
+def sweep_run(key, params):
+    """Backtest one parameter set in a sweep worker, return (key, params, report JSON)."""
+    data = _sweep_worker
+    config, mode = apply_sweep_parameters(data['config'], params)
+    broker = SimulatedBroker(data['ticks'], balance=config.get('balance', 10000.0), hedging=config.get('hedging', True),
+                             commission=config.get('commission', 0.0), symbol_info=config.get('symbol_info'))
+    report = Backtest(broker, data['signal_times'], data['signals'], config, mode=mode, news=data['news'],
+                      step=config.get('step', 60.0), journal=False).run()
+    return key, params, report.to_json()
+
+def run_sweep_parallel(config, todo, cache, results, objective):
+    """Run the (key, params) sets of todo on a process pool, caching and collecting their reports."""
+    ticks = load_ticks(config['ticks'])
+    signal_times, signals = load_signals(config['signals']) if 'signals' in config else (np.empty(0), [])
+    news = load_news(config['news']) if 'news' in config else []
+    shared = SharedTicks(ticks)
+    del ticks
+    workers = min(config.get('workers', os.cpu_count() or 1), len(todo))
+    try:
+        with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn'),
+                                 initializer=sweep_worker_init, initargs=(shared.spec(), signal_times, signals, news, config)) as pool:
+            futures = [pool.submit(sweep_run, key, params) for key, params in todo]
+            for done, future in enumerate(as_completed(futures), 1):
+                key, params, report = future.result()
+                cache.put(key, params, report)
+                results.append((params, report))
+                print(f"[{done}/{len(todo)}] {params}: {objective} {report[objective]:.2f}, "
+                      f"net {report['net_profit']:+.2f}, max drawdown {report['max_drawdown_pct']:.2f}%")
+    finally:
+        shared.close()
+
+def run_sweep(config_path):
+    """Backtest every parameter set of a sweep config on all cores and print the best ones.
+
+    The config is a backtest config (see run_backtest) with a 'grid' or a 'search' (see
+    sweep_parameter_sets) and optionally 'mode', 'workers', 'objective' (a BacktestReport figure,
+    net_profit by default), 'top' and 'cache', the SQLite file results are kept in. Runs found in
+    the cache are not repeated, so an interrupted sweep resumes where it stopped.
+    """
+    config = load_engine_config(config_path)
+    objective = config.get('objective', 'net_profit')
+    # Results are only reused for the same data files and base settings
+    data_files = {name: [os.stat(config[name]).st_size, os.stat(config[name]).st_mtime] for name in ('ticks', 'signals', 'news') if name in config}
+    base = {key: value for key, value in config.items() if key not in ('grid', 'search', 'workers', 'objective', 'top', 'cache')}
+    runs = []
+    for params in sweep_parameter_sets(config):
+        apply_sweep_parameters(config, params)  # Fails early on unknown parameters
+        key = hashlib.sha256(json.dumps({'params': params, 'base': base, 'data': data_files}, sort_keys=True).encode()).hexdigest()
+        runs.append((key, params))
+
+    cache = SweepCache(config.get('cache', os.path.splitext(config_path)[0] + " sweep.db"))
+    results = []
+    todo = []
+    for key, params in runs:
+        report = cache.get(key)
+        if report is None:
+            todo.append((key, params))
+        else:
+            results.append((params, report))
+    print(f"{len(runs)} parameter sets, {len(results)} cached, {len(todo)} to run")
+
+    started = time.perf_counter()
+    try:
+        if todo:
+            run_sweep_parallel(config, todo, cache, results, objective)
+    finally:
+        cache.close()
+
+    frame = pd.DataFrame([{**params, **report} for params, report in results]).sort_values(objective, ascending=False)
+    print(f"Sweep finished in {time.perf_counter() - started:.1f} s, best by {objective}:")
+    print(frame.head(config.get('top', 10)).to_string(index=False, columns=list(runs[0][1]) + [
+        'net_profit', 'max_drawdown_pct', 'closing_deals', 'win_rate', 'profit_factor', 'recovery_factor']))
+    return frame
+
+# Stages of TradingEngine.run_cycle timed by the benchmark, in cycle order. 'take_snapshot' reads
+# the terminal for the cycle and 'publish_state' builds the rows and labels the dashboard renders.
+benchmark_stages = ('take_snapshot', 'handle_position_changes', 'process_signals', 'check_trading_hours',
+                    'manage_trades_around_news', 'reset_total_profit_if_no_position', 'apply_tp_logic',
+                    'set_stop_loss_for_all_positions', 'update_portfolio', 'check_daily_balance', 'update_required_profit_label',
+                    'update_buy_sell_price_labels', 'check_price_conditions', 'publish_state')
+benchmark_defaults = {
+    'positions': [1, 10, 100, 500], 'symbols': [1, 10, 100], 'cycles': 100, 'warmup': 10, 'signals_per_cycle': 0,
+    'call_latency': 0.0, 'seed': 1, 'baseline': "benchmark_baseline.json", 'tolerance': 0.5, 'min_delta_ms': 0.1,
+}
+
+class BenchmarkEngine(ReplayEngine):
+    """ReplayEngine on a MockBroker that also builds the dashboard state, as a live engine does."""
+    update_buy_sell_price_labels = TradingEngine.update_buy_sell_price_labels
+    publish_state = TradingEngine.publish_state
+
+def benchmark_symbols(count):
+    """The traded symbols followed by made-up pairs of major currencies, count in all."""
+    currencies = ['EUR', 'GBP', 'AUD', 'NZD', 'USD', 'CAD', 'CHF', 'JPY', 'SEK', 'NOK', 'SGD', 'HKD']
+    symbols = list(dict.fromkeys(fixed_symbols + [f"{a}{b}.r" for a in currencies for b in currencies if a != b]))
+    return symbols[:count]
+
+def benchmark_case(positions, symbols, config):
+    """Run the trading cycle on a mock broker with positions spread over symbols.
+
+    Returns the latency percentiles in ms of every stage and of the whole cycle, and the
+    terminal calls per cycle by function, measured over config['cycles'] cycles after warm-up.
+    """
+    names = benchmark_symbols(symbols)
+    broker = MockBroker({'symbols': names, 'volatility': 0.0, 'balance': 1e6, 'seed': config['seed'],
+                         'call_latency': config['call_latency']})
+    counter = InstrumentedMt5(broker)
+    previous_backend = mt5
+    use_mt5(counter)
+    engine = BenchmarkEngine(broker, Journal("benchmark", directory=None))  # Nothing is written to the log directory
+    samples = {name: [] for name in benchmark_stages + ('cycle',)}
+    for name in benchmark_stages:
+        def timed(*args, _method=getattr(engine, name), _samples=samples[name], **kwargs):
+            started = time.perf_counter()
+            try:
+                return _method(*args, **kwargs)
+            finally:
+                _samples.append(time.perf_counter() - started)
+        setattr(engine, name, timed)
+    try:
+        engine.selected_symbol = names[0]
+        engine.start_up()
+        apply_engine_config(engine, {'symbols': {symbol: {} for symbol in names}})
+        engine.run_pending()
+        for i in range(positions):
+            broker.order_send({'action': broker.TRADE_ACTION_DEAL, 'symbol': names[i % len(names)], 'volume': 0.01,
+                               'type': broker.ORDER_TYPE_BUY if i // len(names) % 2 == 0 else broker.ORDER_TYPE_SELL,
+                               'magic': 234000, 'comment': "benchmark"})
+        signals = itertools.count()
+        for cycle in range(config['warmup'] + config['cycles']):
+            if cycle == config['warmup']:
+                for values in samples.values():
+                    values.clear()
+                counter.calls.clear()
+            for _ in range(config['signals_per_cycle']):
+                n = next(signals)
+                engine.signal_receiver.push({'event': f"Trade|{names[n % len(names)]},0.01,{'Buy' if n % 2 == 0 else 'Sell'}",
+                                             'id': f"benchmark {n}"})
+            engine.tick_stream.poll()
+            engine.run_pending()
+            started = time.perf_counter()
+            engine.run_cycle()
+            samples['cycle'].append(time.perf_counter() - started)
+            engine.run_pending()
+    finally:
+        engine.order_pipeline.close()
+        engine.state_store.close()
+        broker.stop()
+        use_mt5(previous_backend)
+
+    stages = {}
+    for name, values in samples.items():
+        values = np.asarray(values) * 1000
+        if len(values):
+            p50, p90, p99 = np.percentile(values, [50, 90, 99])
+            stages[name] = {'p50': float(p50), 'p90': float(p90), 'p99': float(p99), 'max': float(values.max())}
+    calls = {name: count / config['cycles'] for name, count in sorted(counter.calls.items())}
+    return {'positions': positions, 'symbols': symbols, 'open_positions': len(broker.positions_get()),
+            'stages': stages, 'calls': calls}
+
+def benchmark_regressions(results, baseline, config):
+    """Compare results to the baseline, return one line per stage or call count that got worse.
+
+    A stage regresses when its p50 grew by more than config['tolerance'] (a fraction) and more
+    than config['min_delta_ms'], a terminal function when it is called more often per cycle.
+    """
+    cases = {(case['positions'], case['symbols']): case for case in baseline.get('cases', [])}
+    regressions = []
+    for case in results:
+        before = cases.get((case['positions'], case['symbols']))
+        if before is None:
+            continue
+        label = f"{case['positions']} positions, {case['symbols']} symbols"
+        for name, stats in case['stages'].items():
+            old = before['stages'].get(name)
+            if old and stats['p50'] > old['p50'] * (1 + config['tolerance']) and stats['p50'] - old['p50'] > config['min_delta_ms']:
+                regressions.append(f"{label}: {name} p50 {old['p50']:.3f} -> {stats['p50']:.3f} ms")
+        for name, count in case['calls'].items():
+            if count > before['calls'].get(name, 0.0) + 1e-9:
+                regressions.append(f"{label}: mt5.{name} {before['calls'].get(name, 0.0):g} -> {count:g} calls per cycle")
+    return regressions
+
+def benchmark_results(config):
+    """Run benchmark_case for every combination of config's position and symbol counts and print a line for each."""
+    results = []
+    for positions in config['positions']:
+        for symbols in config['symbols']:
+            case = benchmark_case(positions, symbols, config)
+            results.append(case)
+            cycle = case['stages']['cycle']
+            slowest = sorted(((stats['p50'], name) for name, stats in case['stages'].items() if name != 'cycle'), reverse=True)[:3]
+            print(f"{positions:4d} positions {symbols:4d} symbols: cycle p50 {cycle['p50']:7.3f} p90 {cycle['p90']:7.3f} "
+                  f"p99 {cycle['p99']:7.3f} ms, {sum(case['calls'].values()):g} mt5 calls, slowest "
+                  + ", ".join(f"{name} {p50:.3f}" for p50, name in slowest))
+    budget = TradingEngine.cycle_interval * 1000
+    over = [case for case in results if case['stages']['cycle']['p99'] > budget]
+    for case in over:
+        print(f"{case['positions']} positions, {case['symbols']} symbols: p99 over the {budget:.0f} ms cycle budget")
+    return results
+
+def check_benchmark_baseline(results, config):
+    """Compare results to the baseline file of config and return the regressions.
+
+    Without a baseline file the results are stored as the baseline, and again when config has
+    'update_baseline': true, and no regressions are returned.
+    """
+    baseline_path = config['baseline']
+    regressions = []
+    if os.path.exists(baseline_path) and not config.get('update_baseline'):
+        with open(baseline_path, 'r', encoding='utf-8') as file:
+            regressions = benchmark_regressions(results, json.load(file), config)
+        print(f"{len(regressions)} regressions against {baseline_path}")
+        for line in regressions:
+            print(f"  {line}")
+    else:
+        with open(baseline_path, 'w', encoding='utf-8') as file:
+            json.dump({'created': datetime.now().isoformat(timespec='seconds'), 'cases': results}, file, indent=1)
+        print(f"Baseline stored in {baseline_path}")
+    return regressions
+
+def run_benchmark(config_path=None):
+    """Benchmark the trading cycle for every combination of position and symbol counts.
+
+    The config file overrides benchmark_defaults. Returns the regressions against the baseline
+    (see check_benchmark_baseline), the process exits with status 1 when there are any.
+    """
+    config = dict(benchmark_defaults, **(load_engine_config(config_path) if config_path else {}))
+    return check_benchmark_baseline(benchmark_results(config), config)
+
+# The dashboard classes need PyQt, which is not loaded when the engine runs headless
+if QtWidgets is not None:
+    class PositionsTableModel(QtCore.QAbstractTableModel):
+        """Positions and pending orders of the dashboard table, keyed by ticket.
+
+        Rows are inserted and removed as tickets open and close, and only cells whose text changed
+        are reported with dataChanged, so the view repaints as little as possible every cycle.
+        """
+
+        headers = [
+            'Keys', 'Ticket', 'Symbol', 'Type', 'Volume', 'Open Price', 'Current Price',
+            'Stop Loss', 'Take Profit', 'Commission', 'Total Profit', 'Profit', 'Real Profit',
+            'Real Profit(%)', 'TP1 Level', 'TP2 Level', 'Full Close', 'Real SL'
+        ]
+        ActionsRole = QtCore.Qt.ItemDataRole.UserRole + 1
+
+        def __init__(self, parent=None):
+            super().__init__(parent)
+            self.rows = []  # (key, cells) with key ('position', ticket), ('separator', None) or ('order', ticket)
+            self.symbols = {}  # Symbol of each position ticket
+
+        def rowCount(self, parent=QtCore.QModelIndex()):
+            return 0 if parent.isValid() else len(self.rows)
+
+        def columnCount(self, parent=QtCore.QModelIndex()):
+            return 0 if parent.isValid() else len(self.headers)
+
+        def headerData(self, section, orientation, role=QtCore.Qt.ItemDataRole.DisplayRole):
+            if orientation == QtCore.Qt.Orientation.Horizontal and role == QtCore.Qt.ItemDataRole.DisplayRole:
+                return self.headers[section]
+            return super().headerData(section, orientation, role)
+
+        def data(self, index, role=QtCore.Qt.ItemDataRole.DisplayRole):
+            key, cells = self.rows[index.row()]
+            kind = key[0]
+            column = index.column()
+            if role == QtCore.Qt.ItemDataRole.DisplayRole:
+                return cells[column]
+            if role == QtCore.Qt.ItemDataRole.TextAlignmentRole:
+                if kind == 'separator' or (kind == 'position' and column in (7, 8)):
+                    return QtCore.Qt.AlignmentFlag.AlignCenter
+            elif role == QtCore.Qt.ItemDataRole.BackgroundRole:
+                if kind == 'separator':
+                    return QtGui.QColor(100, 100, 100)  # Distinguish the separator row
+                if kind == 'order':
+                    return QtGui.QColor(150, 150, 150)  # Darker grey background for better contrast
+            elif role == QtCore.Qt.ItemDataRole.ForegroundRole:
+                if kind == 'separator':
+                    return QtGui.QColor(255, 255, 255)
+                if kind == 'order':
+                    return QtGui.QColor(0, 0, 0)
+            elif role == self.ActionsRole and column == 0:
+                return key
+            return None
+
+        def update_rows(self, positions, orders):
+            columns = len(self.headers)
+            rows = [(('position', pos.ticket), ('',) + pos.cells) for pos in positions]
             if orders:
+                rows.append((('separator', None), ('Pending Orders',) + ('',) * (columns - 1)))
                 for order in orders:
-                    result = mt5.order_send(
-                        action=mt5.TRADE_ACTION_REMOVE,
-                        order=order.ticket,
-                        symbol=order.symbol,
-                        type=order.type
-                    )
-                    if result.retcode == mt5.TRADE_RETCODE_DONE:
-                        self.add_log(f"Successfully removed pending order {order.symbol}, ticket {order.ticket}")
-                    else:
-                        self.add_log(f"Failed to remove pending order {order.symbol}, ticket {order.ticket}: {result.comment}")
-            else:
-                self.add_log("No pending orders found.")
-        except Exception as e:
-            self.add_log(f"Error while removing pending orders: {e}")
+                    rows.append((('order', order.ticket), ('',) + order.cells + ('',) * (columns - 1 - len(order.cells))))
+            self.symbols = {pos.ticket: pos.symbol for pos in positions}
+
+            # Remove the rows of closed tickets, bottom up so the row numbers stay valid
+            new_keys = [key for key, _ in rows]
+            wanted = set(new_keys)
+            for row in range(len(self.rows) - 1, -1, -1):
+                if self.rows[row][0] not in wanted:
+                    self.beginRemoveRows(QtCore.QModelIndex(), row, row)
+                    del self.rows[row]
+                    self.endRemoveRows()
+
+            current_keys = [key for key, _ in self.rows]
+            kept = set(current_keys)
+            if current_keys != [key for key in new_keys if key in kept]:
+                # Remaining rows changed order, which the terminal does not normally do
+                self.beginResetModel()
+                self.rows = rows
+                self.endResetModel()
+                return
 
-        # Step 2: Write log to file
-        log_dir = "log"
-        if not os.path.exists(log_dir):
-            os.makedirs(log_dir)
+            for row, (key, cells) in enumerate(rows):
+                if row >= len(self.rows) or self.rows[row][0] != key:
+                    self.beginInsertRows(QtCore.QModelIndex(), row, row)
+                    self.rows.insert(row, (key, cells))
+                    self.endInsertRows()
+                    continue
+                changed = [column for column, (old, new) in enumerate(zip(self.rows[row][1], cells)) if old != new]
+                if changed:
+                    self.rows[row] = (key, cells)
+                    self.dataChanged.emit(self.index(row, changed[0]), self.index(row, changed[-1]), [QtCore.Qt.ItemDataRole.DisplayRole])
+
+    class RowActionsDelegate(QtWidgets.QStyledItemDelegate):
+        """Paints the action buttons of the 'Keys' column and reports clicks on them.
+
+        The buttons are drawn rather than created as widgets, so refreshing the table creates no
+        widgets and a click cannot be lost to a button being replaced under the mouse.
+        """
+
+        action_clicked = QtCore.pyqtSignal(str, object)  # Engine command and row key
+
+        # (text, background, text color, width, engine command)
+        position_buttons = (
+            ("✖", "red", "white", 25, 'close_trade'),
+            ("TP1", "green", "white", 25, 'apply_tp1_manual'),
+            ("TP2", "yellow", "black", 25, 'apply_tp2_manual'),
+            ("BE", "blue", "white", 25, 'break_even'),
+            ("Reset-P", "blue", "white", 55, 'reset_symbol_profit'),
+            ("REVERSE", "purple", "white", 55, 'reverse_trade')
+        )
+        order_buttons = (
+            ("✖", "red", "white", 25, 'close_order'),
+        )
+
+        def row_buttons(self, index):
+            key = index.data(PositionsTableModel.ActionsRole)
+            if key is None or key[0] == 'separator':
+                return key, ()
+            return key, self.position_buttons if key[0] == 'position' else self.order_buttons
+
+        def button_rects(self, rect, buttons):
+            x = rect.left()
+            top = rect.top() + (rect.height() - 20) // 2
+            for button in buttons:
+                yield button, QtCore.QRect(x, top, button[3], 20)
+                x += button[3] + 5
+
+        def paint(self, painter, option, index):
+            key, buttons = self.row_buttons(index)
+            if not buttons:
+                super().paint(painter, option, index)
+                return
+            if key[0] == 'order':
+                painter.fillRect(option.rect, index.data(QtCore.Qt.ItemDataRole.BackgroundRole))
+            painter.save()
+            for (text, background, color, _, _), rect in self.button_rects(option.rect, buttons):
+                painter.fillRect(rect, QtGui.QColor(background))
+                painter.setPen(QtGui.QColor(color))
+                painter.drawText(rect, QtCore.Qt.AlignmentFlag.AlignCenter, text)
+            painter.restore()
+
+        def editorEvent(self, event, model, option, index):
+            if event.type() == QtCore.QEvent.Type.MouseButtonRelease:
+                key, buttons = self.row_buttons(index)
+                for button, rect in self.button_rects(option.rect, buttons):
+                    if rect.contains(event.position().toPoint()):
+                        self.action_clicked.emit(button[4], key)
+                        return True
+            return super().editorEvent(event, model, option, index)
+
+    class TradingDashboard(QtWidgets.QWidget):
+        def __init__(self, engine):
+            super().__init__()
+
+            # The engine owns the trading state, the dashboard only renders it and sends commands
+            self.engine = engine
+            self.auto_trading = engine.auto_trading
+            self.news_management_active = engine.news_management_active
+            self.usetotal = engine.usetotal
+            self.symbol_widgets = {}
+
+            self.init_ui()
+
+            # Render engine events on the GUI thread
+            self.event_timer = QtCore.QTimer(self)
+            self.event_timer.timeout.connect(self.process_engine_events)
+            self.event_timer.start(50)
+
+        def init_ui(self):
+            self.show_account(self.engine.account_login)
+            self.setGeometry(100, 100, 1920, 1080)
+
+            layout = QtWidgets.QVBoxLayout(self)
+
+            self.table = QtWidgets.QTableView(self)
+            self.table_model = PositionsTableModel(self)
+            self.table.setModel(self.table_model)
+            self.actions_delegate = RowActionsDelegate(self.table)
+            self.actions_delegate.action_clicked.connect(self.handle_row_action)
+            self.table.setItemDelegateForColumn(0, self.actions_delegate)
+            self.separator_row = None  # Row of the "Pending Orders" separator, spanned over all columns
+            layout.addWidget(self.table)
+
+            # Set column widths
+            self.table.setColumnWidth(0, 280)  # Keys (adjust as needed for action buttons)
+            self.table.setColumnWidth(1, 120)  # Ticket
+            self.table.setColumnWidth(2, 120)  # Symbol
+            self.table.setColumnWidth(3, 80)   # Type
+            self.table.setColumnWidth(4, 60)   # Volume
+            self.table.setColumnWidth(5, 110)  # Open Price
+            self.table.setColumnWidth(6, 110)  # Current Price
+            self.table.setColumnWidth(7, 110)  # Stop Loss
+            self.table.setColumnWidth(8, 110)  # Take Profit
+            self.table.setColumnWidth(9, 80)   # Commission
+            self.table.setColumnWidth(10, 90)  # Total Profit
+            self.table.setColumnWidth(11, 90)  # Profit
+            self.table.setColumnWidth(12, 90)  # Real Profit
+            self.table.setColumnWidth(13, 95)  # Real Profit(%)
+            self.table.setColumnWidth(14, 80)  # TP1 Level
+            self.table.setColumnWidth(15, 80)  # TP2 Level
+            self.table.setColumnWidth(16, 80)  # Full Close
+            self.table.setColumnWidth(17, 80)  # Real SL
+
+            controls_layout = QtWidgets.QHBoxLayout()
+            controls_layout.setSpacing(5)  # Add spacing between elements
+            controls_layout.setContentsMargins(5, 5, 5, 5)  # Set margins
+
+            self.required_profit_label = QtWidgets.QLabel("Required Profit to Close all: 0.00", self)
+
+            self.buy_price_label = QtWidgets.QLabel("|                                             Buy Price: 0.00", self)
+
+            self.sell_price_label = QtWidgets.QLabel("|                                            Sell Price: 0.00", self)
         
-        log_filename = os.path.join(log_dir, datetime.now().strftime("log_%Y%m%d_%H%M%S.txt"))
-        with open(log_filename, "w") as log_file:
-            log_file.write(self.log_display.toPlainText())
+            self.total_real_profit_label = QtWidgets.QLabel("Total Real Profit: 0.00", self)
+            self.total_real_profit_label.setAlignment(QtCore.Qt.AlignmentFlag.AlignRight)
+
+            price_layout = QtWidgets.QHBoxLayout()
+            price_layout.addWidget(self.required_profit_label)
+            price_layout.addWidget(self.buy_price_label)
+            price_layout.addWidget(self.sell_price_label)
+            price_layout.addWidget(self.total_real_profit_label)
+
+            self.price_group_box = QtWidgets.QGroupBox("Important Data")
+            self.price_group_box.setLayout(price_layout)
+
+            layout.addWidget(self.price_group_box)
+
+
+            self.update_daily_profit_button = QtWidgets.QPushButton("Change D P T", self)
+            self.update_daily_profit_button.setStyleSheet("background-color: grey; color: white;")
+            self.update_daily_profit_button.clicked.connect(self.update_daily_profit_target)
+            self.update_daily_profit_button.setMaximumWidth(100)
+            controls_layout.addWidget(self.update_daily_profit_button)
+
+            self.add_symbol_button = QtWidgets.QPushButton("Add/Update", self)
+            self.add_symbol_button.setStyleSheet("background-color: grey; color: white;")
+            self.add_symbol_button.clicked.connect(self.add_symbol)
+            self.add_symbol_button.setMaximumWidth(100)
+            controls_layout.addWidget(self.add_symbol_button)
+
+            self.symbol_combobox = QtWidgets.QComboBox(self)
+            self.symbol_combobox.addItems(fixed_symbols)
+            font = self.symbol_combobox.font()
+            font.setPointSize(8)
+            self.symbol_combobox.setFont(font)
+            self.symbol_combobox.setMaximumWidth(140)
+            self.symbol_combobox.view().setSpacing(3)
+            self.symbol_combobox.currentIndexChanged.connect(self.update_selected_symbol)
+
+            controls_layout.addWidget(self.symbol_combobox)
+
+            # Add the control buttons for new features
+            self.close_all_button = QtWidgets.QPushButton("Close All", self)
+            self.close_all_button.setStyleSheet("background-color: orange; color: white;")
+            self.close_all_button.clicked.connect(self.close_all_positions)
+            self.close_all_button.setMaximumWidth(140)
+            controls_layout.addWidget(self.close_all_button)
+
+            # Add the "Clear All Orders" button
+            self.clear_all_orders_button = QtWidgets.QPushButton("Clear All Orders", self)
+            self.clear_all_orders_button.setStyleSheet("background-color: grey; color: white;")
+            self.clear_all_orders_button.clicked.connect(self.clear_all_orders)
+            self.clear_all_orders_button.setMaximumWidth(150)
+            controls_layout.addWidget(self.clear_all_orders_button)
+
+            self.close_all_profit_button = QtWidgets.QPushButton("Close All on Profit", self)
+            self.close_all_profit_button.setStyleSheet("background-color: green; color: white;")
+            self.close_all_profit_button.clicked.connect(self.close_all_in_profit)
+            self.close_all_profit_button.setMaximumWidth(160)
+            controls_layout.addWidget(self.close_all_profit_button)
+
+            self.close_all_loss_button = QtWidgets.QPushButton("Close All in Loss", self)
+            self.close_all_loss_button.setStyleSheet("background-color: red; color: white;")
+            self.close_all_loss_button.clicked.connect(self.close_all_in_loss)
+            self.close_all_loss_button.setMaximumWidth(160)
+            controls_layout.addWidget(self.close_all_loss_button)
+
+            self.auto_trading_button = QtWidgets.QPushButton("Auto Trading: On", self)
+            self.auto_trading_button.setStyleSheet("background-color: green; color: white;")
+            self.auto_trading_button.clicked.connect(self.toggle_auto_trading)
+            self.auto_trading_button.setMaximumWidth(120)
+            controls_layout.addWidget(self.auto_trading_button)
+
+            self.news_management_button = QtWidgets.QPushButton("News Management: on", self)
+            self.news_management_button.setStyleSheet("background-color: green; color: white;")
+            self.news_management_button.clicked.connect(self.toggle_news_management)
+            self.news_management_button.setMaximumWidth(165)
+            controls_layout.addWidget(self.news_management_button)
+
+            self.usetotal_button = QtWidgets.QPushButton("Use Total Profit: On", self)
+            self.usetotal_button.setStyleSheet("background-color: green; color: white;")
+            self.usetotal_button.clicked.connect(self.toggle_usetotal)
+            self.usetotal_button.setMaximumWidth(150)
+            controls_layout.addWidget(self.usetotal_button)
+
+            self.reset_total_profit_button = QtWidgets.QPushButton("Reset Total Profit", self)
+            self.reset_total_profit_button.setStyleSheet("background-color: orange; color: black;")
+            self.reset_total_profit_button.clicked.connect(self.reset_total_profit)
+            self.reset_total_profit_button.setMaximumWidth(150)
+            controls_layout.addWidget(self.reset_total_profit_button)
+
+            self.trade_mode_combobox = QtWidgets.QComboBox(self)
+            self.trade_mode_combobox.addItems(["Single Direction", "Hedging", "All Signals", "Smart Hedging"])
+            self.trade_mode_combobox.setCurrentIndex(trade_management_mode - 1)
+            self.trade_mode_combobox.currentIndexChanged.connect(self.update_trade_management_mode)
+            self.trade_mode_combobox.setMaximumWidth(160)
+            controls_layout.addWidget(self.trade_mode_combobox)
+
+            layout.addLayout(controls_layout)
+
+            self.variables_layout = QtWidgets.QGridLayout()
+            self.variables_layout.setSpacing(5)
+            self.variables_layout.setContentsMargins(5, 5, 5, 5)
+
+            self.variables_layout.addWidget(QtWidgets.QLabel("Daily Profit Target (%):"), 0, 0)
+            self.daily_profit_target_entry = QtWidgets.QDoubleSpinBox(self)
+            self.daily_profit_target_entry.setValue(self.engine.daily_profit_target)
+            self.daily_profit_target_entry.setMaximum(100000.00)
+            self.daily_profit_target_entry.setFixedWidth(100)
+            self.daily_profit_target_entry.setMaximumWidth(200)
+            self.daily_profit_target_entry.setToolTip("Daily profit target to stop trading for All symbol")
+            self.variables_layout.addWidget(self.daily_profit_target_entry, 0, 1)
+
+            spacer_item = QtWidgets.QSpacerItem(20, 20, QtWidgets.QSizePolicy.Policy.Expanding, QtWidgets.QSizePolicy.Policy.Minimum)
+            self.variables_layout.addItem(spacer_item, 0, 2)  # Add spacer between widgets
+
+            self.variables_layout.addWidget(QtWidgets.QLabel("TP1 (%):"), 0, 3)
+            self.tp1_entry = QtWidgets.QDoubleSpinBox(self)
+            self.tp1_entry.setValue(self.engine.tp1)
+            self.tp1_entry.setMinimumWidth(100)
+            self.tp1_entry.setMaximumWidth(200)
+            self.tp1_entry.setToolTip("Take Profit level 1 percentage for All symbol")
+            self.variables_layout.addWidget(self.tp1_entry, 0, 4)
+
+            spacer_item = QtWidgets.QSpacerItem(20, 20, QtWidgets.QSizePolicy.Policy.Expanding, QtWidgets.QSizePolicy.Policy.Minimum)
+            self.variables_layout.addItem(spacer_item, 0, 5)  # Add spacer between widgets
+
+            self.variables_layout.addWidget(QtWidgets.QLabel("TP2 (%):"), 0, 6)
+            self.tp2_entry = QtWidgets.QDoubleSpinBox(self)
+            self.tp2_entry.setValue(self.engine.tp2)
+            self.tp2_entry.setMinimumWidth(100)
+            self.tp2_entry.setMaximumWidth(200)
+            self.tp2_entry.setToolTip("Take Profit level 2 percentage for All symbol")
+            self.variables_layout.addWidget(self.tp2_entry, 0, 7)
+
+            spacer_item_1 = QtWidgets.QSpacerItem(20, 20, QtWidgets.QSizePolicy.Policy.Expanding, QtWidgets.QSizePolicy.Policy.Minimum)
+            self.variables_layout.addItem(spacer_item_1, 0, 8)  # Add spacer between widgets
+
+            self.variables_layout.addWidget(QtWidgets.QLabel("Commission:"), 0, 9)
+            self.commission_entry = QtWidgets.QDoubleSpinBox(self)
+            self.commission_entry.setValue(self.engine.commission)
+            self.commission_entry.setMaximumWidth(140)
+            self.commission_entry.setFixedWidth(100)
+            self.commission_entry.setToolTip("Commission per lot for each symbol")
+            self.variables_layout.addWidget(self.commission_entry, 0, 10)
+
+            spacer_item_2 = QtWidgets.QSpacerItem(20, 20, QtWidgets.QSizePolicy.Policy.Expanding, QtWidgets.QSizePolicy.Policy.Fixed)
+            self.variables_layout.addItem(spacer_item_2, 0, 11)  # Add spacer between widgets
+
+            self.variables_layout.addWidget(QtWidgets.QLabel("R1 (%):"), 0, 12)
+            self.R1_entry = QtWidgets.QDoubleSpinBox(self)
+            self.R1_entry.setValue(self.engine.R1)
+            self.R1_entry.setMaximum(100.00)
+            self.R1_entry.setMinimumWidth(100)
+            self.R1_entry.setMaximumWidth(200)
+            self.R1_entry.setToolTip("Required profit level 1 as a percentage of balance for each symbol")
+            self.variables_layout.addWidget(self.R1_entry, 0, 13)
+
+            spacer_item_3 = QtWidgets.QSpacerItem(20, 20, QtWidgets.QSizePolicy.Policy.Expanding, QtWidgets.QSizePolicy.Policy.Fixed)
+            self.variables_layout.addItem(spacer_item_3, 0, 14)
+
+            self.variables_layout.addWidget(QtWidgets.QLabel("R2 (%):"), 0, 15)
+            self.R2_entry = QtWidgets.QDoubleSpinBox(self)
+            self.R2_entry.setValue(self.engine.R2)
+            self.R2_entry.setMaximum(100.00)
+            self.R2_entry.setMinimumWidth(100)
+            self.R2_entry.setMaximumWidth(200)
+            self.R2_entry.setToolTip("Required profit level 2 as a percentage of balance for each symbol")
+            self.variables_layout.addWidget(self.R2_entry, 0, 16)
+
+            spacer_item_4 = QtWidgets.QSpacerItem(20, 20, QtWidgets.QSizePolicy.Policy.Expanding, QtWidgets.QSizePolicy.Policy.Fixed)
+            self.variables_layout.addItem(spacer_item_4, 0, 17)
+
+            self.variables_layout.addWidget(QtWidgets.QLabel("R3 (%):"), 0, 18)
+            self.R3_entry = QtWidgets.QDoubleSpinBox(self)
+            self.R3_entry.setValue(self.engine.R3)
+            self.R3_entry.setMaximum(100.00)
+            self.R3_entry.setMinimumWidth(100)
+            self.R3_entry.setMaximumWidth(200)
+            self.R3_entry.setToolTip("Additional required profit level for total profit check as a percentage of balance for each symbol")
+            self.variables_layout.addWidget(self.R3_entry, 0, 19)
+
+            layout.addLayout(self.variables_layout)
+
+            self.news_info_label = QtWidgets.QLabel("News Info: No upcoming news", self)
+            layout.addWidget(self.news_info_label)
+
+            self.time_to_news_label = QtWidgets.QLabel("Time to News: N/A", self)
+            layout.addWidget(self.time_to_news_label)
+
+            self.time_after_news_label = QtWidgets.QLabel("Time After News: N/A", self)
+            layout.addWidget(self.time_after_news_label)
+
+            self.quiet_hours_label = QtWidgets.QLabel("Quiet Hours: Trading hours active", self)
+            layout.addWidget(self.quiet_hours_label)
+
+            self.readiness_label = QtWidgets.QLabel("Starting: terminal connecting, signals starting, news loading", self)
+            layout.addWidget(self.readiness_label)
+
+            # Create a layout for manual trading buttons
+            self.manual_trade_layout = QtWidgets.QVBoxLayout()
+            self.manual_trade_buttons = {}
+            layout.addLayout(self.manual_trade_layout)
+
+            # Latency of the cycle stages, terminal calls and requests, filled in while it is checked
+            self.diagnostics_group_box = QtWidgets.QGroupBox("Diagnostics", self)
+            self.diagnostics_group_box.setCheckable(True)
+            self.diagnostics_group_box.setChecked(False)
+            self.diagnostics_table = QtWidgets.QTableWidget(0, 7, self)
+            self.diagnostics_table.setHorizontalHeaderLabels(["Metric", "Of", "Count", "Errors", "Mean (ms)", "p99 (ms)", "Max (ms)"])
+            self.diagnostics_table.verticalHeader().setVisible(False)
+            self.diagnostics_table.setEditTriggers(QtWidgets.QAbstractItemView.EditTrigger.NoEditTriggers)
+            self.diagnostics_table.setFixedHeight(160)
+            self.diagnostics_table.setVisible(False)
+            self.diagnostics_group_box.toggled.connect(self.diagnostics_table.setVisible)
+            diagnostics_layout = QtWidgets.QVBoxLayout()
+            diagnostics_layout.addWidget(self.diagnostics_table)
+            self.diagnostics_group_box.setLayout(diagnostics_layout)
+            layout.addWidget(self.diagnostics_group_box)
+
+            # Log Display Widget
+            self.log_display = QtWidgets.QPlainTextEdit(self)
+            self.log_display.setReadOnly(True)
+            # The full history is in the journal, the view only keeps the latest lines
+            self.log_display.setMaximumBlockCount(log_display_lines)
+            self.log_display.setFixedHeight(120)
+            layout.addWidget(self.log_display)
+
+            self.setLayout(layout)
+
+        def process_engine_events(self):
+            """Append the engine's log lines and render its latest published state."""
+            state = None
+            while True:
+                try:
+                    event = self.engine.event_queue.get_nowait()
+                except queue.Empty:
+                    break
+                if isinstance(event, LogEvent):
+                    self.log_display.appendPlainText(event.text)
+                elif isinstance(event, StateEvent):
+                    state = event
+                elif isinstance(event, SymbolsRestored):
+                    for symbol, settings in event.settings.items():
+                        self.add_symbol_widgets(symbol)
+                        self.show_symbol_settings(symbol, settings)
+                elif isinstance(event, Readiness):
+                    self.show_readiness(event)
+            if state is not None:
+                with metrics.timer('dashboard_render_seconds'):
+                    self.update_gui(state)
+
+        def show_account(self, login):
+            self.setWindowTitle(f"Hani Trading Dashboard,     Platform: {strategy_name},      Account Number: {login if login is not None else 'connecting...'}")
+
+        def show_readiness(self, readiness):
+            states = readiness.subsystems
+            # Trading starts with the terminal and the signals, the news may still be the cached ones
+            ready = states.get('terminal') == "ready" and states.get('signals') == "ready"
+            self.readiness_label.setText(("Ready: " if ready else "Starting: ") + ", ".join(f"{name} {state}" for name, state in states.items()))
+            if readiness.account_login is not None:
+                self.show_account(readiness.account_login)
+
+        def clear_all_orders(self):
+            self.engine.submit('clear_all_orders')
+
+        def close_all_positions(self):
+            self.engine.submit('close_all_positions')
+
+        def close_all_in_profit(self):
+            self.engine.submit('close_all_in_profit')
+
+        def close_all_in_loss(self):
+            self.engine.submit('close_all_in_loss')
+
+        def update_trade_management_mode(self):
+            self.engine.submit('set_trade_management_mode', self.trade_mode_combobox.currentIndex() + 1)
+
+        def update_selected_symbol(self):
+            self.engine.submit('select_symbol', self.symbol_combobox.currentText())
+
+        def toggle_auto_trading(self):
+            self.auto_trading = not self.auto_trading
+            self.auto_trading_button.setText("Auto Trading: On" if self.auto_trading else "Auto Trading: Off")
+            self.auto_trading_button.setStyleSheet("background-color: green; color: white;" if self.auto_trading else "background-color: red; color: white;")
+            self.engine.submit('set_auto_trading', self.auto_trading)
+
+        def toggle_news_management(self):
+            self.news_management_active = not self.news_management_active
+            self.news_management_button.setText("News Management: On" if self.news_management_active else "News Management: Off")
+            self.news_management_button.setStyleSheet("background-color: green; color: white;" if self.news_management_active else "background-color: red; color: white;")
+            self.engine.submit('set_news_management', self.news_management_active)
+
+        def toggle_usetotal(self):
+            self.usetotal = not self.usetotal
+            self.usetotal_button.setText("Use Total Profit: On" if self.usetotal else "Use Total Profit: Off")
+            self.usetotal_button.setStyleSheet("background-color: green; color: white;" if self.usetotal else "background-color: red; color: white;")
+            self.engine.submit('set_usetotal', self.usetotal)
+
+        def reset_total_profit(self):
+            self.engine.submit('reset_total_profit')
+
+        def update_daily_profit_target(self):
+            self.engine.submit('set_daily_profit_target', self.daily_profit_target_entry.value())
+
+        def handle_row_action(self, action, key):
+            ticket = key[1]
+            if action == 'reset_symbol_profit':
+                self.engine.submit(action, self.table_model.symbols[ticket])
+            else:
+                self.engine.submit(action, ticket)
+
+        def update_gui(self, state):
+            self.table_model.update_rows(state.positions, state.orders)
+
+            # Merge the cells of the "Pending Orders" separator row
+            separator_row = len(state.positions) if state.orders else None
+            if separator_row != self.separator_row:
+                self.table.clearSpans()
+                if separator_row is not None:
+                    self.table.setSpan(separator_row, 0, 1, self.table_model.columnCount())
+                self.separator_row = separator_row
+
+            label_widgets = {
+                'required_profit': self.required_profit_label,
+                'total_real_profit': self.total_real_profit_label,
+                'buy_price': self.buy_price_label,
+                'sell_price': self.sell_price_label,
+                'news_info': self.news_info_label,
+                'time_to_news': self.time_to_news_label,
+                'time_after_news': self.time_after_news_label,
+                'quiet_hours': self.quiet_hours_label
+            }
+            for name, text in state.labels.items():
+                label_widgets[name].setText(text)
+
+            if self.diagnostics_group_box.isChecked():
+                self.update_diagnostics(state.diagnostics)
+
+        def update_diagnostics(self, diagnostics):
+            # An attached dashboard adds its own rendering time to the engine's metrics
+            rows = {(row['name'], row['value']): row for row in diagnostics}
+            for row in metrics.summary():
+                rows.setdefault((row['name'], row['value']), row)
+            self.diagnostics_table.setRowCount(len(rows))
+            for i, row in enumerate(rows.values()):
+                texts = [row['name'], row['value'] or '', str(row['count']), str(row['errors']),
+                         f"{row['mean_ms']:.2f}", f"{row['p99_ms']:.2f}", f"{row['max_ms']:.2f}"]
+                for column, text in enumerate(texts):
+                    item = self.diagnostics_table.item(i, column)
+                    if item is None:
+                        self.diagnostics_table.setItem(i, column, QtWidgets.QTableWidgetItem(text))
+                    elif item.text() != text:
+                        item.setText(text)
+
+        def show_news_alert(self, news):
+            alert_message = f"High Impact News Alert!\n\nCurrency: {news['currency']}\nImpact: {news['impact']}\nTime: {news['date'].strftime('%Y-%m-%d %H:%M:%S')}"
         
-        self.add_log(f"Logs saved to {log_filename}")
+            msg_box = QMessageBox()
+            msg_box.setIcon(QMessageBox.Icon.Information)
+            msg_box.setWindowTitle("News Alert")
+            msg_box.setText(alert_message)
+            msg_box.setStandardButtons(QMessageBox.StandardButton.Ok)
         
-        # Step 3: Accept the event to close the platform
-        event.accept()
+            self.add_log(f"Displaying news alert: {alert_message}")
+            msg_box.exec()
+
+        def add_symbol(self):
+            symbol = self.symbol_combobox.currentText()
+            self.engine.submit(
+                'add_symbol', symbol, self.commission_entry.value(), self.tp1_entry.value(), self.tp2_entry.value(),
+                self.R1_entry.value(), self.R2_entry.value(), self.R3_entry.value()
+            )
 
-def main():
-    app = QtWidgets.QApplication([])
-    dashboard = TradingDashboard()
+            if symbol in self.symbol_widgets:
+                # Adding the symbol again turns pivot usage and new trade permission off
+                widgets = self.symbol_widgets[symbol]
+                widgets['pivot_toggle_button'].setChecked(False)
+                widgets['pivot_toggle_button'].setText("Use Pivot: Off")
+                widgets['pivot_toggle_button'].setStyleSheet("background-color: red; color: white;")
+                widgets['allow_new_trade_button'].setChecked(False)
+                widgets['allow_new_trade_button'].setText("Allow New Trade: Off")
+                widgets['allow_new_trade_button'].setStyleSheet("background-color: red; color: white;")
+
+            self.add_symbol_widgets(symbol)
+
+        def add_symbol_widgets(self, symbol):
+            if symbol not in self.manual_trade_buttons:
+                # Create manual trade buttons for the new symbol
+                widgets = self.symbol_widgets[symbol] = {}
+                symbol_layout = QtWidgets.QHBoxLayout()
+                symbol_layout.setSpacing(5)
+
+                label = QtWidgets.QLabel(symbol, self)
+                symbol_layout.addWidget(label)
+
+                # Spacer for proper alignment
+                spacer_item_1 = QtWidgets.QSpacerItem(
+                    1000, 15, QtWidgets.QSizePolicy.Policy.Expanding, QtWidgets.QSizePolicy.Policy.Minimum
+                )
+                symbol_layout.addItem(spacer_item_1)
+
+                # Toggle Pivot usage button
+                pivot_toggle_button = QtWidgets.QPushButton("Use Pivot: Off", self)
+                pivot_toggle_button.setCheckable(True)
+                pivot_toggle_button.setChecked(False)
+                pivot_toggle_button.setStyleSheet("background-color: red; color: white;")
+                pivot_toggle_button.clicked.connect(lambda _, s=symbol: self.toggle_pivot_usage(s))
+                symbol_layout.addWidget(pivot_toggle_button)
+                # Store the button reference
+                widgets['pivot_toggle_button'] = pivot_toggle_button
+
+                # Allow new trades button
+                allow_new_trade_button = QtWidgets.QPushButton("Allow New Trade: Off", self)
+                allow_new_trade_button.setCheckable(True)
+                allow_new_trade_button.setChecked(False)
+                allow_new_trade_button.setStyleSheet("background-color: red; color: white;")
+                allow_new_trade_button.clicked.connect(lambda _, s=symbol: self.toggle_new_trade_permission(s))
+                symbol_layout.addWidget(allow_new_trade_button)
+                # Store the button reference
+                widgets['allow_new_trade_button'] = allow_new_trade_button
+
+                # Add new fields for risk and price distance
+                risk_label = QtWidgets.QLabel("Risk (%):", self)
+                symbol_layout.addWidget(risk_label)
+
+                risk_entry = QtWidgets.QLineEdit(self)
+                risk_entry.setText("0.00")  # Default to zero risk for static lot size
+                risk_entry.setMaximumWidth(60)
+                symbol_layout.addWidget(risk_entry)
+
+                distance_label = QtWidgets.QLabel("Distance:", self)
+                symbol_layout.addWidget(distance_label)
+
+                distance_entry = QtWidgets.QLineEdit(self)
+                distance_entry.setText("0.0")  # Default to zero distance
+                distance_entry.setMaximumWidth(60)
+                symbol_layout.addWidget(distance_entry)
+
+                # Existing manual trade entries (lot size, martingale multiplier, etc.)
+                volume_label = QtWidgets.QLabel("Lot Size:", self)
+                symbol_layout.addWidget(volume_label)
+
+                volume_entry = QtWidgets.QLineEdit(self)
+                volume_entry.setText("0.01")
+                volume_entry.setMaximumWidth(60)
+                symbol_layout.addWidget(volume_entry)
+
+                # Spacer for proper alignment
+                spacer_item_2 = QtWidgets.QSpacerItem(
+                    10, 15, QtWidgets.QSizePolicy.Policy.Expanding, QtWidgets.QSizePolicy.Policy.Minimum
+                )
+                symbol_layout.addItem(spacer_item_2)
+
+                martingale_label = QtWidgets.QLabel("Martingale Multiplier:", self)
+                symbol_layout.addWidget(martingale_label)
 
-    dashboard.read_news_from_excel()
+                martingale_entry = QtWidgets.QLineEdit(self)
+                martingale_entry.setText("1.0")  # Default multiplier
+                martingale_entry.setMaximumWidth(60)
+                symbol_layout.addWidget(martingale_entry)
+
+                # Add new field for loss threshold
+                loss_threshold_label = QtWidgets.QLabel("Close Loss (%):", self)
+                loss_threshold_label.setAlignment(
+                    QtCore.Qt.AlignmentFlag.AlignRight | QtCore.Qt.AlignmentFlag.AlignVCenter
+                )
+                symbol_layout.addWidget(loss_threshold_label)
+
+                loss_threshold_entry = QtWidgets.QDoubleSpinBox(self)
+                loss_threshold_entry.setValue(0.0)
+                loss_threshold_entry.setDecimals(2)
+                loss_threshold_entry.setSingleStep(0.1)
+                loss_threshold_entry.setMaximum(120.0)
+                loss_threshold_entry.setFixedWidth(100)
+                loss_threshold_entry.setSizePolicy(
+                    QtWidgets.QSizePolicy.Policy.Fixed, QtWidgets.QSizePolicy.Policy.Fixed
+                )
+                loss_threshold_entry.setToolTip("Close position if loss percentage exceeds this value")
+                symbol_layout.addWidget(loss_threshold_entry)
+
+                # Add new fields for Sell Price and Buy Price
+                sell_price_label = QtWidgets.QLabel("Sell Price:", self)
+                symbol_layout.addWidget(sell_price_label)
+
+                sell_price_entry = QtWidgets.QLineEdit(self)
+                sell_price_entry.setText("100000.0")  # Default to zero, meaning no action
+                sell_price_entry.setMaximumWidth(100)
+                sell_price_entry.setFixedWidth(85)
+                symbol_layout.addWidget(sell_price_entry)
+
+                buy_price_label = QtWidgets.QLabel("Buy Price:", self)
+                symbol_layout.addWidget(buy_price_label)
+
+                buy_price_entry = QtWidgets.QLineEdit(self)
+                buy_price_entry.setText("0.0")  # Default to zero, meaning no action
+                buy_price_entry.setMaximumWidth(100)
+                buy_price_entry.setFixedWidth(85)
+                symbol_layout.addWidget(buy_price_entry)
+
+                sl_adjust_label = QtWidgets.QLabel("SL Adjust (Points):", self)
+                symbol_layout.addWidget(sl_adjust_label)
+
+                sl_adjust_entry = QtWidgets.QLineEdit(self)
+                sl_adjust_entry.setText("0.0")  # Default to zero
+                sl_adjust_entry.setMaximumWidth(100)
+                sl_adjust_entry.setFixedWidth(85)
+                symbol_layout.addWidget(sl_adjust_entry)
+
+                # Store the entry with the symbol widgets
+                widgets['sl_adjust_entry'] = sl_adjust_entry
+
+                # Store entries with the symbol widgets
+                widgets['risk_entry'] = risk_entry
+                widgets['distance_entry'] = distance_entry
+                widgets['volume_entry'] = volume_entry
+                widgets['martingale_entry'] = martingale_entry
+                widgets['sell_price_entry'] = sell_price_entry
+                widgets['buy_price_entry'] = buy_price_entry
+                widgets['loss_threshold_entry'] = loss_threshold_entry
+
+                # Add an "Update" button
+                update_button = QtWidgets.QPushButton("Update", self)
+                update_button.setStyleSheet("background-color: grey; color: white;")
+                update_button.setMaximumWidth(80)
+                update_button.clicked.connect(
+                    lambda _, s=symbol: self.update_symbol_settings(s)
+                )
+                symbol_layout.addWidget(update_button)
+
+                # Spacer for proper alignment before buttons
+                spacer_item_4 = QtWidgets.QSpacerItem(
+                    10, 15, QtWidgets.QSizePolicy.Policy.Expanding, QtWidgets.QSizePolicy.Policy.Minimum
+                )
+                symbol_layout.addItem(spacer_item_4)
+
+                # Manual trade buttons
+                sell_button = QtWidgets.QPushButton("Sell", self)
+                sell_button.setStyleSheet("background-color: red; color: white;")
+                sell_button.clicked.connect(
+                    lambda _, s=symbol: self.manual_trade(s, "Sell")
+                )
+                sell_button.setMaximumWidth(100)
+                symbol_layout.addWidget(sell_button)
+
+                buy_button = QtWidgets.QPushButton("Buy", self)
+                buy_button.setStyleSheet("background-color: green; color: white;")
+                buy_button.clicked.connect(
+                    lambda _, s=symbol: self.manual_trade(s, "Buy")
+                )
+                buy_button.setMaximumWidth(100)
+                symbol_layout.addWidget(buy_button)
+
+                reverse_button = QtWidgets.QPushButton("Reverse", self)
+                reverse_button.setStyleSheet("background-color: purple; color: white;")
+                reverse_button.clicked.connect(
+                    lambda _, s=symbol: self.manual_reverse(s)
+                )
+                reverse_button.setMaximumWidth(100)
+                symbol_layout.addWidget(reverse_button)
+
+                self.manual_trade_buttons[symbol] = symbol_layout
+                self.manual_trade_layout.addLayout(symbol_layout)
+
+        def update_symbol_settings(self, symbol):
+            widgets = self.symbol_widgets[symbol]
+            try:
+                # Read values from input fields
+                values = {
+                    'sell_price': float(widgets['sell_price_entry'].text()),
+                    'buy_price': float(widgets['buy_price_entry'].text()),
+                    'risk': float(widgets['risk_entry'].text()),
+                    'distance': float(widgets['distance_entry'].text()),
+                    'volume': float(widgets['volume_entry'].text()),
+                    'martingale_multiplier': float(widgets['martingale_entry'].text()),
+                    'loss_threshold': widgets['loss_threshold_entry'].value(),
+                    'sl_adjust': float(widgets['sl_adjust_entry'].text())
+                }
+            except ValueError as e:
+                self.add_log(f"Invalid input for {symbol}: {e}")
+                return
+            self.engine.submit('update_symbol_settings', symbol, values)
+
+        def show_symbol_settings(self, symbol, settings):
+            """Fill the symbol's entries and toggles with settings restored by the engine."""
+            widgets = self.symbol_widgets[symbol]
+            entries = {
+                'risk': 'risk_entry', 'distance': 'distance_entry', 'volume': 'volume_entry',
+                'martingale_multiplier': 'martingale_entry', 'sell_price': 'sell_price_entry',
+                'buy_price': 'buy_price_entry', 'sl_adjust': 'sl_adjust_entry'
+            }
+            for key, name in entries.items():
+                if key in settings:
+                    widgets[name].setText(str(settings[key]))
+            widgets['loss_threshold_entry'].setValue(settings.get('loss_threshold', 0.0))
+            for key, name, text in (('use_pivot', 'pivot_toggle_button', "Use Pivot"),
+                                    ('allow_new_trade', 'allow_new_trade_button', "Allow New Trade")):
+                enabled = settings.get(key, False)
+                widgets[name].setChecked(enabled)
+                widgets[name].setText(f"{text}: {'On' if enabled else 'Off'}")
+                widgets[name].setStyleSheet(f"background-color: {'green' if enabled else 'red'}; color: white;")
+
+        def toggle_pivot_usage(self, symbol):
+            """Toggle the use of pivot prices for the given symbol."""
+            pivot_button = self.symbol_widgets[symbol]['pivot_toggle_button']
+            use_pivot = pivot_button.isChecked()
+            pivot_button.setText(f"Use Pivot: {'On' if use_pivot else 'Off'}")
+            if use_pivot:
+                pivot_button.setStyleSheet("background-color: green; color: white;")
+            else:
+                pivot_button.setStyleSheet("background-color: red; color: white;")
+            self.engine.submit('set_pivot_usage', symbol, use_pivot)
+
+        def toggle_new_trade_permission(self, symbol):
+            """Toggle whether new trades can be opened when an existing trade is open."""
+            new_trade_button = self.symbol_widgets[symbol]['allow_new_trade_button']
+            allow_new_trade = new_trade_button.isChecked()
+            new_trade_button.setText(f"Allow New Trade: {'On' if allow_new_trade else 'Off'}")
+            if allow_new_trade:
+                new_trade_button.setStyleSheet("background-color: green; color: white;")
+            else:
+                new_trade_button.setStyleSheet("background-color: red; color: white;")
+            self.engine.submit('set_new_trade_permission', symbol, allow_new_trade)
+
+        def manual_trade_values(self, symbol):
+            """Read risk, distance, lot size and martingale multiplier from the symbol's entries."""
+            widgets = self.symbol_widgets[symbol]
+            try:
+                return (
+                    float(widgets['risk_entry'].text()),
+                    float(widgets['distance_entry'].text()),
+                    float(widgets['volume_entry'].text()),
+                    float(widgets['martingale_entry'].text())
+                )
+            except ValueError as e:
+                self.add_log(f"Invalid input for {symbol}: {e}")
+                return None
+
+        def manual_trade(self, symbol, direction):
+            values = self.manual_trade_values(symbol)
+            if values is not None:
+                # Every click is a trade of its own, also when clicked again before the first one filled
+                self.engine.submit('manual_trade', symbol, direction, *values, uuid.uuid4().hex)
+
+        def manual_reverse(self, symbol):
+            values = self.manual_trade_values(symbol)
+            if values is not None:
+                self.engine.submit('manual_reverse', symbol, *values)
+
+        def add_log(self, message):
+            timestamp = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+            self.engine.submit('record_dashboard_log', message)
+            self.log_display.appendPlainText(f"{timestamp}: {message}")
+
+        def closeEvent(self, event):
+            if isinstance(self.engine, RemoteEngine):
+                # Step 1: Detach from the headless engine, which keeps trading
+                self.engine.detach()
+            else:
+                # Step 1: Remove all pending orders and stop the engine, which closes the journal
+                self.engine.submit('shutdown')
+                self.engine.join(timeout=10)
+                self.process_engine_events()
+
+            # Step 2: Accept the event to close the platform
+            event.accept()
+
+def run_headless(config_path=None, mock=None):
+    config = load_engine_config(config_path) if config_path else {}
+    if mock is not None:
+        config['mock'] = mock
+    headless = HeadlessEngine(config)
+    headless.start()
+    print(f"Engine running headless, API on http://{headless.api.address[0]}:{headless.api.address[1]}, Ctrl+C to stop")
+    try:
+        headless.wait()
+    except KeyboardInterrupt:
+        headless.stop()
+
+def run_orchestrator(config_path):
+    orchestrator = Orchestrator(load_engine_config(config_path))
+    orchestrator.start()
+    try:
+        orchestrator.run()
+    except KeyboardInterrupt:
+        orchestrator.stop()
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=f"{strategy_name} platform")
+    parser.add_argument('--headless', action='store_true', help="run the engine without the dashboard")
+    parser.add_argument('--config', help="JSON engine config applied at start, with --headless")
+    parser.add_argument('--attach', metavar='HOST:PORT', help="open a dashboard for the headless engine at HOST:PORT")
+    parser.add_argument('--orchestrate', metavar='ACCOUNTS', help="run a headless engine per account of the JSON file ACCOUNTS")
+    parser.add_argument('--backtest', metavar='CONFIG', help="replay the recorded signals and prices of the JSON file CONFIG")
+    parser.add_argument('--sweep', metavar='CONFIG', help="backtest the parameter grid or search of the JSON file CONFIG on all cores")
+    parser.add_argument('--benchmark', metavar='CONFIG', nargs='?', const='',
+                        help="time the trading cycle stages on a mock broker and compare them to the stored baseline")
+    parser.add_argument('--mock', metavar='CONFIG', nargs='?', const='',
+                        help="trade a mock broker instead of MetaTrader 5, configured by the JSON file CONFIG")
+    args = parser.parse_args(argv)
+    mock = None
+    if args.mock is not None:
+        if args.attach or args.orchestrate or args.backtest or args.sweep or args.benchmark is not None:
+            parser.error("--mock applies to the dashboard and --headless, engines of --orchestrate set 'mock' in their config")
+        mock = load_engine_config(args.mock) if args.mock else {}
+    if args.benchmark is not None:
+        if run_benchmark(args.benchmark or None):
+            sys.exit(1)
+        return
+    if args.sweep:
+        run_sweep(args.sweep)
+        return
+    if args.backtest:
+        run_backtest(args.backtest)
+        return
+    if args.orchestrate:
+        run_orchestrator(args.orchestrate)
+        return
+    if args.config and not args.headless:
+        parser.error("--config requires --headless")
+    if args.headless:
+        if args.attach:
+            parser.error("--attach opens a dashboard and cannot be combined with --headless")
+        run_headless(args.config, mock)
+        return
+
+    app = QtWidgets.QApplication([])
+    if args.attach:
+        host, _, port = args.attach.rpartition(':')
+        engine = RemoteEngine((host, int(port)))
+        try:
+            engine.attach()
+        except requests.RequestException as e:
+            parser.exit(1, f"Cannot attach to the engine at {args.attach}: {e}\n")
+    else:
+        # The dashboard is shown right away, the engine connects the terminal in the background
+        broker = select_mt5_backend(mock)
+        engine = TradingEngine()
+        if broker is not None:
+            broker.log = engine.add_log
+        if metrics_address is not None:
+            try:
+                MetricsServer(metrics_address).start()
+            except OSError as e:
+                print(f"Failed to start the metrics server on {metrics_address}: {e}")
+    dashboard = TradingDashboard(engine)
 
     dashboard.show()
-    dashboard.update_gui_loop()
+    engine.start()
     app.exec()
 
 if __name__ == "__main__":
@@ -0,0 +1,40 @@
+import importlib.util
+import pathlib
+import sys
+
+import pytest
+
+platform_path = pathlib.Path(__file__).resolve().parent.parent / "Hani Platform.py"
+
+
+def load_platform():
+    """Import "Hani Platform.py" as the hani_platform module, without PyQt."""
+    if 'hani_platform' in sys.modules:
+        return sys.modules['hani_platform']
+    spec = importlib.util.spec_from_file_location('hani_platform', platform_path)
+    module = importlib.util.module_from_spec(spec)
+    argv = sys.argv
+    sys.argv = [str(platform_path), '--headless']  # The dashboard classes are only defined with PyQt loaded
+    try:
+        sys.modules['hani_platform'] = module
+        spec.loader.exec_module(module)
+    finally:
+        sys.argv = argv
+    return module
+
+
+@pytest.fixture(scope='session')
+def hp():
+    return load_platform()
+
+
+@pytest.fixture
+def broker(hp):
+    """A started MockBroker with a still price, used as the terminal for the test."""
+    mock = hp.MockBroker({'symbols': {'EURUSD.r': 1.1, 'USDJPY.r': 150.0}, 'volatility': 0.0, 'seed': 1})
+    mock.start()
+    previous = hp.mt5
+    hp.use_mt5(mock)
+    yield mock
+    hp.use_mt5(previous)
+    mock.stop()
@@ -0,0 +1,9 @@
+def test_backtest_leaves_the_process_as_it_found_it(hp):
+    ticks = {'EURUSD.r': ([0, 60, 120, 180], [1.1000, 1.1010, 1.1020, 1.1030], [1.1002, 1.1012, 1.1022, 1.1032])}
+    broker = hp.SimulatedBroker(ticks)
+    signals = [{'event': "Trade|EURUSD.r,0.1,Buy", 'id': "1"}]
+    backend, mode = hp.mt5, hp.trade_management_mode
+    report = hp.Backtest(broker, [60], signals, mode=mode % 4 + 1, journal=False).run()
+    assert report.mode == mode % 4 + 1
+    assert hp.trade_management_mode == mode
+    assert hp.mt5 is backend
@@ -0,0 +1,38 @@
+import json
+
+
+def case(p50, calls, positions=10, symbols=1):
+    return {'positions': positions, 'symbols': symbols,
+            'stages': {'cycle': {'p50': p50, 'p90': p50, 'p99': p50, 'max': p50}}, 'calls': calls}
+
+
+config = {'tolerance': 0.5, 'min_delta_ms': 0.1}
+
+
+def test_regressions(hp):
+    baseline = {'cases': [case(1.0, {'positions_get': 1.0})]}
+    assert hp.benchmark_regressions([case(1.4, {'positions_get': 1.0})], baseline, config) == []
+    assert hp.benchmark_regressions([case(1.6, {'positions_get': 1.0})], baseline, config) == [
+        "10 positions, 1 symbols: cycle p50 1.000 -> 1.600 ms"]
+    assert hp.benchmark_regressions([case(1.0, {'positions_get': 1.0, 'symbol_info_tick': 2.0})], baseline, config) == [
+        "10 positions, 1 symbols: mt5.symbol_info_tick 0 -> 2 calls per cycle"]
+    assert hp.benchmark_regressions([case(9.0, {}, positions=500)], baseline, config) == []  # Not in the baseline
+
+
+def test_small_differences_are_noise(hp):
+    baseline = {'cases': [case(0.01, {})]}
+    assert hp.benchmark_regressions([case(0.05, {})], baseline, config) == []
+
+
+def test_baseline_stored_then_compared(hp, tmp_path):
+    path = tmp_path / "baseline.json"
+    settings = dict(hp.benchmark_defaults, baseline=str(path), positions=[5], symbols=[2], cycles=3, warmup=1)
+    results = hp.benchmark_results(settings)
+    assert [(result['positions'], result['symbols'], result['open_positions']) for result in results] == [(5, 2, 5)]
+    assert set(results[0]['stages']) == set(hp.benchmark_stages) | {'cycle'}
+
+    assert hp.check_benchmark_baseline(results, settings) == []
+    assert json.loads(path.read_text())['cases'] == results
+    more_calls = [dict(results[0], calls=dict(results[0]['calls'], order_send=1.0))]
+    assert hp.check_benchmark_baseline(more_calls, settings) == [
+        "5 positions, 2 symbols: mt5.order_send 0 -> 1 calls per cycle"]
@@ -0,0 +1,84 @@
+import time
+
+import pytest
+
+
+def buy(broker, **fields):
+    return broker.order_send({'action': broker.TRADE_ACTION_DEAL, 'symbol': 'EURUSD.r', 'volume': 0.1,
+                              'type': broker.ORDER_TYPE_BUY, **fields})
+
+
+def test_jump_fills_the_take_profit(hp, broker):
+    price = broker.symbol_info_tick('EURUSD.r').ask
+    assert buy(broker, tp=round(price * 1.005, 5)).retcode == broker.TRADE_RETCODE_DONE
+    broker.apply({'action': 'jump', 'symbol': 'EURUSD.r', 'percent': 1})
+    assert broker.positions_get() == ()
+    assert broker.deals[-1]['comment'].startswith("[tp")
+
+
+def test_scripted_rejections_and_disconnects(hp, broker):
+    broker.apply({'action': 'reject', 'count': 1, 'retcode': broker.TRADE_RETCODE_REQUOTE})
+    assert buy(broker).retcode == broker.TRADE_RETCODE_REQUOTE
+    assert buy(broker).retcode == broker.TRADE_RETCODE_DONE
+
+    broker.apply({'action': 'disconnect', 'seconds': 60})
+    assert broker.symbol_info_tick('EURUSD.r') is None
+    assert buy(broker) is None
+    assert broker.last_error()[0] == -10004
+
+
+def test_failed_scenario_actions_are_logged(hp):
+    lines = []
+    broker = hp.MockBroker({'symbols': ['EURUSD.r'], 'scenario': [{'at': 0, 'action': 'explode'}]}, log=lines.append)
+    broker.start()
+    broker.stop()
+    assert lines == ["Mock broker scenario action {'at': 0, 'action': 'explode'} failed: Unknown scenario action explode"]
+
+
+@pytest.fixture
+def engine(hp, broker):
+    engine = hp.TradingEngine(signal_address=None, journal=hp.Journal("test", directory=None),
+                              state_store=hp.StateStore(":memory:"), workers=0)
+    engine.symbol_settings['EURUSD.r'] = {'commission': 10, 'tp1': 50}
+    yield engine
+    engine.order_pipeline.close()
+    engine.state_store.close()
+
+
+def run_commands(engine):
+    while not engine.command_queue.empty():  # The order completions
+        engine.handle_command(engine.command_queue.get())
+
+
+def test_engine_trades_on_the_mock(hp, broker, engine):
+    engine.open_position('EURUSD.r', 0.1, 'Buy', open_id="click 1")
+    engine.open_position('EURUSD.r', 0.1, 'Buy', open_id="click 2")  # Explicit requests are separate orders
+    run_commands(engine)
+    positions = broker.positions_get()
+    assert len(positions) == 2
+    engine.close_trade(positions[0].ticket)
+    assert [position.ticket for position in broker.positions_get()] == [positions[1].ticket]
+
+
+def test_repeated_hedge_waits_for_the_retried_one(hp, broker):
+    engine = hp.TradingEngine(signal_address=None, journal=hp.Journal("test", directory=None),
+                              state_store=hp.StateStore(":memory:"), workers=2)
+    policy = dict(engine.order_pipeline.retry_policy)
+    policy['no_connection'] = dict(policy['no_connection'], delay=0.3)
+    engine.order_pipeline.retry_policy = policy
+    try:
+        buy(broker)
+        broker.apply({'action': 'reject', 'count': 1, 'retcode': broker.TRADE_RETCODE_CONNECTION})
+        engine.hedge_trade('EURUSD.r')
+        deadline = time.monotonic() + 5
+        while engine.order_pipeline.pending() and time.monotonic() < deadline:
+            engine.hedge_trade('EURUSD.r')  # The position is still unhedged while the retry waits
+            time.sleep(0.05)
+        assert engine.order_pipeline.pending() == 0
+        engine.hedge_trade('EURUSD.r')  # Two positions now, nothing is sent
+        assert engine.order_pipeline.pending() == 0
+        assert sorted((position.type, position.volume) for position in broker.positions_get()) == [
+            (broker.ORDER_TYPE_BUY, 0.1), (broker.ORDER_TYPE_SELL, 0.1)]
+    finally:
+        engine.order_pipeline.close()
+        engine.state_store.close()
@@ -0,0 +1,55 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+minutes = timedelta(minutes=1)
+nfp = {'date': datetime(2025, 1, 10, 13, 30), 'currency': 'USD', 'title': "Non-Farm Payrolls"}
+cpi = {'date': datetime(2025, 1, 10, 13, 40), 'currency': 'USD', 'title': "CPI"}
+ecb = {'date': datetime(2025, 1, 10, 9, 0), 'currency': 'EUR', 'title': "ECB Press Conference"}
+boj = {'date': datetime(2025, 1, 11, 3, 0), 'currency': 'JPY', 'title': "BoJ Rate Decision"}
+
+
+@pytest.fixture
+def calendar(hp):
+    return hp.NewsCalendar([boj, cpi, ecb, nfp], before=15 * minutes, after=15 * minutes)
+
+
+def test_outside_every_window(calendar):
+    assert calendar.window(datetime(2025, 1, 10, 12, 0)) is None
+    assert calendar.window(datetime(2025, 1, 9)) is None
+    assert calendar.window(datetime(2025, 1, 12)) is None
+
+
+def test_window_bounds_are_inclusive(calendar):
+    assert calendar.window(ecb['date'] - 15 * minutes).news is ecb
+    assert calendar.window(ecb['date'] + 15 * minutes).news is ecb
+    assert calendar.window(ecb['date'] + 16 * minutes) is None
+
+
+def test_overlapping_windows_are_merged(hp, calendar):
+    window = calendar.window(datetime(2025, 1, 10, 13, 50))
+    assert window == hp.NewsWindow(nfp['date'] - 15 * minutes, cpi['date'] + 15 * minutes, cpi)
+    assert calendar.window(datetime(2025, 1, 10, 13, 20)).news is nfp
+
+
+def test_currencies_and_symbols(calendar):
+    moment = datetime(2025, 1, 10, 9, 5)
+    assert calendar.window(moment, symbol='EURUSD.r').news is ecb
+    assert calendar.window(moment, symbol='USDJPY.r') is None
+    assert calendar.window(moment, currencies=['USD', 'JPY']) is None
+    assert calendar.window(moment, currencies=['USD'], symbol='EURUSD.r') is None
+
+
+def test_next_event(calendar):
+    assert calendar.next_event(datetime(2025, 1, 1)) is ecb
+    assert calendar.next_event(ecb['date']) is nfp
+    assert calendar.next_event(datetime(2025, 1, 10), symbol='USDJPY.r') is nfp
+    assert calendar.next_event(datetime(2025, 1, 10, 14), currencies=['JPY']) is boj
+    assert calendar.next_event(boj['date']) is None
+
+
+def test_empty_calendar(hp):
+    calendar = hp.NewsCalendar()
+    assert len(calendar) == 0
+    assert calendar.window(datetime(2025, 1, 10)) is None
+    assert calendar.next_event(datetime(2025, 1, 10)) is None
@@ -0,0 +1,101 @@
+import queue
+import threading
+
+
+def open_request(broker, symbol='EURUSD.r', volume=0.1):
+    return {'action': broker.TRADE_ACTION_DEAL, 'symbol': symbol, 'volume': volume, 'type': broker.ORDER_TYPE_BUY}
+
+
+def open_position(broker, volume=0.1):
+    broker.order_send(open_request(broker, volume=volume))
+    return broker.positions_get()[-1].ticket
+
+
+def close_request(broker, ticket, volume):
+    return {'action': broker.TRADE_ACTION_DEAL, 'symbol': 'EURUSD.r', 'volume': volume, 'type': broker.ORDER_TYPE_SELL,
+            'position': ticket}
+
+
+def test_requotes_are_retried(hp, broker):
+    outcomes = []
+    pipeline = hp.OrderPipeline(outcomes.append, log=lambda message: None, workers=0)
+    broker.apply({'action': 'reject', 'count': 2, 'retcode': broker.TRADE_RETCODE_REQUOTE})
+    assert pipeline.submit(('EURUSD.r', 0, 'open'), lambda: open_request(broker))
+    [outcome] = outcomes
+    assert outcome.ok and outcome.attempts == 3
+    assert len(broker.positions_get()) == 1
+    assert pipeline.pending() == 0
+
+
+def test_rejections_are_not_retried(hp, broker):
+    outcomes = []
+    pipeline = hp.OrderPipeline(outcomes.append, log=lambda message: None, workers=0)
+    broker.apply({'action': 'reject', 'count': 1, 'retcode': broker.TRADE_RETCODE_NO_MONEY})
+    pipeline.submit(('EURUSD.r', 0, 'open'), lambda: open_request(broker))
+    [outcome] = outcomes
+    assert not outcome.ok and outcome.attempts == 1
+    assert broker.positions_get() == ()
+
+
+def test_nothing_left_to_send(hp, broker):
+    outcomes = []
+    pipeline = hp.OrderPipeline(outcomes.append, workers=0)
+    pipeline.submit(('EURUSD.r', 5, 'close'), lambda: None)
+    [outcome] = outcomes
+    assert not outcome.ok and outcome.reason == "nothing left to send" and outcome.attempts == 1
+    assert not pipeline.ticket_busy(5)
+
+
+class Gate:
+    """build_request that waits until released, so an order can be held in flight."""
+
+    def __init__(self, request):
+        self.request = request
+        self.entered = threading.Event()
+        self.released = threading.Event()
+
+    def __call__(self):
+        self.entered.set()
+        assert self.released.wait(5)
+        return self.request
+
+
+def test_same_key_is_refused_and_same_ticket_waits(hp, broker):
+    ticket = open_position(broker, volume=0.3)
+    outcomes = queue.Queue()
+    pipeline = hp.OrderPipeline(outcomes.put, workers=2)
+    try:
+        gate = Gate(close_request(broker, ticket, 0.1))
+        assert pipeline.submit(('EURUSD.r', ticket, 'tp1'), gate)
+        assert gate.entered.wait(5)
+        assert not pipeline.submit(('EURUSD.r', ticket, 'tp1'), gate)  # Already in flight
+
+        sent = []
+        assert pipeline.submit(('EURUSD.r', ticket, 'close'), lambda: sent.append(True) or close_request(broker, ticket, 0.2))
+        assert pipeline.ticket_busy(ticket) and pipeline.pending() == 2
+        assert not sent  # Waits for the partial close of the same ticket
+
+        gate.released.set()
+        first, second = outcomes.get(timeout=5), outcomes.get(timeout=5)
+        assert [first.key[2], second.key[2]] == ['tp1', 'close']
+        assert first.ok and second.ok
+        assert broker.positions_get() == ()
+        assert not pipeline.ticket_busy(ticket) and pipeline.pending() == 0
+    finally:
+        pipeline.close()
+
+
+def test_waiting_orders_fail_when_the_pipeline_closes(hp, broker):
+    ticket = open_position(broker)
+    outcomes = queue.Queue()
+    pipeline = hp.OrderPipeline(outcomes.put, workers=1)
+    gate = Gate(close_request(broker, ticket, 0.1))
+    pipeline.submit(('EURUSD.r', ticket, 'close'), gate)
+    assert gate.entered.wait(5)
+    pipeline.submit(('EURUSD.r', ticket, 'sltp'), lambda: {'action': broker.TRADE_ACTION_SLTP, 'position': ticket})
+    pipeline.close(wait=False)
+    gate.released.set()
+    first, second = outcomes.get(timeout=5), outcomes.get(timeout=5)
+    assert first.ok
+    assert second.key[2] == 'sltp' and not second.ok and second.reason == "order pipeline closed"
+    assert not pipeline.submit(('EURUSD.r', 0, 'open'), lambda: open_request(broker))
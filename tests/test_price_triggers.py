@@ -0,0 +1,68 @@
+import pytest
+
+
+@pytest.fixture
+def index(hp):
+    return hp.PriceTriggerIndex()
+
+
+def keys(triggers):
+    return [trigger.key for trigger in triggers]
+
+
+def test_above_and_below(hp, index):
+    index.place(hp.PriceTrigger('sell', 'EURUSD.r', 'above', level=1.10))
+    index.place(hp.PriceTrigger('buy', 'EURUSD.r', 'below', level=1.05))
+    assert index.check('EURUSD.r', 1.08) == []
+    assert keys(index.check('EURUSD.r', 1.10)) == ['sell']
+    assert keys(index.check('EURUSD.r', 1.05)) == ['buy']
+    assert index.check('USDJPY.r', 1.05) == []
+
+
+def test_crossed_triggers_fire_in_level_order(hp, index):
+    for key, level in (('c', 1.3), ('a', 1.1), ('b', 1.2)):
+        index.place(hp.PriceTrigger(key, 'EURUSD.r', 'above', level=level))
+    assert keys(index.check('EURUSD.r', 1.25)) == ['a', 'b']
+    assert keys(index.check('EURUSD.r', 1.5)) == ['c']
+
+
+def test_one_shot_stays_disarmed_until_armed(hp, index):
+    index.place(hp.PriceTrigger('sell', 'EURUSD.r', 'above', level=1.10))
+    assert keys(index.check('EURUSD.r', 1.11)) == ['sell']
+    assert not index.get('sell').armed
+    assert index.check('EURUSD.r', 1.12) == []
+    index.arm('sell')
+    assert keys(index.check('EURUSD.r', 1.12)) == ['sell']
+
+
+def test_rearms_once_back_past_the_gap(hp, index):
+    index.place(hp.PriceTrigger('sell', 'EURUSD.r', 'above', level=1.10, one_shot=False, rearm_gap=0.02))
+    assert keys(index.check('EURUSD.r', 1.10)) == ['sell']
+    assert index.check('EURUSD.r', 1.09) == []  # Not yet back below 1.08
+    assert not index.get('sell').armed
+    assert index.check('EURUSD.r', 1.08) == []
+    assert index.get('sell').armed
+    assert keys(index.check('EURUSD.r', 1.10)) == ['sell']
+
+
+def test_set_level_moves_and_parks(hp, index):
+    index.place(hp.PriceTrigger('buy', 'EURUSD.r', 'below'))  # Parked without a level
+    assert index.check('EURUSD.r', 0.5) == []
+    index.set_level('buy', 1.05)
+    index.set_level('buy', 1.00)
+    assert index.check('EURUSD.r', 1.04) == []
+    assert keys(index.check('EURUSD.r', 1.00)) == ['buy']
+    index.arm('buy')
+    index.set_level('buy', None)
+    assert index.check('EURUSD.r', 0.9) == [] and index.get('buy').armed
+
+
+def test_disarm_place_and_remove(hp, index):
+    index.place(hp.PriceTrigger('sell', 'EURUSD.r', 'above', level=1.10))
+    index.disarm('sell')
+    assert index.check('EURUSD.r', 1.2) == []
+    index.place(hp.PriceTrigger('sell', 'EURUSD.r', 'above', level=1.15))  # Replaces the trigger
+    assert len(index) == 1
+    assert index.check('EURUSD.r', 1.12) == []
+    assert index.remove('sell') is not None
+    assert index.check('EURUSD.r', 1.2) == [] and index.get('sell') is None
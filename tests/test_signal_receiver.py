@@ -0,0 +1,35 @@
+import requests
+
+
+def test_duplicates_and_empty_signals_are_dropped(hp):
+    calls = []
+    receiver = hp.SignalReceiver(None, on_signal=lambda: calls.append(True), clock=lambda: 5.0)
+    assert receiver.push({'event': "Trade|EURUSD.r,0.1,Buy", 'id': "a"})
+    assert not receiver.push({'event': "Trade|EURUSD.r,0.1,Buy", 'id': "a"})
+    assert receiver.push({'event': "Trade|EURUSD.r,0.1,Buy"})  # Signals without an id are never duplicates
+    assert not receiver.push({'event': ""})
+    assert not receiver.push(["Trade|EURUSD.r,0.1,Buy"])
+    assert len(calls) == 2
+    assert [received_at for received_at, _ in receiver.drain()] == [5.0, 5.0]
+    assert receiver.drain() == []
+
+
+def test_only_the_latest_ids_are_remembered(hp):
+    receiver = hp.SignalReceiver(None, max_remembered_ids=2)
+    for signal_id in ("a", "b", "c"):
+        receiver.push({'event': "Close|EURUSD.r", 'id': signal_id})
+    assert receiver.push({'event': "Close|EURUSD.r", 'id': "a"})
+    assert not receiver.push({'event': "Close|EURUSD.r", 'id': "c"})
+
+
+def test_posted_signals(hp):
+    receiver = hp.SignalReceiver(('127.0.0.1', 0))
+    receiver.start()
+    try:
+        url = "http://127.0.0.1:{}/strategy".format(receiver.server.server_address[1])
+        assert requests.post(url, json={'event': "Trade|EURUSD.r,0.1,Buy", 'id': "x"}, timeout=5).status_code == 202
+        assert requests.post(url, json={'event': "Trade|EURUSD.r,0.1,Buy", 'id': "x"}, timeout=5).status_code == 200
+        assert requests.post(url, data="Close|EURUSD.r", timeout=5).status_code == 202
+    finally:
+        receiver.stop()
+    assert [signal['event'] for _, signal in receiver.drain()] == ["Trade|EURUSD.r,0.1,Buy", "Close|EURUSD.r"]
@@ -0,0 +1,59 @@
+import pytest
+
+ticks = {'EURUSD.r': ([0, 10, 20, 30], [1.1000, 1.1010, 1.0980, 1.1050], [1.1002, 1.1012, 1.0982, 1.1052])}
+
+
+def deal(broker, order_type, volume, **fields):
+    return broker.order_send({'action': broker.TRADE_ACTION_DEAL, 'symbol': 'EURUSD.r', 'volume': volume, 'type': order_type, **fields})
+
+
+def test_no_fill_before_the_first_tick(hp):
+    broker = hp.SimulatedBroker({'EURUSD.r': ([5], [1.1], [1.1002])})
+    assert deal(broker, broker.ORDER_TYPE_BUY, 0.1).retcode == broker.TRADE_RETCODE_MARKET_CLOSED
+    broker.advance(5)
+    assert deal(broker, broker.ORDER_TYPE_BUY, 0.1).retcode == broker.TRADE_RETCODE_DONE
+
+
+def test_volume_is_checked_against_the_step(hp):
+    broker = hp.SimulatedBroker(ticks)
+    broker.advance(0)
+    assert deal(broker, broker.ORDER_TYPE_BUY, 0.015).retcode == broker.TRADE_RETCODE_INVALID_VOLUME
+
+
+def test_stop_loss_filled_at_its_level(hp):
+    broker = hp.SimulatedBroker(ticks, balance=10000.0, commission=7.0)
+    broker.advance(0)
+    assert deal(broker, broker.ORDER_TYPE_BUY, 0.1).price == pytest.approx(1.1002)  # At the ask
+    [position] = broker.positions_get()
+    broker.order_send({'action': broker.TRADE_ACTION_SLTP, 'position': position.ticket, 'sl': 1.0990, 'tp': 1.1100})
+    broker.advance(10)
+    assert broker.positions_get()[0].profit == pytest.approx((1.1010 - 1.1002) * 0.1 * 100000)
+    broker.advance(30)
+    assert broker.positions_get() == ()
+    closing = broker.deals[-1]
+    assert closing['entry'] == 'out' and closing['price'] == 1.0990 and closing['time'] == 20
+    assert broker.balance == pytest.approx(10000.0 + (1.0990 - 1.1002) * 0.1 * 100000 - 2 * 0.7)
+
+
+def test_hedging_and_netting(hp):
+    hedging = hp.SimulatedBroker(ticks)
+    hedging.advance(0)
+    deal(hedging, hedging.ORDER_TYPE_BUY, 0.1)
+    deal(hedging, hedging.ORDER_TYPE_SELL, 0.3)
+    assert sorted(position.volume for position in hedging.positions_get()) == [0.1, 0.3]
+
+    netting = hp.SimulatedBroker(ticks, hedging=False)
+    netting.advance(0)
+    deal(netting, netting.ORDER_TYPE_BUY, 0.1)
+    deal(netting, netting.ORDER_TYPE_SELL, 0.3)
+    [position] = netting.positions_get()
+    assert position.type == netting.ORDER_TYPE_SELL and position.volume == pytest.approx(0.2)
+
+
+def test_closing_a_closed_position(hp):
+    broker = hp.SimulatedBroker(ticks)
+    broker.advance(0)
+    deal(broker, broker.ORDER_TYPE_BUY, 0.1)
+    ticket = broker.positions_get()[0].ticket
+    assert deal(broker, broker.ORDER_TYPE_SELL, 0.1, position=ticket).retcode == broker.TRADE_RETCODE_DONE
+    assert deal(broker, broker.ORDER_TYPE_SELL, 0.1, position=ticket).retcode == broker.TRADE_RETCODE_POSITION_CLOSED
@@ -0,0 +1,72 @@
+import pytest
+
+
+@pytest.fixture
+def engine(hp, broker):
+    engine = hp.TradingEngine(signal_address=None, journal=hp.Journal("test", directory=None),
+                              state_store=hp.StateStore(":memory:"), workers=0)
+    yield engine
+    engine.order_pipeline.close()
+    engine.state_store.close()
+
+
+def test_round_trip(hp, tmp_path):
+    path = str(tmp_path / "state.db")
+    store = hp.StateStore(path)
+    state = {
+        'total_profits': {'EURUSD.r': 12.5},
+        'tp_status': {123: {'tp1_applied': True, 'tp2_applied': False}},
+        'entry_armed': {('EURUSD.r', 'sell'): False},
+    }
+    assert store.save(state) == 3
+    store.close()
+
+    store = hp.StateStore(path)
+    assert store.load() == state  # Integer and tuple keys come back as they were saved
+    assert store.save(state) == 0
+    store.close()
+
+
+def test_only_changed_rows_are_written(hp):
+    store = hp.StateStore(":memory:")
+    assert store.save({'total_profits': {'EURUSD.r': 1.0, 'USDJPY.r': 2.0}}) == 2
+    assert store.save({'total_profits': {'EURUSD.r': 1.0, 'USDJPY.r': 3.0}}) == 1
+    assert store.save({'total_profits': {'EURUSD.r': 1.0}}) == 1
+    assert store.save({'tp_status': {}}) == 0
+    assert store.load() == {'total_profits': {'EURUSD.r': 1.0}}
+    store.close()
+
+
+def test_state_dict_reports_nested_changes(hp):
+    changes = []
+    state = hp.StateDict(lambda: changes.append(True), {'EURUSD.r': {'tp1': 50}})
+    assert not changes
+    state['EURUSD.r']['tp1'] = 40
+    state.setdefault(7, {'tp1_applied': False})['tp1_applied'] = True
+    assert len(changes) == 3
+    assert isinstance(state[7], hp.StateDict)
+    assert state == {'EURUSD.r': {'tp1': 40}, 7: {'tp1_applied': True}}
+
+
+def test_engine_saves_only_dirty_namespaces(hp, engine):
+    saved = []
+    save = engine.state_store.save
+    engine.state_store.save = lambda namespaces: saved.append(sorted(namespaces)) or save(namespaces)
+
+    engine.save_state()
+    assert saved == []
+    engine.symbol_settings['EURUSD.r'] = {'tp1': 50}  # A symbol without entry triggers yet
+    engine.save_state()
+    engine.save_state()
+    assert saved == [['symbol_settings']]
+
+    engine.total_profits['EURUSD.r'] = 5.0
+    engine.reset_total_profit()
+    engine.entry_triggers.place(hp.PriceTrigger(('EURUSD.r', 'sell'), 'EURUSD.r', 'above', armed=False))
+    engine.save_state()
+    assert saved[-1] == ['entry_armed', 'total_profits']
+    assert engine.state_store.load() == {
+        'symbol_settings': {'EURUSD.r': {'tp1': 50}},
+        'total_profits': {'EURUSD.r': 0},
+        'entry_armed': {('EURUSD.r', 'sell'): False},
+    }
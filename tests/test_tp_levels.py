@@ -0,0 +1,58 @@
+from collections import namedtuple
+
+import pytest
+
+Position = namedtuple('Position', 'ticket symbol profit volume')
+
+defaults = {'R1': 12, 'R2': 13, 'R3': 15, 'commission': 10, 'loss_threshold': 0.0, 'tp1': 50, 'tp2': 50}
+
+
+def evaluate(hp, positions, tp_status=None, symbol_settings=None, total_profits=None, balance=1000.0):
+    return hp.evaluate_tp_levels(positions, tp_status or {}, symbol_settings or {}, defaults, total_profits or {}, balance)
+
+
+def test_no_positions(hp):
+    assert evaluate(hp, []) == []
+
+
+def test_tp1_once_profit_passes_r1(hp):
+    # R1 of 12% of 1000 is 120, plus 10 commission for 1 lot
+    assert evaluate(hp, [Position(1, 'EURUSD.r', 129.0, 1.0)]) == []
+    assert evaluate(hp, [Position(1, 'EURUSD.r', 126.0, 0.5)]) == [hp.TpAction('tp1', 'EURUSD.r', 1, 50.0)]
+
+
+def test_tp1_not_repeated(hp):
+    actions = evaluate(hp, [Position(1, 'EURUSD.r', 125.0, 0.5)], tp_status={1: {'tp1_applied': True}})
+    assert [action.kind for action in actions] == []
+
+
+def test_tp2_counts_the_banked_profit_of_the_symbol(hp):
+    positions = [Position(1, 'EURUSD.r', 100.0, 1.0), Position(2, 'USDJPY.r', 100.0, 1.0)]
+    actions = evaluate(hp, positions, tp_status={1: {'tp1_applied': True}, 2: {'tp1_applied': True}},
+                       total_profits={'EURUSD.r': 45.0})
+    assert actions == [hp.TpAction('tp2', 'EURUSD.r', 1, 50.0)]
+
+
+def test_symbol_settings_override_the_defaults(hp):
+    settings = {'EURUSD.r': dict(defaults, R1=5, tp1=30)}
+    positions = [Position(1, 'EURUSD.r', 70.0, 1.0), Position(2, 'USDJPY.r', 70.0, 1.0)]
+    assert evaluate(hp, positions, symbol_settings=settings) == [hp.TpAction('tp1', 'EURUSD.r', 1, 30.0)]
+
+
+def test_r3_closes_the_symbol_without_other_actions(hp):
+    positions = [Position(1, 'EURUSD.r', 140.0, 0.1), Position(2, 'EURUSD.r', 10.0, 0.1)]
+    actions = evaluate(hp, positions, total_profits={'EURUSD.r': 20.0})
+    assert actions == [hp.TpAction('close_symbol', 'EURUSD.r')]
+
+
+@pytest.mark.parametrize('tp1_applied, profit, closes', [
+    (False, -19.0, False),
+    (False, -20.0, True),
+    (True, -10.0, True),
+    (True, -9.0, False),
+])
+def test_loss_threshold_is_halved_after_tp1(hp, tp1_applied, profit, closes):
+    settings = {'EURUSD.r': dict(defaults, loss_threshold=2.0)}  # 2% of the balance
+    actions = evaluate(hp, [Position(1, 'EURUSD.r', profit, 0.1)], tp_status={1: {'tp1_applied': tp1_applied}},
+                       symbol_settings=settings)
+    assert [action.kind for action in actions] == (['loss_close'] if closes else [])